@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401  Connects the signal handlers
+        from .db import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid="api.db.configure_sqlite")
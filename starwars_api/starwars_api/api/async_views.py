@@ -0,0 +1,145 @@
+"""
+Async (ASGI-native) list, retrieve, vote and fetch endpoints.
+
+Served under /api/async/<resource>/ next to the DRF viewsets. Under an ASGI
+server these views run on the event loop and query with the async ORM
+(async iteration, `acount`, `aget`, `aupdate`), so a request never waits
+for the single thread that sync views are funnelled through. Responses have
+the same shape as the DRF endpoints: rows are rendered by the same read
+plans (see fast_serializers) and encoded by FastJSONRenderer, and lists use
+page-number pagination (`?page=`, `?page_size=`). Search, cursor
+pagination and response caching are only offered by the DRF endpoints.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import swapi_client, votes
+from .fast_serializers import get_read_plan
+from .models import Character, Film, Starship
+from .renderers import FastJSONRenderer
+from .serializers import CharacterSerializer, FilmSerializer, StarshipSerializer
+from .sync import SYNC_RESOURCES, ingest_fetched
+
+# API resource names and the model and serializer behind them.
+ASYNC_RESOURCES = {
+    "characters": (Character, CharacterSerializer),
+    "films": (Film, FilmSerializer),
+    "starships": (Starship, StarshipSerializer),
+}
+MAX_PAGE_SIZE = 1000
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def not_found(model) -> HttpResponse:
+    return json_response({"detail": f"No {model._meta.object_name} matches the given query."}, status=404)
+
+
+def get_page_size(request) -> int:
+    default = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 10
+    try:
+        return min(max(int(request.GET["page_size"]), 1), MAX_PAGE_SIZE)
+    except (KeyError, ValueError):
+        return default
+
+
+async def render_rows(serializer_class, queryset) -> list:
+    """
+    Loads and renders the rows of `queryset` through the serializer's read plan.
+    """
+    plan = get_read_plan(serializer_class)
+    return await plan.arender([row async for row in queryset.values(*plan.columns)])
+
+
+async def load_item(model, serializer_class, pk):
+    """
+    Returns the rendered object with primary key `pk`, or None.
+    """
+    rows = await render_rows(serializer_class, model.objects.filter(pk=pk))
+    return rows[0] if rows else None
+
+
+@require_GET
+async def resource_list(request, resource):
+    """
+    List a resource, paginated like the DRF endpoint ({count, next, previous, results}).
+    """
+    model, serializer_class = ASYNC_RESOURCES[resource]
+    page_size = get_page_size(request)
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 0
+    count = await model.objects.acount()
+    pages = max((count + page_size - 1) // page_size, 1)
+    if not 1 <= page <= pages:
+        return json_response({"detail": "Invalid page."}, status=404)
+    start = (page - 1) * page_size
+    results = await render_rows(serializer_class, model.objects.order_by("id")[start:start + page_size])
+    url = request.build_absolute_uri()
+    return json_response({
+        "count": count,
+        "next": replace_query_param(url, "page", page + 1) if page < pages else None,
+        "previous": (remove_query_param(url, "page") if page == 2 else replace_query_param(url, "page", page - 1))
+        if page > 1 else None,
+        "results": results,
+    })
+
+
+@require_GET
+async def resource_detail(request, resource, pk):
+    """
+    Retrieve one object.
+    """
+    model, serializer_class = ASYNC_RESOURCES[resource]
+    item = await load_item(model, serializer_class, pk)
+    return json_response(item) if item is not None else not_found(model)
+
+
+@csrf_exempt
+@require_POST
+async def resource_vote(request, resource, pk):
+    """
+    Add a vote and return the updated object (see `votes.acast_vote`).
+    """
+    model, serializer_class = ASYNC_RESOURCES[resource]
+    try:
+        obj = await model.objects.aget(pk=pk)
+    except model.DoesNotExist:
+        return not_found(model)
+    obj = await votes.acast_vote(obj)
+    item = await load_item(model, serializer_class, obj.pk)
+    item["votes"] = obj.votes  # Includes buffered votes not written yet
+    return json_response(item)
+
+
+@csrf_exempt
+@require_POST
+async def resource_fetch(request, resource):
+    """
+    Fetch a resource from SWAPI with the async client and ingest it.
+
+    Pages are downloaded by `swapi_client.afetch_all`: each request runs in
+    a worker thread (`asyncio.to_thread`), with at most SWAPI_CONCURRENCY
+    of them at once (an asyncio semaphore), while the view awaits them.
+    The rows are then ingested through `sync_to_async`, in the thread
+    shared by sync code, since the bulk write needs a transaction. The
+    response is 200 with the counts, returned once the ingest is done,
+    rather than a background job.
+    """
+    swapi_resource, model = SYNC_RESOURCES[resource]
+    delete = request.GET.get("delete", "").lower() in ("1", "true", "yes")
+    data = await swapi_client.afetch_all(swapi_resource, cache=swapi_client.get_response_cache())
+    result = await sync_to_async(ingest_fetched)(model, data, delete)
+    if isinstance(data, swapi_client.FetchResult):
+        await asyncio.to_thread(data.commit)
+    return json_response(result)
@@ -0,0 +1,113 @@
+"""
+Typed shadow columns for SWAPI's free-text attributes.
+
+SWAPI reports numbers and dates as strings ("172", "1,358", "unknown",
+"1977-05-25"), which are stored as they are. Each of them also has a typed,
+indexed shadow column holding the parsed value (NULL when it cannot be
+parsed), so range filters and sorts run in the database:
+
+- Character.height -> height_cm (integer)
+- Character.mass -> mass_kg (decimal)
+- Film.release_date -> released_on (date)
+
+The shadow columns are filled wherever rows are written: by the bulk
+upsert (`ingest.upsert`, used by syncs and imports), by a pre_save signal
+for single saves, and by migration 0006 for existing rows. Numbers too
+large for their column (e.g. "1e30") are stored as NULL, like unparseable
+ones.
+"""
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+INTEGER_LIMIT = 2 ** 31  # IntegerField holds -2**31 .. 2**31 - 1 on every backend
+DECIMAL_LIMIT = Decimal(10) ** 8  # DecimalField(max_digits=10, decimal_places=2)
+DECIMAL_PLACES = Decimal("0.01")
+
+
+def _parse_number(value):
+    """
+    Parses a SWAPI number such as "78.2" or "1,358"; None if it is not a
+    finite number.
+    """
+    try:
+        number = Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def parse_decimal(value):
+    """
+    Parses a SWAPI number such as "78.2" or "1,358"; None for "unknown",
+    "n/a", blanks, anything else that is not a number, and numbers that do
+    not fit a `DecimalField(max_digits=10, decimal_places=2)`.
+    """
+    number = _parse_number(value)
+    if number is None or abs(number) >= DECIMAL_LIMIT:
+        return None
+    return number if abs(number.quantize(DECIMAL_PLACES)) < DECIMAL_LIMIT else None
+
+
+def parse_integer(value):
+    """
+    Parses a SWAPI number like `parse_decimal`, rounded to an integer; None
+    if it does not fit an IntegerField.
+    """
+    number = _parse_number(value)
+    if number is None:
+        return None
+    number = int(number.to_integral_value())
+    return number if -INTEGER_LIMIT <= number < INTEGER_LIMIT else None
+
+
+def parse_date(value):
+    """
+    Parses an ISO date such as "1977-05-25"; None if it is not one.
+    """
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+# Shadow columns of each model (by model name), with the text field and
+# parser they come from. Migration 0006 keeps its own frozen copy.
+TYPED_FIELDS = {
+    "character": {
+        "height_cm": ("height", parse_integer),
+        "mass_kg": ("mass", parse_decimal),
+    },
+    "film": {
+        "released_on": ("release_date", parse_date),
+    },
+}
+
+
+def typed_fields(model) -> dict:
+    """
+    Returns `{shadow column: (source field, parser)}` for a model.
+    """
+    return TYPED_FIELDS.get(model._meta.model_name, {})
+
+
+def typed_values(model, values: dict) -> dict:
+    """
+    Returns the shadow column values for a dict of field values; columns
+    whose source field is not in `values` are left out.
+    """
+    return {
+        name: parse(values[source])
+        for name, (source, parse) in typed_fields(model).items()
+        if source in values
+    }
+
+
+def fill_typed_fields(instance, update_fields=None):
+    """
+    Sets the shadow columns of a model instance from its text fields (only
+    those in `update_fields`, when given).
+    """
+    for name, (source, parse) in typed_fields(type(instance)).items():
+        if update_fields is None or source in update_fields:
+            setattr(instance, name, parse(getattr(instance, source)))
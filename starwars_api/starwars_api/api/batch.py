@@ -0,0 +1,84 @@
+"""
+Batch reads: many objects of a resource by id, in one request.
+
+`GET /api/<resource>/batch/?ids=1,2,3`, or `POST` with `{"ids": [1, 2, 3]}`
+for long lists, returns the objects keyed by id, in the order requested,
+with the ids that do not exist listed under `missing`:
+
+    {"results": {"1": {...}, "3": {...}}, "missing": [2]}
+
+The objects are loaded with one query, plus one per rendered relation,
+however many ids are asked for: rows go through the read plan (see
+fast_serializers) when it is available, or `in_bulk` with the relations
+prefetched and the ModelSerializer otherwise. Sparse fieldsets (`fields`,
+`omit`, `expand` in the query string) apply as on `list`.
+"""
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+MAX_BATCH_IDS = 1000  # Ids accepted per request
+
+
+def parse_ids(value) -> list:
+    """
+    Parses ids given as a comma-separated string or a list, dropping
+    duplicates but keeping their order.
+
+    Raises:
+        ValidationError: If an id is not a positive integer, or there are
+        none or more than MAX_BATCH_IDS.
+    """
+    if isinstance(value, str):
+        value = [part for part in value.split(",") if part.strip()]
+    if not isinstance(value, list):
+        raise ValidationError({"ids": "Must be a list of ids or a comma-separated string."})
+    try:
+        ids = [int(item) for item in value if not isinstance(item, bool)]
+    except (TypeError, ValueError):
+        raise ValidationError({"ids": "Ids must be integers."})
+    if len(ids) != len(value) or any(pk < 1 for pk in ids):
+        raise ValidationError({"ids": "Ids must be positive integers."})
+    ids = list(dict.fromkeys(ids))
+    if not 1 <= len(ids) <= MAX_BATCH_IDS:
+        raise ValidationError({"ids": f"Give between 1 and {MAX_BATCH_IDS} ids."})
+    return ids
+
+
+class BatchReadMixin:
+    """
+    Viewset mixin adding the `batch` action. Use with FastReadMixin.
+    """
+
+    @action(detail=False, methods=["get", "post"])
+    def batch(self, request):
+        """
+        Retrieve many objects by id: ?ids=1,2,3, or POST {"ids": [1, 2, 3]}.
+        Returns {"results": {id: object}, "missing": [id, ...]}, in the order requested.
+        """
+        source = request.query_params if request.method == "GET" else request.data
+        if not hasattr(source, "get") or source.get("ids") is None:
+            raise ValidationError({"ids": "This parameter is required."})
+        ids = parse_ids(source.get("ids"))
+        found = self.load_batch(ids)
+        return Response({
+            "results": {str(pk): found[pk] for pk in ids if pk in found},
+            "missing": [pk for pk in ids if pk not in found],
+        })
+
+    def load_batch(self, ids: list) -> dict:
+        """
+        Returns the rendered objects with the given ids, keyed by id.
+        """
+        queryset = self.get_queryset()
+        plan = self.get_read_plan()
+        if plan is not None and self.has_default_object_permissions():
+            # in_bulk() refuses .values() querysets; this is the same single query.
+            rows = list(queryset.prefetch_related(None).filter(pk__in=ids).values(*plan.columns))
+            return {row[plan.pk_column]: item for row, item in zip(rows, plan.render(rows))}
+        objects = queryset.in_bulk(ids)
+        for obj in objects.values():
+            self.check_object_permissions(self.request, obj)
+        data = self.get_serializer(list(objects.values()), many=True).data
+        return dict(zip(objects, data))
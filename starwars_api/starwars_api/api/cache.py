@@ -0,0 +1,217 @@
+"""
+Response caching and conditional GETs for the list and retrieve endpoints.
+
+Every resource has a version in Django's cache framework: a random
+generation token and the time of the last write. Every write replaces the
+version of the resource (and of the resources that embed it), so reading
+it costs one cache lookup and no database query.
+
+Responses carry a strong ETag and a Last-Modified header derived from the
+version, so clients can revalidate with If-None-Match / If-Modified-Since
+and get a 304. When response caching is enabled, serialized response data
+is also cached, keyed by resource, generation token and the request path
+with its query string; after a write the old keys are simply no longer
+looked up and expire on their own.
+
+Versions live in the cache named by API_CACHE["ALIAS"], so it must be
+shared by every worker process: the default file-based cache is shared on
+one host, Redis or Memcached across hosts. Response caching is off by
+default.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import Character, Film, Starship
+
+DEFAULT_CACHE_SETTINGS = {
+    "ENABLED": False,  # Cache serialized responses, not just versions
+    "ALIAS": "default",  # Entry in settings.CACHES for versions and responses; shared by all workers
+    "TIMEOUT": 300,  # Seconds a cached response is kept
+    "KEY_PREFIX": "api-response",
+}
+
+# Resources whose responses embed another resource, e.g. character pages
+# render their films and starships, so a film write makes them stale too.
+DEPENDENTS = {
+    Character: (),
+    Film: (Character,),
+    Starship: (Character,),
+}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_config() -> dict:
+    """
+    Returns the API_CACHE setting merged over the defaults.
+    """
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, "API_CACHE", {})}
+
+
+def _version_key(config: dict, model) -> str:
+    return f"{config['KEY_PREFIX']}:version:{model._meta.label_lower}"
+
+
+def get_version(model) -> dict:
+    """
+    Returns the current version of a resource: `token`, its generation
+    token, and `last_modified`, the time of the last write as a Unix
+    timestamp (None if there are no rows).
+
+    A missing version (first use, or evicted) is created with a new token,
+    dated from the latest `updated_at` of the model and of the models it
+    embeds (one indexed MAX query each).
+    """
+    config = get_config()
+    cache = caches[config["ALIAS"]]
+    key = _version_key(config, model)
+    version = cache.get(key)
+    if version is None:
+        embedded = [other for other, dependents in DEPENDENTS.items() if model in dependents]
+        latest = [target.objects.aggregate(last=Max("updated_at"))["last"] for target in (model, *embedded)]
+        latest = max((value for value in latest if value is not None), default=None)
+        cache.add(key, _new_version(int(latest.timestamp()) if latest else None), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_generation(model) -> str:
+    """
+    Returns the current cache generation token of a resource.
+    """
+    return get_version(model)["token"]
+
+
+def bump_generation(model):
+    """
+    Starts a new version for a resource and every resource embedding it.
+    """
+    config = get_config()
+    cache = caches[config["ALIAS"]]
+    version = _new_version(int(time.time()))
+    for target in (model, *DEPENDENTS.get(model, ())):
+        cache.set(_version_key(config, target), version, timeout=None)
+
+
+def bump_generation_on_commit(model):
+    """
+    Bumps the generation of a resource now and, when called inside a
+    transaction, again once it commits.
+
+    A concurrent reader that arrives before the commit still reads the old
+    rows, and may cache them under the first new generation; the second
+    bump retires anything read before the commit.
+    """
+    bump_generation(model)
+    using = router.db_for_write(model)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(partial(bump_generation, model), using=using)
+
+
+def _new_version(last_modified) -> dict:
+    return {"token": uuid.uuid4().hex, "last_modified": last_modified}
+
+
+def response_key(model, request) -> str:
+    """
+    Builds the cache key for a GET request on a resource.
+    """
+    config = get_config()
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"{config['KEY_PREFIX']}:{model._meta.label_lower}:{get_generation(model)}:{path}"
+
+
+def get_stats() -> dict:
+    """
+    Returns the process-wide hit and miss counters.
+    """
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": hits / total if total else 0.0}
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+class ResponseCacheMixin:
+    """
+    Viewset mixin that serves `list` and `retrieve` from the response cache.
+
+    Responses carry an `X-Cache: HIT` or `X-Cache: MISS` header.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, view, request, *args, **kwargs):
+        config = get_config()
+        if not config["ENABLED"]:
+            return view(request, *args, **kwargs)
+        cache = caches[config["ALIAS"]]
+        key = response_key(self.queryset.model, request)
+        data = cache.get(key)
+        if data is not None:
+            _count("hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+        _count("misses")
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, config["TIMEOUT"])
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin adding ETag / Last-Modified headers to `list` and `retrieve`.
+
+    The ETag hashes the resource version (see `get_version`) with the
+    request path and Accept header, so a matching If-None-Match (or a
+    recent enough If-Modified-Since) is answered with 304 without any
+    database query.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def _conditional_response(self, view, request, *args, **kwargs):
+        version = get_version(self.queryset.model)
+        variant = f"{version['token']}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+        etag = quote_etag(hashlib.md5(variant.encode()).hexdigest())
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=version["last_modified"]
+        )
+        if not_modified is not None:
+            response = not_modified
+        else:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if version["last_modified"] is not None:
+                response["Last-Modified"] = http_date(version["last_modified"])
+        return response
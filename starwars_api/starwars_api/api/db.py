@@ -0,0 +1,116 @@
+"""
+Database profiles: settings built from environment variables, and SQLite
+connection tuning.
+
+`database_settings` is called from settings.py. It returns the DATABASES
+entry for the profile chosen by `DB_ENGINE`, plus the PRAGMAs to run on
+every new SQLite connection:
+
+- sqlite (default): `DB_NAME` is the database file. Writers take the lock
+  when their transaction starts (`BEGIN IMMEDIATE`) and wait up to
+  `DB_TIMEOUT` seconds for it, and every connection switches to WAL, so
+  readers never block the writer or each other. Connections are reused
+  for `DB_CONN_MAX_AGE` seconds, so the PRAGMAs are not rerun on every
+  request. `DB_SQLITE_TUNING=0` turns the PRAGMAs off. The test database
+  is the file `DB_TEST_NAME`.
+- postgresql: `DB_NAME`, `DB_USER`, `DB_PASSWORD`, `DB_HOST`, `DB_PORT`.
+  `DB_POOL=1` uses psycopg's connection pool (`pip install
+  "psycopg[binary,pool]"`), sized by `DB_POOL_MIN_SIZE` and
+  `DB_POOL_MAX_SIZE`. Otherwise connections persist for `DB_CONN_MAX_AGE`
+  seconds, with health checks.
+
+`configure_sqlite` runs the PRAGMAs from the SQLITE_PRAGMAS setting; it is
+connected to `connection_created` by the app config.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Applied to every new SQLite connection, in this order.
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers and the writer no longer block each other
+    "synchronous": "NORMAL",  # fsync at checkpoints only; safe in WAL mode
+    "busy_timeout": 20000,  # Milliseconds to wait for a lock instead of failing (from DB_TIMEOUT)
+    "cache_size": -65536,  # Page cache per connection, in KiB (64 MiB)
+    "mmap_size": 268435456,  # Read the file through a 256 MiB memory map
+    "temp_store": "MEMORY",  # Temporary tables and indexes in memory
+}
+DEFAULT_CONN_MAX_AGE = 60  # Seconds a connection is reused (PostgreSQL without pooling, SQLite)
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+
+
+def database_settings(environ, base_dir) -> tuple:
+    """
+    Builds the database settings for the profile chosen by the environment.
+
+    Args:
+        environ: A mapping of environment variables (usually os.environ).
+        base_dir: The project directory, where the SQLite file lives by default.
+
+    Returns:
+        tuple: The DATABASES setting and the SQLITE_PRAGMAS setting.
+    """
+    engine = environ.get("DB_ENGINE", "sqlite").lower()
+    if engine not in ENGINES:
+        raise ImproperlyConfigured(f"DB_ENGINE must be one of {', '.join(ENGINES)}, not {engine!r}.")
+    if engine == "postgresql":
+        default = {
+            "ENGINE": ENGINES[engine],
+            "NAME": environ.get("DB_NAME", "starwars_api"),
+            "USER": environ.get("DB_USER", ""),
+            "PASSWORD": environ.get("DB_PASSWORD", ""),
+            "HOST": environ.get("DB_HOST", ""),
+            "PORT": environ.get("DB_PORT", ""),
+            "OPTIONS": {},
+        }
+        if _flag(environ, "DB_POOL"):
+            # Pooled connections go back to the pool after each request, so
+            # persistent connections are off (Django rejects both together).
+            default["CONN_MAX_AGE"] = 0
+            default["OPTIONS"]["pool"] = {
+                "min_size": int(environ.get("DB_POOL_MIN_SIZE", 2)),
+                "max_size": int(environ.get("DB_POOL_MAX_SIZE", 10)),
+            }
+        else:
+            default["CONN_MAX_AGE"] = int(environ.get("DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE))
+            default["CONN_HEALTH_CHECKS"] = True
+        return {"default": default}, {}
+
+    timeout = float(environ.get("DB_TIMEOUT", 20))
+    default = {
+        "ENGINE": ENGINES[engine],
+        "NAME": environ.get("DB_NAME", base_dir / "db.sqlite3"),
+        "CONN_MAX_AGE": int(environ.get("DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE)),
+        "OPTIONS": {"timeout": timeout, "transaction_mode": "IMMEDIATE"},
+        # A file rather than shared-cache memory, so tests that write from
+        # several threads see the same locking as a deployment.
+        "TEST": {"NAME": environ.get("DB_TEST_NAME", base_dir / "test_db.sqlite3")},
+    }
+    pragmas = {}
+    if _flag(environ, "DB_SQLITE_TUNING", default=True):
+        pragmas = {**DEFAULT_SQLITE_PRAGMAS, "busy_timeout": int(timeout * 1000)}
+    return {"default": default}, pragmas
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Runs the SQLITE_PRAGMAS setting on a new SQLite connection.
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def _flag(environ, name: str, default: bool = False) -> bool:
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,278 @@
+"""
+Fast read-only rendering for the list and retrieve endpoints.
+
+A ReadPlan is compiled once per serializer class from the serializer's own
+fields. Rendering then reads plain rows with `.values()`, copies each column
+into the output dict (converting only the fields whose DRF representation
+differs from the database value, e.g. datetimes), and fills nested lists
+from one query per relation; lists of ids are read from the through table
+alone. Sparse fieldsets (`fields`, `omit`, `expand`, see
+serializers.DynamicFieldsMixin) get a plan of their own, which loads only
+the columns and relations they render. The output is identical to the ModelSerializer
+it was compiled from; writes keep using the ModelSerializer classes.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F, ManyToManyField, ManyToManyRel
+from django.http import Http404
+from rest_framework import serializers
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+
+# DRF fields whose to_representation returns database values unchanged.
+PASSTHROUGH_FIELDS = {
+    serializers.IntegerField: int,
+    serializers.CharField: str,
+    serializers.URLField: str,
+    serializers.EmailField: str,
+    serializers.SlugField: str,
+    serializers.BooleanField: bool,
+}
+
+OWNER_KEY = "_owner"  # Alias of the parent's pk in relation queries
+
+
+class UnsupportedField(Exception):
+    """
+    Raised while compiling a plan for a field the fast path cannot render.
+    """
+
+
+class Relation:
+    """
+    A nested to-many field: how to query it and how to render its rows.
+    """
+
+    def __init__(self, model, field_name, plan):
+        field = model._meta.get_field(field_name)
+        if isinstance(field, ManyToManyField):
+            self.back_lookup = field.related_query_name()
+        elif isinstance(field, ManyToManyRel):
+            self.back_lookup = field.field.name
+        else:
+            raise UnsupportedField(field_name)
+        self.plan = plan
+
+    def load(self, pks) -> dict:
+        """
+        Returns the rendered related objects of `pks`, grouped by owner pk.
+        """
+        rows = list(self.queryset(pks)) if pks else []
+        return self.group(rows, self.plan.render(rows))
+
+    async def aload(self, pks) -> dict:
+        """
+        Async counterpart of `load`.
+        """
+        rows = [row async for row in self.queryset(pks)] if pks else []
+        return self.group(rows, await self.plan.arender(rows))
+
+    def queryset(self, pks):
+        """
+        Returns the rows of the related objects of `pks`, each tagged with its owner.
+        """
+        return (
+            self.plan.model._default_manager
+            .filter(**{f"{self.back_lookup}__in": pks})
+            .order_by("pk")
+            .values(*self.plan.columns, **{OWNER_KEY: F(self.back_lookup)})
+        )
+
+    def group(self, rows, rendered):
+        """
+        Groups rendered related objects by the pk of the object owning them.
+        """
+        grouped = defaultdict(list)
+        for row, item in zip(rows, rendered):
+            grouped[row[OWNER_KEY]].append(item)
+        return grouped
+
+
+class IdRelation:
+    """
+    A to-many field rendered as a list of related primary keys.
+
+    The ids are read from the through table, without joining the related table.
+    """
+
+    def __init__(self, model, field_name):
+        field = model._meta.get_field(field_name)
+        if isinstance(field, ManyToManyField):
+            self.through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        elif isinstance(field, ManyToManyRel):
+            self.through = field.through
+            source, target = field.field.m2m_reverse_field_name(), field.field.m2m_field_name()
+        else:
+            raise UnsupportedField(field_name)
+        self.source = self.through._meta.get_field(source).attname
+        self.target = self.through._meta.get_field(target).attname
+
+    def load(self, pks) -> dict:
+        """
+        Returns the related ids of `pks`, grouped by owner pk, in id order.
+        """
+        return self.group(self.queryset(pks) if pks else [])
+
+    async def aload(self, pks) -> dict:
+        """
+        Async counterpart of `load`.
+        """
+        return self.group([pair async for pair in self.queryset(pks)] if pks else [])
+
+    def queryset(self, pks):
+        return (
+            self.through._default_manager
+            .filter(**{f"{self.source}__in": pks})
+            .order_by(self.target)
+            .values_list(self.source, self.target)
+        )
+
+    @staticmethod
+    def group(pairs) -> dict:
+        grouped = defaultdict(list)
+        for owner, pk in pairs:
+            grouped[owner].append(pk)
+        return grouped
+
+
+class ReadPlan:
+    """
+    Precompiled rendering plan for one ModelSerializer class.
+
+    Attributes:
+        model: The serializer's model.
+        pk_column (str): The primary key column, used to match nested rows.
+        columns (tuple): The names to pass to `.values()`.
+        steps (list): (output key, column, converter) for scalar fields, or
+            (output key, None, Relation or IdRelation) for lists, in field order.
+    """
+
+    def __init__(self, serializer_class, **options):
+        serializer = serializer_class(**options)
+        self.model = serializer.Meta.model
+        self.pk_column = self.model._meta.pk.attname
+        self.steps = []
+        columns = {self.pk_column}
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+                child = get_read_plan(type(field.child))
+                if child is None:
+                    raise UnsupportedField(key)
+                self.steps.append((key, None, Relation(self.model, field.source, child)))
+            elif isinstance(field, serializers.ManyRelatedField) and type(field.child_relation) is serializers.PrimaryKeyRelatedField:
+                self.steps.append((key, None, IdRelation(self.model, field.source)))
+            elif isinstance(field, (serializers.Serializer, serializers.ListSerializer, serializers.RelatedField,
+                                    serializers.ManyRelatedField, serializers.SerializerMethodField)):
+                raise UnsupportedField(key)
+            elif field.source == "*" or "." in field.source:
+                raise UnsupportedField(key)
+            else:
+                column = self.model._meta.get_field(field.source).attname  # Must be a concrete model field
+                columns.add(column)
+                convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+                self.steps.append((key, column, convert))
+        self.columns = tuple(sorted(columns))
+
+    def render(self, rows) -> list:
+        """
+        Renders `.values(*self.columns)` rows, loading nested lists with one
+        query per relation.
+        """
+        rows = list(rows)
+        pks = [row[self.pk_column] for row in rows]
+        related = {key: relation.load(pks) for key, column, relation in self.steps if column is None}
+        return [self.build(row, related) for row in rows]
+
+    async def arender(self, rows) -> list:
+        """
+        Async counterpart of `render`: nested lists are loaded with the
+        async ORM, so it can run in async views without a thread hop.
+        """
+        rows = list(rows)
+        pks = [row[self.pk_column] for row in rows]
+        related = {key: await relation.aload(pks) for key, column, relation in self.steps if column is None}
+        return [self.build(row, related) for row in rows]
+
+    def build(self, row, related) -> dict:
+        """
+        Builds the output dict for one row, given the grouped nested lists.
+        """
+        item = {}
+        for key, column, convert in self.steps:
+            if column is None:
+                item[key] = related[key].get(row[self.pk_column], [])
+            else:
+                value = row[column]
+                item[key] = value if convert is None or value is None else convert(value)
+        return item
+
+
+@lru_cache(maxsize=None)
+def get_read_plan(serializer_class, **options):
+    """
+    Returns the compiled ReadPlan for a serializer class (and sparse fieldset
+    `options`, see `serializers.field_options`), or None if the serializer
+    has fields the fast path cannot render.
+    """
+    try:
+        return ReadPlan(serializer_class, **options)
+    except (UnsupportedField, AttributeError, LookupError):
+        return None
+
+
+class FastReadMixin:
+    """
+    Viewset mixin rendering `list` and `retrieve` through a ReadPlan.
+
+    Filtering, pagination and lookups work as usual; only the row loading
+    and serialization are replaced. Falls back to the regular serializer when
+    FAST_READ_SERIALIZERS is off or the serializer cannot be compiled.
+    """
+
+    def get_read_plan(self):
+        if not getattr(settings, "FAST_READ_SERIALIZERS", True):
+            return None
+        return get_read_plan(self.get_serializer_class())
+
+    def get_read_queryset(self, plan):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return queryset.values(*plan.columns)
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        rows = self.get_read_queryset(plan)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None or not self.has_default_object_permissions():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            rows = list(self.get_read_queryset(plan).filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})[:2])
+        except (TypeError, ValueError):
+            raise Http404
+        if len(rows) != 1:
+            raise Http404
+        return Response(plan.render(rows)[0])
+
+    def has_default_object_permissions(self):
+        """
+        True when no permission class checks individual objects, so the
+        model instance `get_object` would load is not needed.
+        """
+        return all(
+            type(permission).has_object_permission is BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
@@ -0,0 +1,86 @@
+"""
+Filtering and ordering for the list endpoints (`DjangoFilterBackend`).
+
+Numeric and date attributes are filtered and sorted on their typed,
+indexed shadow columns (see `attributes`) under their public names, e.g.
+`?mass__gte=100&ordering=-height` compares `mass_kg` numerically and sorts
+on `height_cm`. Each such attribute accepts `name` (exact) and the
+`__gt`, `__gte`, `__lt`, `__lte` and `__isnull` lookups. Rows whose text
+value could not be parsed ("unknown") never match a comparison and sort
+as NULL.
+
+`?ordering=` takes a comma-separated list of fields, each optionally
+prefixed with `-`; ties are broken on `id` so pages stay stable.
+"""
+
+from django_filters import rest_framework as filters
+
+from .models import Character, Film, Starship
+
+LOOKUPS = ("exact", "gt", "gte", "lt", "lte", "isnull")
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that appends `id` to the requested ordering.
+    """
+
+    def filter(self, qs, value):
+        if value in ([], (), {}, "", None):
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        return qs.order_by(*ordering, "id")
+
+
+class TypedFilterSet(filters.FilterSet):
+    """
+    FilterSet declaring range filters on typed shadow columns.
+
+    `typed_filters` maps public attribute names to the columns filtering
+    them; each gets a filter per lookup in LOOKUPS, of the type matching
+    the column (NumberFilter, DateFilter, ...).
+    """
+    typed_filters = {}
+
+    @classmethod
+    def get_filters(cls):
+        declared = super().get_filters()
+        if cls._meta.model is None:
+            return declared
+        for name, column in cls.typed_filters.items():
+            field = cls._meta.model._meta.get_field(column)
+            for lookup in LOOKUPS:
+                filter_name = name if lookup == "exact" else f"{name}__{lookup}"
+                declared[filter_name] = cls.filter_for_field(field, column, lookup)
+        return declared
+
+
+class CharacterFilter(TypedFilterSet):
+    typed_filters = {"height": "height_cm", "mass": "mass_kg"}
+    ordering = StableOrderingFilter(fields=(
+        ("id", "id"), ("name", "name"), ("height_cm", "height"), ("mass_kg", "mass"), ("votes", "votes"),
+    ))
+
+    class Meta:
+        model = Character
+        fields = {"gender": ["exact"], "votes": ["exact", "gte", "lte"]}
+
+
+class FilmFilter(TypedFilterSet):
+    typed_filters = {"release_date": "released_on"}
+    ordering = StableOrderingFilter(fields=(
+        ("id", "id"), ("title", "title"), ("episode_id", "episode_id"), ("released_on", "release_date"),
+        ("votes", "votes"),
+    ))
+
+    class Meta:
+        model = Film
+        fields = {"episode_id": ["exact", "gte", "lte"], "votes": ["exact", "gte", "lte"]}
+
+
+class StarshipFilter(filters.FilterSet):
+    ordering = StableOrderingFilter(fields=(("id", "id"), ("name", "name"), ("votes", "votes")))
+
+    class Meta:
+        model = Starship
+        fields = {"votes": ["exact", "gte", "lte"]}
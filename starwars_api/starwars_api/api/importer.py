@@ -0,0 +1,256 @@
+"""
+Streaming bulk import of characters, films and starships.
+
+Input is NDJSON (one JSON object per line) or CSV with a header row.
+Records use model field names, so the output of the export actions can be
+imported as it is (except `include_relations` exports, whose relation ids
+are API ids); `id`, `votes`, `content_hash`, `updated_at` and the parsed
+shadow columns (`height_cm`, `mass_kg`, `released_on`) are ignored, and
+`swapi_id` may be omitted when `url` is a SWAPI URL. Characters may list
+`films` and `starships` as SWAPI ids or URLs (a JSON list, or a
+`;`-separated CSV cell); they are linked by SWAPI id, so import films and
+starships first.
+
+The stream is read line by line and processed in batches: each batch is
+validated, upserted (see `ingest.upsert`) and linked in one transaction,
+so memory use depends on the batch size, not on the input size. Batches
+are written with `ingest.executemany_insert` rather than `bulk_create`,
+which keeps million-row imports within their time budget. Invalid records
+are skipped and reported with their line number.
+"""
+
+import csv
+import json
+import re
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, router, transaction
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import ingest
+from .models import Character, Film, Starship
+from .signals import resource_changed
+from .swapi_client import parse_swapi_id
+
+BATCH_SIZE = 2000  # Records validated and written per transaction
+MAX_ERROR_SAMPLES = 20  # Invalid records reported in detail
+FORMATS = ("ndjson", "csv")
+
+# Resource names used by the command line, and the models they import into.
+RESOURCES = {
+    "characters": Character,
+    "films": Film,
+    "starships": Starship,
+}
+
+# Fields that are never imported: they are maintained by the API itself.
+EXCLUDED_FIELDS = ("id", "votes", "content_hash", "height_cm", "mass_kg", "released_on", "updated_at")
+
+
+class RecordError(ValueError):
+    """
+    Raised for a record that cannot be imported.
+    """
+
+
+# Plain http(s) URLs that Django's URLValidator always accepts (lowercase
+# dotted host name, no port, userinfo, query or fragment). Only URLs that do
+# not match go through the full, much slower, validator.
+SIMPLE_URL = re.compile(
+    r"https?://(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}(?:/[A-Za-z0-9._~-]*)*\Z"
+)
+
+
+def import_fields(model) -> list:
+    """
+    Returns the concrete fields a record for `model` may set.
+    """
+    return [field for field in model._meta.concrete_fields if field.name not in EXCLUDED_FIELDS]
+
+
+def field_cleaner(field):
+    """
+    Returns a function validating and converting one value of `field`, as
+    `field.clean` does.
+    """
+    if isinstance(field, models.URLField):
+        def clean_url(value):
+            if isinstance(value, str) and len(value) <= field.max_length and SIMPLE_URL.match(value):
+                return value
+            return field.clean(value, None)
+        return clean_url
+    return lambda value: field.clean(value, None)
+
+
+def read_records(lines, fmt: str):
+    """
+    Yields `(line number, record dict)` pairs from an iterable of lines.
+
+    Lines may be bytes or str. Blank NDJSON lines are skipped; malformed
+    ones are yielded as a RecordError instead of a dict.
+    """
+    lines = (line.decode("utf-8") if isinstance(line, bytes) else line for line in lines)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, RecordError(f"Invalid JSON: {exc}")
+            continue
+        yield number, record if isinstance(record, dict) else RecordError("Expected a JSON object.")
+
+
+def clean_record(model, fields: list, record: dict) -> tuple:
+    """
+    Validates one record and converts it to a row for `ingest.upsert`.
+
+    `fields` is a list of `(field, cleaner)` pairs, see `field_cleaner`.
+
+    Returns:
+        tuple: The row dict (every import field, with defaults for missing
+        ones) and, for characters, `{relation name: [swapi_id, ...]}`.
+    """
+    if not record.get("swapi_id") and record.get("url"):
+        swapi_id = parse_swapi_id(str(record["url"]))
+        if swapi_id < 0:
+            raise RecordError("swapi_id: Missing, and url is not a SWAPI URL.")
+        record = {**record, "swapi_id": swapi_id}
+    row = {}
+    for field, clean in fields:
+        value = record.get(field.name)
+        if value is None or value == "":
+            if not field.blank and not field.null:
+                raise RecordError(f"{field.name}: This field is required.")
+            value = None if field.null else ""
+        try:
+            value = clean(value)
+        except DjangoValidationError as exc:
+            raise RecordError(f"{field.name}: {' '.join(exc.messages)}")
+        row[field.name] = value
+    relations = {}
+    if model is Character:
+        for name in ingest.CHARACTER_RELATIONS:
+            relations[name] = relation_ids(name, record.get(name))
+    return row, relations
+
+
+def relation_ids(name: str, value) -> list:
+    """
+    Converts a relation value (list or `;`-separated string of SWAPI ids or
+    URLs) to a list of SWAPI ids.
+    """
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = [part for part in value.split(";") if part.strip()]
+    if not isinstance(value, list):
+        raise RecordError(f"{name}: Expected a list of SWAPI ids or URLs.")
+    ids = []
+    for item in value:
+        if isinstance(item, int) and not isinstance(item, bool):
+            ids.append(item)
+        elif isinstance(item, str) and parse_swapi_id(item) >= 0:
+            ids.append(parse_swapi_id(item))  # A bare id or a URL ending in one
+        else:
+            raise RecordError(f"{name}: Invalid SWAPI id or URL {item!r}.")
+    return ids
+
+
+def import_stream(model, lines, fmt: str = "ndjson", batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Imports records from an iterable of NDJSON or CSV lines.
+
+    Args:
+        model: Film, Starship or Character.
+        lines: An iterable of lines (bytes or str), e.g. an open file.
+        fmt (str): "ndjson" or "csv".
+        batch_size (int): Records per transaction.
+
+    Returns:
+        dict: Counts of `rows` read, `created`, `updated`, `unchanged` and
+        `invalid` records, `linked` relation rows (characters), the first
+        `errors` with their line numbers, `seconds` and `rows_per_second`.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+    started = time.perf_counter()
+    fields = [(field, field_cleaner(field)) for field in import_fields(model)]
+    report = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "invalid": 0, "errors": []}
+    if model is Character:
+        report["linked"] = dict.fromkeys(ingest.CHARACTER_RELATIONS, 0)
+    records = read_records(lines, fmt)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        rows, relations = [], {}
+        for number, record in batch:
+            report["rows"] += 1
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                row, related = clean_record(model, fields, record)
+            except RecordError as exc:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_ERROR_SAMPLES:
+                    report["errors"].append({"line": number, "error": str(exc)})
+                continue
+            rows.append(row)
+            if related:
+                relations[row["swapi_id"]] = related
+        _write_batch(model, rows, relations, report)
+    if report["created"] or report["updated"] or any(report.get("linked", {}).values()):
+        resource_changed.send(sender=model)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else report["rows"]
+    return report
+
+
+def _write_batch(model, rows: list, relations: dict, report: dict):
+    """
+    Upserts one batch of rows and links its relations in one transaction.
+    """
+    if not rows:
+        return
+    with transaction.atomic(using=router.db_for_write(model)):
+        counts = ingest.upsert(model, rows, executemany=True)
+        if relations:
+            for name, count in ingest.link_by_swapi_id(relations, executemany=True).items():
+                report["linked"][name] += count
+    for key in ("created", "updated", "unchanged"):
+        report[key] += counts[key]
+
+
+class ImportMixin:
+    """
+    Viewset mixin adding a streaming `import` action.
+
+    `POST <resource>/import/` reads the request body as NDJSON, or as CSV
+    when the Content-Type is `text/csv`, without loading it into memory.
+    """
+
+    @action(detail=False, methods=["post"], url_path="import", url_name="import")
+    def import_data(self, request):
+        """
+        Bulk import NDJSON (default) or CSV (Content-Type: text/csv) records.
+        Returns the import report: row counts, invalid records and rows per second.
+        """
+        fmt = "csv" if request.content_type.split(";")[0].strip() == "text/csv" else "ndjson"
+        try:
+            batch_size = int(request.query_params.get("batch_size", BATCH_SIZE))
+        except ValueError:
+            raise ValidationError({"batch_size": "Must be an integer."})
+        if not 1 <= batch_size <= 10 * BATCH_SIZE:
+            raise ValidationError({"batch_size": f"Must be between 1 and {10 * BATCH_SIZE}."})
+        # Iterating the Django request reads the body line by line.
+        return Response(import_stream(self.queryset.model, request._request, fmt, batch_size))
@@ -0,0 +1,230 @@
+"""
+In-process background jobs for long-running work such as SWAPI syncs.
+
+A job wraps a function taking the Job itself, so it can report progress.
+Jobs are run by a pluggable backend (the JOBS["BACKEND"] setting):
+
+- ThreadPoolBackend (default) runs them on a small thread pool in the web
+  process, with no broker to deploy.
+- ImmediateBackend runs them inline when submitted, for tests and scripts.
+
+Any class with a `submit(job, function)` method can be used instead, e.g.
+one handing the job to an external queue. Submitting a job identical to
+one still queued or running returns that job instead of starting another.
+
+Jobs are kept in memory, so their status is only visible to the process
+that runs them; finished jobs are forgotten after JOBS["RETENTION"]
+seconds.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_SETTINGS = {
+    "BACKEND": "api.jobs.ThreadPoolBackend",
+    "MAX_WORKERS": 2,  # Jobs run at once by the thread pool backend
+    "RETENTION": 3600,  # Seconds finished jobs stay visible
+}
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class Job:
+    """
+    One unit of background work and its state.
+
+    Attributes:
+        id (str): Unique job id.
+        kind (str): What the job does, e.g. "sync" or "fetch:films".
+        params (dict): The parameters it was submitted with.
+        status (str): "queued", "running", "succeeded" or "failed".
+        progress (dict): Counts reported while running (see `report`).
+        result: The function's return value once it succeeded.
+        error (str): The error message if it failed.
+    """
+
+    def __init__(self, kind: str, params: dict = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = dict(params or {})
+        self.status = QUEUED
+        self.progress = {"pages_fetched": 0, "rows_written": 0, "resources": {}}
+        self.result = None
+        self.error = None
+        self.created_at = timezone.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> tuple:
+        """
+        Identifies identical jobs, for deduplication.
+        """
+        return self.kind, tuple(sorted(self.params.items()))
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def report(self, name: str, **counts):
+        """
+        Records progress counts (`pages`, `rows`) for one resource and
+        updates the totals.
+        """
+        with self._lock:
+            resources = self.progress["resources"]
+            resources.setdefault(name, {}).update(counts)
+            self.progress["pages_fetched"] = sum(item.get("pages", 0) for item in resources.values())
+            self.progress["rows_written"] = sum(item.get("rows", 0) for item in resources.values())
+
+    def tracker(self, name: str):
+        """
+        Returns a `progress(**counts)` callback reporting for one resource.
+        """
+        return partial(self.report, name)
+
+    def run(self, function):
+        """
+        Runs `function(job)`, recording its status, result or error.
+        """
+        self.status, self.started_at = RUNNING, timezone.now()
+        try:
+            self.result = function(self)
+            self.status = SUCCEEDED
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", self.id, self.kind)
+            self.error = str(exc) or type(exc).__name__
+            self.status = FAILED
+        finally:
+            self.finished_at = timezone.now()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            progress = {**self.progress, "resources": {k: dict(v) for k, v in self.progress["resources"].items()}}
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImmediateBackend:
+    """
+    Runs jobs inline, in the submitting thread.
+    """
+
+    def __init__(self, **options):
+        pass
+
+    def submit(self, job: Job, function):
+        job.run(function)
+
+
+class ThreadPoolBackend:
+    """
+    Runs jobs on an in-process thread pool.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_SETTINGS["MAX_WORKERS"], **options):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, job: Job, function):
+        self.executor.submit(self._run, job, function)
+
+    def _run(self, job: Job, function):
+        try:
+            job.run(function)
+        finally:
+            connections.close_all()  # Connections opened by this worker thread
+
+
+class JobRegistry:
+    """
+    Thread-safe store of the jobs of this process.
+    """
+
+    def __init__(self, backend, retention: float = DEFAULT_JOB_SETTINGS["RETENTION"]):
+        self.backend = backend
+        self.retention = retention
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, function, **params) -> tuple:
+        """
+        Queues `function(job)` as a new job, unless an identical job is
+        still queued or running.
+
+        Returns:
+            tuple: The Job, and whether it was newly created.
+        """
+        job = Job(kind, params)
+        with self._lock:
+            self._prune()
+            for existing in self._jobs.values():
+                if existing.active and existing.key == job.key:
+                    return existing, False
+            self._jobs[job.id] = job
+        self.backend.submit(job, function)
+        return job, True
+
+    def get(self, job_id: str):
+        """
+        Returns the job with this id, or None.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        now = timezone.now()
+        expired = [
+            job.id for job in self._jobs.values()
+            if job.finished_at is not None and (now - job.finished_at).total_seconds() > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def get_registry() -> JobRegistry:
+    """
+    Returns the process-wide JobRegistry for the JOBS setting.
+    """
+    config = {**DEFAULT_JOB_SETTINGS, **getattr(settings, "JOBS", {})}
+    return _get_registry(config["BACKEND"], config["MAX_WORKERS"], config["RETENTION"])
+
+
+@lru_cache(maxsize=None)
+def _get_registry(backend: str, max_workers: int, retention: float) -> JobRegistry:
+    return JobRegistry(import_string(backend)(max_workers=max_workers), retention)
+
+
+def submit_job(request, kind: str, function, **params) -> Response:
+    """
+    Submits a job and returns the `202 Accepted` response describing it,
+    with a `Location` header pointing at its status endpoint. An identical
+    job already in progress is returned instead, with `deduplicated` set.
+    """
+    job, created = get_registry().submit(kind, function, **params)
+    location = request.build_absolute_uri(reverse("job-detail", args=[job.id]))
+    data = {**job.to_dict(), "deduplicated": not created, "url": location}
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": location})
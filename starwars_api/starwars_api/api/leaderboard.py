@@ -0,0 +1,122 @@
+"""
+In-memory top-K leaderboards of the most voted characters, films and starships.
+
+Each leaderboard is built from the database with one indexed query
+(ORDER BY votes DESC, id LIMIT K) and then kept up to date by the vote path,
+so hot reads need no query at all. Any other write to the model invalidates
+the leaderboard and the next read rebuilds it. Leaderboards are per process;
+`TTL` bounds how long votes cast in other processes can go unseen.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Character, Film, Starship
+
+DEFAULT_LEADERBOARD_SETTINGS = {
+    "SIZE": 100,  # Number of entries kept in memory (the largest allowed ?limit=)
+    "TTL": 60,  # Seconds before a leaderboard is rebuilt from the database
+}
+
+# The field shown next to the votes for each model.
+LABEL_FIELDS = {
+    Character: "name",
+    Film: "title",
+    Starship: "name",
+}
+
+
+class Leaderboard:
+    """
+    Top-K entries of one model ordered by votes (highest first), then id.
+
+    Votes only ever go up through the vote path, so an object outside the
+    top K can only enter it by being voted for, which `record` sees.
+    """
+
+    def __init__(self, model, size: int, ttl: float):
+        self.model = model
+        self.size = size
+        self.ttl = ttl
+        self.label = LABEL_FIELDS[model]
+        self._lock = threading.Lock()
+        self._entries = None  # pk -> entry dict; None means "rebuild on next read"
+        self._ranked = None  # Cached ranking of the entries
+        self._built_at = 0.0
+
+    def top(self, limit: int) -> list:
+        """
+        Returns the `limit` highest voted entries as dicts of id, label and votes.
+        """
+        with self._lock:
+            if self._entries is None or time.monotonic() - self._built_at > self.ttl:
+                self._rebuild()
+            if self._ranked is None:
+                self._ranked = sorted(self._entries.values(), key=_rank_key)
+            return [dict(entry) for entry in self._ranked[:limit]]
+
+    def record(self, obj):
+        """
+        Updates the leaderboard after `obj` received votes.
+
+        Concurrent votes can report their totals out of order, so an entry
+        only ever moves up: a lower count than the one held is ignored.
+        """
+        with self._lock:
+            if self._entries is None:
+                return
+            current = self._entries.get(obj.pk)
+            if current is not None and current["votes"] > obj.votes:
+                return
+            entry = {"id": obj.pk, self.label: getattr(obj, self.label), "votes": obj.votes}
+            if obj.pk not in self._entries and len(self._entries) >= self.size:
+                worst = max(self._entries.values(), key=_rank_key)
+                if _rank_key(entry) > _rank_key(worst):
+                    return
+                del self._entries[worst["id"]]
+            self._entries[obj.pk] = entry
+            self._ranked = None
+
+    def invalidate(self):
+        """
+        Drops the in-memory entries so the next read rebuilds them.
+        """
+        with self._lock:
+            self._entries = None
+            self._ranked = None
+
+    def _rebuild(self):
+        rows = self.model.objects.order_by("-votes", "id").values("id", self.label, "votes")[:self.size]
+        self._entries = {row["id"]: row for row in rows}
+        self._ranked = None
+        self._built_at = time.monotonic()
+
+
+def _rank_key(entry: dict):
+    return (-entry["votes"], entry["id"])
+
+
+_leaderboards = {}
+_leaderboards_lock = threading.Lock()
+
+
+def get_leaderboard(model) -> Leaderboard:
+    """
+    Returns the process-wide leaderboard for a model, creating it on first use.
+    """
+    with _leaderboards_lock:
+        if model not in _leaderboards:
+            config = {**DEFAULT_LEADERBOARD_SETTINGS, **getattr(settings, "LEADERBOARD", {})}
+            _leaderboards[model] = Leaderboard(model, config["SIZE"], config["TTL"])
+        return _leaderboards[model]
+
+
+def invalidate(model):
+    """
+    Invalidates a model's leaderboard if one has been created.
+    """
+    board = _leaderboards.get(model)
+    if board is not None:
+        board.invalidate()
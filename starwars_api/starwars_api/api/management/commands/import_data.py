@@ -0,0 +1,47 @@
+"""
+Bulk import characters, films or starships from an NDJSON or CSV file.
+
+    python manage.py import_data films films.ndjson
+    python manage.py import_data characters people.csv
+    cat people.ndjson | python manage.py import_data characters -
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import BATCH_SIZE, FORMATS, RESOURCES, import_stream
+
+
+class Command(BaseCommand):
+    help = "Bulk import characters, films or starships from an NDJSON or CSV file (- for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(RESOURCES))
+        parser.add_argument("path", help="File to read, or - for standard input.")
+        parser.add_argument("--format", choices=FORMATS,
+                            help="Input format (default: csv for .csv files, ndjson otherwise).")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help=f"Records per transaction (default {BATCH_SIZE}).")
+
+    def handle(self, *args, resource, path, format, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        fmt = format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        if path == "-":
+            report = import_stream(RESOURCES[resource], sys.stdin.buffer, fmt, batch_size)
+        else:
+            try:
+                with open(path, "rb") as stream:
+                    report = import_stream(RESOURCES[resource], stream, fmt, batch_size)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        linked = ", ".join(f"{count} {name}" for name, count in report.get("linked", {}).items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} {resource} in {report['seconds']:.1f}s "
+            f"({report['rows_per_second']} rows/s): {report['created']} created, {report['updated']} updated, "
+            f"{report['unchanged']} unchanged, {report['invalid']} invalid"
+            + (f"; linked {linked}" if linked else "")
+        ))
@@ -0,0 +1,37 @@
+"""
+Sync films, starships and characters from SWAPI in one go.
+
+    python manage.py sync_swapi
+    python manage.py sync_swapi --delete
+"""
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.sync import sync_all
+
+
+class Command(BaseCommand):
+    help = "Fetch all SWAPI resources concurrently and ingest them in one transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true",
+                            help="Also delete rows SWAPI no longer lists.")
+
+    def handle(self, *args, delete, **options):
+        try:
+            report = sync_all(delete=delete)
+        except requests.RequestException as exc:
+            raise CommandError(f"SWAPI fetch failed, nothing was written: {exc}")
+        for name, result in report["resources"].items():
+            summary = "unchanged upstream, skipped" if result.get("skipped") else (
+                f"{result['created']} created, {result['updated']} updated, {result['unchanged']} unchanged, "
+                f"{result['deleted']} deleted"
+            )
+            self.stdout.write(
+                f"{name}: {summary} (fetch {result['fetch_seconds']:.2f}s, ingest {result['ingest_seconds']:.2f}s)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced in {report['seconds']:.2f}s "
+            f"(fetch {report['fetch_seconds']:.2f}s, ingest {report['ingest_seconds']:.2f}s)"
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="character",
+            index=models.Index(
+                fields=["-votes", "id"], name="api_character_votes_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="film",
+            index=models.Index(fields=["-votes", "id"], name="api_film_votes_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="starship",
+            index=models.Index(
+                fields=["-votes", "id"], name="api_starship_votes_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Full-text search indexes for the ?search= parameter.
+#
+# SQLite: an external-content FTS5 table per model, kept in sync by triggers
+# (so bulk_create, upserts and raw UPDATEs are indexed too) and filled from
+# the existing rows. Updates that don't touch indexed columns, such as votes,
+# don't fire the triggers.
+# PostgreSQL: a GIN expression index over the same columns.
+
+from django.db import migrations
+
+SEARCH_INDEXES = {
+    "api_character": ("name",),
+    "api_film": ("title", "director", "producer"),
+    "api_starship": ("name", "model", "manufacturer"),
+}
+
+
+def sqlite_statements(table, columns):
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def postgres_statements(table, columns):
+    vector = " || ' ' || ".join(f"COALESCE(({c})::text, '')" for c in columns)
+    return [
+        f"CREATE INDEX {table}_search_idx ON {table} "
+        f"USING GIN (to_tsvector('simple'::regconfig, {vector}))"
+    ]
+
+
+def create_indexes(apps, schema_editor):
+    builders = {"sqlite": sqlite_statements, "postgresql": postgres_statements}
+    builder = builders.get(schema_editor.connection.vendor)
+    if builder is None:
+        return
+    for table, columns in SEARCH_INDEXES.items():
+        for statement in builder(table, columns):
+            schema_editor.execute(statement)
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_INDEXES:
+        if vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
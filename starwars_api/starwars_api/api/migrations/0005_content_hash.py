@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:28
+#
+# SQLite rebuilds a table to add a column with a default, which drops its
+# triggers, so the full-text search indexes of 0004 are dropped first and
+# recreated (and refilled) afterwards.
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module("api.migrations.0004_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(search_index.drop_indexes, search_index.create_indexes),
+        migrations.AddField(
+            model_name="character",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=40
+            ),
+        ),
+        migrations.AddField(
+            model_name="film",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=40
+            ),
+        ),
+        migrations.AddField(
+            model_name="starship",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=40
+            ),
+        ),
+        migrations.RunPython(search_index.create_indexes, search_index.drop_indexes),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:46
+#
+# The columns are nullable without a default, so SQLite adds them with
+# ALTER TABLE (no table rebuild) and the full-text search triggers of 0004
+# are kept. Existing rows are then filled from their text fields, with a
+# frozen copy of the parsers in api.attributes, so later changes there do
+# not change what this migration does. Removing indexed columns does
+# rebuild the tables, so when unapplying, the search indexes are dropped
+# first and recreated afterwards (as in 0005).
+
+import datetime
+from decimal import Decimal, InvalidOperation
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module("api.migrations.0004_search_index")
+
+BATCH_SIZE = 1000
+INTEGER_LIMIT = 2 ** 31
+DECIMAL_LIMIT = Decimal(10) ** 8
+DECIMAL_PLACES = Decimal("0.01")
+
+
+def parse_number(value):
+    try:
+        number = Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def parse_decimal(value):
+    number = parse_number(value)
+    if number is None or abs(number) >= DECIMAL_LIMIT:
+        return None
+    return number if abs(number.quantize(DECIMAL_PLACES)) < DECIMAL_LIMIT else None
+
+
+def parse_integer(value):
+    number = parse_number(value)
+    if number is None:
+        return None
+    number = int(number.to_integral_value())
+    return number if -INTEGER_LIMIT <= number < INTEGER_LIMIT else None
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+TYPED_FIELDS = {
+    "character": {
+        "height_cm": ("height", parse_integer),
+        "mass_kg": ("mass", parse_decimal),
+    },
+    "film": {
+        "released_on": ("release_date", parse_date),
+    },
+}
+
+
+def fill_typed_fields(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for model_name, columns in TYPED_FIELDS.items():
+        model = apps.get_model("api", model_name)
+        sources = [source for source, _ in columns.values()]
+        batch = []
+        for values in model.objects.using(db).values("pk", *sources).iterator(chunk_size=BATCH_SIZE):
+            batch.append(model(pk=values["pk"], **{
+                name: parse(values[source]) for name, (source, parse) in columns.items()
+            }))
+            if len(batch) == BATCH_SIZE:
+                model.objects.using(db).bulk_update(batch, list(columns))
+                batch = []
+        model.objects.using(db).bulk_update(batch, list(columns))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_content_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_index.create_indexes),
+        migrations.AddField(
+            model_name="character",
+            name="height_cm",
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="mass_kg",
+            field=models.DecimalField(
+                blank=True, db_index=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="film",
+            name="released_on",
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_typed_fields, migrations.RunPython.noop),
+        migrations.RunPython(migrations.RunPython.noop, search_index.drop_indexes),
+    ]
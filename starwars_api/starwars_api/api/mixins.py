@@ -0,0 +1,140 @@
+"""
+Reusable viewset mixins for the Star Wars API.
+"""
+
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .fast_serializers import get_read_plan
+from .serializers import field_options
+
+
+@lru_cache(maxsize=None)
+def get_prefetch_lookups(serializer_class, **options):
+    """
+    Works out which relations a serializer will render as nested lists.
+
+    Walks the serializer's fields (recursing into nested serializers) and
+    collects the `prefetch_related` lookup for every to-many relation, e.g.
+    ('films', 'starships') for CharacterSerializer. Reverse relations such as
+    Film.characters or Starship.pilots are picked up the same way as soon as a
+    serializer exposes them. Related objects are ordered by primary key so
+    nested lists always come out in the same order; relations rendered as
+    lists of ids load the primary keys only.
+
+    Args:
+        serializer_class: A ModelSerializer subclass.
+        **options: Sparse fieldset options (see `serializers.field_options`).
+
+    Returns:
+        tuple: The Prefetch objects to pass to `QuerySet.prefetch_related`.
+    """
+    return tuple(_collect_lookups(serializer_class(**options), prefix=""))
+
+
+def _collect_lookups(serializer, prefix):
+    """
+    Yields the prefetch lookups for a single serializer instance.
+    """
+    for field in serializer.fields.values():
+        if field.source == "*":
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            lookup = prefix + field.source.replace(".", "__")
+            yield Prefetch(lookup, queryset=field.child.Meta.model._default_manager.order_by("pk"))
+            yield from _collect_lookups(field.child, prefix=lookup + "__")
+        elif isinstance(field, serializers.ManyRelatedField):
+            lookup = prefix + field.source.replace(".", "__")
+            queryset = field.child_relation.queryset
+            if queryset is None and type(field.child_relation) is serializers.PrimaryKeyRelatedField:
+                related_model = serializer.Meta.model._meta.get_field(field.source).related_model
+                queryset = related_model._default_manager.only("pk")
+            yield Prefetch(lookup, queryset=queryset.order_by("pk")) if queryset is not None else lookup
+
+
+@lru_cache(maxsize=None)
+def get_model_fields(serializer_class, **options) -> tuple:
+    """
+    Returns the names of the concrete model fields a serializer renders,
+    for `QuerySet.only()`.
+    """
+    serializer = serializer_class(**options)
+    model = serializer.Meta.model
+    names = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.source == "*" or "." in field.source:
+            continue
+        model_field = model._meta.get_field(field.source)
+        if model_field.concrete and not model_field.many_to_many:
+            names.add(model_field.name)
+    return tuple(sorted(names))
+
+
+class PrefetchRelatedMixin:
+    """
+    Viewset mixin that prefetches every nested to-many relation the
+    serializer renders, so a page of N objects costs a fixed number of
+    queries instead of 1 + N per relation.
+    """
+
+    def get_queryset(self):
+        """
+        Returns the base queryset with the serializer's relations prefetched.
+        """
+        queryset = super().get_queryset()
+        lookups = self.get_prefetch_lookups()
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+    def get_prefetch_lookups(self):
+        return get_prefetch_lookups(self.get_serializer_class())
+
+
+class SparseFieldsMixin:
+    """
+    Viewset mixin for sparse fieldsets and relation expansion on reads.
+
+    `?fields=name,votes` renders only the listed fields, `?omit=starships`
+    drops fields, and `?expand=films` renders a relation as nested objects
+    instead of a list of ids (see `serializers.DynamicFieldsMixin`). The
+    queryset narrows to match: only the rendered columns are loaded
+    (`.only()`, or the read plan's `.values()`), and only rendered
+    relations are prefetched. Must come before FastReadMixin and
+    PrefetchRelatedMixin in the bases. Only the `sparse_fields_actions`
+    read the parameters; writes ignore them.
+    """
+    sparse_fields_actions = ("list", "retrieve", "batch")
+
+    def get_field_options(self) -> dict:
+        """
+        Returns the validated sparse fieldset options of this request.
+        """
+        if not hasattr(self, "_field_options"):
+            if getattr(self, "action", None) in self.sparse_fields_actions:
+                self._field_options = field_options(self.get_serializer_class(), self.request.query_params)
+            else:
+                self._field_options = {}
+        return self._field_options
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **self.get_field_options(), **kwargs)
+
+    def get_read_plan(self):
+        plan = super().get_read_plan()
+        options = self.get_field_options()
+        if plan is None or not options:
+            return plan
+        return get_read_plan(self.get_serializer_class(), **options)
+
+    def get_prefetch_lookups(self):
+        return get_prefetch_lookups(self.get_serializer_class(), **self.get_field_options())
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        options = self.get_field_options()
+        if options.get("fields") or options.get("omit"):
+            queryset = queryset.only(*get_model_fields(self.get_serializer_class(), **options))
+        return queryset
@@ -3,7 +3,7 @@ from django.db import models
 class Film(models.Model):
     """
     Represents a Star Wars film.
-    Stores SWAPI ID, title, episode number, director, producer, release date, SWAPI URL, and vote count.
+    Stores SWAPI ID, title, episode number, director, producer, release date (as text and parsed), SWAPI URL, vote count, sync hash, and last update time.
     """
     swapi_id = models.IntegerField(unique=True)  # Unique identifier from SWAPI
     title = models.CharField(max_length=200)  # Title of the film
@@ -11,8 +11,17 @@ class Film(models.Model):
     director = models.CharField(max_length=100, blank=True)  # Director's name
     producer = models.CharField(max_length=200, blank=True)  # Producer(s) name(s)
     release_date = models.CharField(max_length=20, blank=True)  # Release date as string
+    released_on = models.DateField(null=True, blank=True, editable=False, db_index=True)  # Parsed release_date, for filtering and sorting (see attributes)
     url = models.URLField(blank=True)  # SWAPI URL for this film
     votes = models.IntegerField(default=0)  # Number of votes this film has received
+    content_hash = models.CharField(max_length=40, blank=True, default="", editable=False)  # Hash of the SWAPI data last synced (empty after local edits)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Last write, including votes (drives ETags)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-votes", "id"], name="api_film_votes_idx"),  # Leaderboard ordering
+        ]
+
     def __str__(self):
         """
         Returns the string representation of the film (its title).
@@ -23,7 +32,7 @@ class Film(models.Model):
 class Starship(models.Model):
     """
     Represents a Star Wars starship.
-    Stores SWAPI ID, name, model, manufacturer, SWAPI URL, and vote count.
+    Stores SWAPI ID, name, model, manufacturer, SWAPI URL, vote count, sync hash, and last update time.
     """
     swapi_id = models.IntegerField(unique=True) # Unique identifier from SWAPI
     name = models.CharField(max_length=200) # Name of the starship
@@ -31,6 +40,13 @@ class Starship(models.Model):
     manufacturer = models.CharField(max_length=200, blank=True) # Manufacturer of the starship
     url = models.URLField(blank=True) # SWAPI URL for this starship
     votes = models.IntegerField(default=0) # Number of votes this starship has received
+    content_hash = models.CharField(max_length=40, blank=True, default="", editable=False) # Hash of the SWAPI data last synced (empty after local edits)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Last write, including votes (drives ETags)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-votes", "id"], name="api_starship_votes_idx"),  # Leaderboard ordering
+        ]
 
     def __str__(self):
         """
@@ -42,17 +58,26 @@ class Starship(models.Model):
 class Character(models.Model):
     """
     Represents a Star Wars character.
-    Stores SWAPI ID, name, physical attributes, SWAPI URL, related films and starships, and vote count.
+    Stores SWAPI ID, name, physical attributes (as text and parsed), SWAPI URL, related films and starships, vote count, sync hash, and last update time.
     """
     swapi_id = models.IntegerField(unique=True) # Unique identifier from SWAPI
     name = models.CharField(max_length=200) # Character's name
     height = models.CharField(max_length=50, blank=True) # Height as string (can be blank)
     mass = models.CharField(max_length=50, blank=True) # Mass as string (can be blank)
+    height_cm = models.IntegerField(null=True, blank=True, editable=False, db_index=True) # Parsed height, for filtering and sorting (see attributes)
+    mass_kg = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False, db_index=True) # Parsed mass, for filtering and sorting (see attributes)
     gender = models.CharField(max_length=50, blank=True) # Gender (can be blank)
     url = models.URLField(blank=True) # SWAPI URL for this character
     films = models.ManyToManyField(Film, related_name="characters", blank=True) # Films this character appears in (many-to-many)
     starships = models.ManyToManyField(Starship, related_name="pilots", blank=True) # Starships this character can pilot (many-to-many)
     votes = models.IntegerField(default=0) # Number of votes this character has received
+    content_hash = models.CharField(max_length=40, blank=True, default="", editable=False) # Hash of the SWAPI data last synced (empty after local edits)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Last write, including votes and relation changes (drives ETags)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-votes", "id"], name="api_character_votes_idx"),  # Leaderboard ordering
+        ]
 
     def __str__(self):
         """
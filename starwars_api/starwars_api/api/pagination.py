@@ -0,0 +1,219 @@
+"""
+Pagination classes for the Star Wars API.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination with no OFFSET and no COUNT query.
+
+    Pages are selected with a WHERE clause on the sort key of the last row
+    seen, e.g. `WHERE (votes < v) OR (votes = v AND id > i)`, so every page
+    costs the same however deep it is. Ties are broken on `id`, which keeps
+    the ordering stable.
+    """
+    cursor_query_param = "cursor"
+    ordering_query_param = "cursor_ordering"
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    # Allowed values of ?cursor_ordering= and the (field, descending) keys they sort by.
+    orderings = {
+        "id": (("id", False),),
+        "-votes": (("votes", True), ("id", False)),
+    }
+    default_ordering = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, page_size=10):
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering_name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if self.ordering_name not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Must be one of: {', '.join(self.orderings)}."})
+        self.keys = self.orderings[self.ordering_name]
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor["r"])
+        order_by = [("-" if desc != reverse else "") + field for field, desc in self.keys]
+        queryset = queryset.order_by(*order_by)
+        selected = queryset._fields  # Columns of a .values() queryset (e.g. a sparse fieldset)
+        if selected and any(field not in selected for field, _ in self.keys):
+            queryset = queryset.values(*selected, *(field for field, _ in self.keys if field not in selected))
+        if cursor:
+            queryset = queryset.filter(self.after(cursor["p"], reverse))
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = bool(rows), has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def after(self, position, reverse):
+        """
+        Builds the filter selecting rows strictly after `position` in the
+        page direction.
+        """
+        condition = Q()
+        for i, (field, desc) in enumerate(self.keys):
+            lookup = "lt" if desc != reverse else "gt"
+            clause = Q(**{f"{field}__{lookup}": position[i]})
+            for j, (prior_field, _) in enumerate(self.keys[:i]):
+                clause &= Q(**{prior_field: position[j]})
+            condition |= clause
+        return condition
+
+    def position_of(self, row):
+        return [row[field] if isinstance(row, dict) else getattr(row, field) for field, _ in self.keys]
+
+    def decode_cursor(self, request, model):
+        """
+        Decodes the request's cursor, or returns None if there is none.
+
+        The position values are converted with the model fields they sort
+        on, so a cursor that was not issued for this ordering is rejected
+        instead of failing in the query.
+
+        Raises:
+            NotFound: If the cursor is malformed or does not match the ordering.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position, reverse = cursor["p"], cursor["r"]
+            if cursor["o"] != self.ordering_name or not isinstance(position, list) or len(position) != len(self.keys):
+                raise ValueError
+            if not isinstance(reverse, int) or reverse not in (0, 1):
+                raise ValueError
+            cursor["p"] = [self.key_value(model, field, value) for (field, _), value in zip(self.keys, position)]
+            return cursor
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def key_value(model, field, value):
+        """
+        Converts a cursor position value to the Python type of a sort key.
+        """
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise ValueError
+        return model._meta.get_field(field).to_python(value)
+
+    @classmethod
+    def encode_cursor(cls, ordering_name, position, reverse=False):
+        """
+        Encodes a cursor pointing just past `position` (a list of sort key values).
+        """
+        payload = json.dumps({"o": ordering_name, "p": position, "r": int(reverse)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def get_link(self, row, reverse):
+        cursor = self.encode_cursor(self.ordering_name, self.position_of(row), reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination that also lets clients choose the page size
+    with `?page_size=N` (capped at `max_page_size`).
+
+    `?pagination=cursor` switches a request to KeysetPagination instead,
+    optionally with `?cursor_ordering=-votes`; page-number clients are
+    unaffected.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    mode_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == "cursor":
+            self.keyset = KeysetPagination(page_size=self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination (no COUNT query).",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": KeysetPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value (keyset mode).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": KeysetPagination.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset ordering: 'id' (default) or '-votes'.",
+                "schema": {"type": "string", "enum": list(KeysetPagination.orderings)},
+            },
+        ]
@@ -0,0 +1,221 @@
+"""
+Renderers and parsers: fast JSON, plus MessagePack and CBOR.
+
+FastJSONRenderer and FastJSONParser are drop-in replacements for DRF's
+JSONRenderer and JSONParser. They use orjson (or msgspec) when available and
+fall back to the stdlib `json` module otherwise, and whenever a request needs
+something only the stdlib path does (indented output, `ensure_ascii`,
+non-compact separators, lenient NaN parsing). Values the fast encoder does
+not support natively, including datetimes, are converted by DRF's
+JSONEncoder, so the output is the same JSON document either way. The one
+difference: float NaN/Infinity, which strict stdlib rendering refuses, are
+written as null.
+
+MessagePackRenderer and CBORRenderer offer compact binary encodings of the
+same data through content negotiation (`Accept: application/msgpack` or
+`application/cbor`, or `?format=msgpack` / `?format=cbor`). Values are
+converted as for JSON first, so datetimes stay ISO 8601 strings and a
+decoded response has exactly the JSON shape. Both need their optional
+library (msgpack, cbor2) and are only enabled in settings when it is
+installed.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+
+def _default(value):
+    """
+    Converts a value the fast encoder does not handle, as DRF's encoder would.
+    """
+    return encoders.JSONEncoder().default(value)
+
+
+class OrjsonBackend:
+    name = "orjson"
+    errors = (ValueError, TypeError)
+    # Datetimes go through DRF's encoder so they keep its format (e.g. "Z").
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, data) -> bytes:
+        return orjson.dumps(data, default=_default, option=self.options)
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+
+class MsgspecBackend:
+    name = "msgspec"
+    errors = (ValueError, TypeError, msgspec.MsgspecError) if msgspec else ()
+
+    def __init__(self):
+        self.encoder = msgspec.json.Encoder(enc_hook=_default)
+        self.decoder = msgspec.json.Decoder()
+
+    def dumps(self, data) -> bytes:
+        return self.encoder.encode(data)
+
+    def loads(self, content):
+        return self.decoder.decode(content)
+
+
+def get_backend():
+    """
+    Returns the fast JSON backend to use, or None for the stdlib.
+
+    The FAST_JSON_BACKEND setting picks "orjson", "msgspec" or "json";
+    "auto" (the default) uses the first one installed.
+    """
+    return _load_backend(getattr(settings, "FAST_JSON_BACKEND", "auto"))
+
+
+@lru_cache(maxsize=None)
+def _load_backend(name):
+    if name in ("auto", "orjson") and orjson is not None:
+        return OrjsonBackend()
+    if name in ("auto", "msgspec") and msgspec is not None:
+        return MsgspecBackend()
+    return None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer using the fast backend for compact, non-indented output.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        backend = get_backend()
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if backend is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = backend.dumps(data)
+        except (OverflowError, *backend.errors):  # e.g. ints beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape U+2028/U+2029 like JSONRenderer, so the output stays a JavaScript subset.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser decoding request bodies with the fast backend.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        backend = get_backend()
+        if backend is None or not self.strict:
+            # Fast decoders always reject NaN/Infinity, which non-strict parsing accepts.
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        content = stream.read()
+        try:
+            if encoding.lower().replace("-", "") != "utf8":
+                content = content.decode(encoding).encode()
+            return backend.loads(content)
+        except (ValueError, *backend.errors) as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+# Types binary encoders write as-is; anything else is converted like JSON.
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+
+def to_primitive(data):
+    """
+    Returns `data` with every value converted to what the JSON renderer
+    would produce (dicts, lists, strings, numbers, booleans and None).
+    """
+    if isinstance(data, PRIMITIVE_TYPES):
+        return data
+    if isinstance(data, dict):
+        return {key if isinstance(key, str) else str(key): to_primitive(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_primitive(value) for value in data]
+    return to_primitive(_default(data))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack.
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(to_primitive(data), use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies.
+    """
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=True)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError("MessagePack parse error - %s" % str(exc))
+
+
+class CBORRenderer(BaseRenderer):
+    """
+    Renders responses as CBOR.
+    """
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return cbor2.dumps(to_primitive(data))
+
+
+class CBORParser(BaseParser):
+    """
+    Parses CBOR request bodies.
+    """
+    media_type = "application/cbor"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, TypeError, cbor2.CBORDecodeError) as exc:
+            raise ParseError("CBOR parse error - %s" % str(exc))
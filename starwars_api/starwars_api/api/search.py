@@ -0,0 +1,142 @@
+"""
+Full-text search for the `?search=` parameter.
+
+Search is served from a full-text index instead of `icontains` LIKE scans:
+
+- SQLiteFTSBackend: FTS5 tables kept in sync by triggers (migration 0004),
+  ranked with bm25().
+- PostgresSearchBackend: tsvector matching ranked with ts_rank, backed by
+  GIN expression indexes (migration 0004).
+- IcontainsSearchBackend: DRF's plain SearchFilter behaviour, used for other
+  databases or when the index is unavailable.
+
+The backend is chosen by the SEARCH_BACKEND setting: "auto" (the default)
+picks one from the database vendor; a dotted path selects any class with a
+`search(queryset, terms)` method.
+"""
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import Character, Film, Starship
+
+# Fields covered by the full-text index of each model.
+SEARCH_INDEXES = {
+    Character: ("name",),
+    Film: ("title", "director", "producer"),
+    Starship: ("name", "model", "manufacturer"),
+}
+
+
+def fts_table(model) -> str:
+    """
+    Returns the name of the SQLite FTS5 table indexing a model.
+    """
+    return f"{model._meta.db_table}_fts"
+
+
+class IcontainsSearchBackend:
+    """
+    Returns None so the caller falls back to DRF's icontains search.
+    """
+
+    def search(self, queryset, terms):
+        return None
+
+
+class SQLiteFTSBackend:
+    """
+    Searches the SQLite FTS5 index, ranking matches with bm25().
+
+    Every term is matched as a prefix (`luke sky` finds "Luke Skywalker"),
+    and all terms must match, as with DRF's SearchFilter.
+    """
+
+    def search(self, queryset, terms):
+        model = queryset.model
+        if model not in SEARCH_INDEXES:
+            return None
+        quote = connections[queryset.db].ops.quote_name
+        table = quote(fts_table(model))
+        source = f"{quote(model._meta.db_table)}.{quote(model._meta.pk.column)}"
+        match = self.match_expression(terms)
+        rank = RawSQL(f"SELECT bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = {source}", (match,))
+        matches = RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (match,))
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by("search_rank", "pk")
+
+    @staticmethod
+    def match_expression(terms) -> str:
+        """
+        Turns search terms into an FTS5 query of quoted prefix terms.
+        """
+        return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+class PostgresSearchBackend:
+    """
+    Searches PostgreSQL tsvectors, ranking matches with ts_rank.
+
+    The vector expression matches the GIN indexes created in migration 0004.
+    """
+    config = "simple"
+
+    def search(self, queryset, terms):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        model = queryset.model
+        if model not in SEARCH_INDEXES:
+            return None
+        vector = SearchVector(*SEARCH_INDEXES[model], config=self.config)
+        query = SearchQuery(" & ".join(f"{term}:*" for term in self.clean_terms(terms)),
+                            search_type="raw", config=self.config)
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query))
+            .order_by("-search_rank", "pk")
+        )
+
+    @staticmethod
+    def clean_terms(terms):
+        """
+        Strips tsquery operators from user input, keeping word characters.
+        """
+        cleaned = ("".join(ch for ch in term if ch.isalnum()) for term in terms)
+        return [term for term in cleaned if term] or ["''"]
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend(model):
+    """
+    Returns the search backend for a model's database.
+    """
+    name = getattr(settings, "SEARCH_BACKEND", "auto")
+    if name == "auto":
+        vendor = connections[router.db_for_read(model)].vendor
+        return VENDOR_BACKENDS.get(vendor, IcontainsSearchBackend)()
+    return import_string(name)()
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that serves `?search=` from the full-text index, ordered
+    by relevance. Falls back to the usual `search_fields` icontains lookup
+    when the backend cannot handle the model.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        results = get_backend(queryset.model).search(queryset, terms)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
@@ -2,32 +2,94 @@ from rest_framework import serializers
 from .models import Character, Film, Starship
 
 
-class FilmSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and relation expansion.
+
+    Keyword arguments (all optional, as parsed by `field_options`):
+        fields: Names of the only fields to render.
+        omit: Names of fields not to render.
+        expand: Relations of `expandable_fields` to render as nested
+            objects instead of lists of ids.
+    """
+    # Relation names and the serializer rendering them when expanded.
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, omit=(), expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.only_fields, self.omit_fields, self.expand_fields = fields, omit, expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expand_fields:
+            fields[name] = self.expandable_fields[name](many=True, read_only=True)
+        for name in list(fields):
+            if name in self.omit_fields or (self.only_fields is not None and name not in self.only_fields):
+                del fields[name]
+        return fields
+
+
+def field_options(serializer_class, query_params) -> dict:
+    """
+    Reads the `fields`, `omit` and `expand` query parameters (comma-separated
+    field names) into keyword arguments for a DynamicFieldsMixin serializer.
+
+    Returns:
+        dict: Only the options that name at least one field, as sorted
+        tuples, so the result can be used as a cache key. Blank parameters
+        such as `?fields=` or `?fields=,` are treated as absent.
+
+    Raises:
+        ValidationError: If a parameter names an unknown field.
+    """
+    given = {param: query_params[param] for param in ("fields", "omit", "expand") if param in query_params}
+    if not given or not issubclass(serializer_class, DynamicFieldsMixin):
+        return {}
+    known = set(serializer_class().fields)
+    allowed = {"fields": known, "omit": known, "expand": set(serializer_class.expandable_fields)}
+    options = {}
+    for param, value in given.items():
+        choices = allowed[param]
+        names = tuple(sorted({name.strip() for name in value.split(",") if name.strip()}))
+        if not names:
+            continue
+        unknown = [name for name in names if name not in choices]
+        if unknown:
+            raise serializers.ValidationError({
+                param: f"Unknown field(s): {', '.join(unknown)}. Must be among: {', '.join(sorted(choices)) or '(none)'}."
+            })
+        options[param] = names
+    return options
+
+
+class FilmSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Film model.
-    Serializes all fields of a Star Wars film, including related characters.
+    Serializes all public fields of a Star Wars film, including related characters.
     """
     class Meta:
         model = Film
-        fields = "__all__"
+        exclude = ["content_hash", "released_on"]  # Internal sync bookkeeping and filter column
 
-class StarshipSerializer(serializers.ModelSerializer):
+class StarshipSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Starship model.
-    Serializes all fields of a Star Wars starship, including related pilots.
+    Serializes all public fields of a Star Wars starship, including related pilots.
     """
     class Meta:
         model = Starship
-        fields = "__all__"
+        exclude = ["content_hash"]  # Internal sync bookkeeping
 
-class CharacterSerializer(serializers.ModelSerializer):
+class CharacterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Character model.
-    Serializes all fields of a Star Wars character, including related films and starships.
+    Serializes all public fields of a Star Wars character. Related films and
+    starships render as lists of ids, or as nested objects when expanded.
     """
-    films = FilmSerializer(many=True, read_only=True) # Nested serialization for related films
-    starships = StarshipSerializer(many=True, read_only=True) # Nested serialization for related starships
+    films = serializers.PrimaryKeyRelatedField(many=True, read_only=True) # Film ids (nested films with expand=films)
+    starships = serializers.PrimaryKeyRelatedField(many=True, read_only=True) # Starship ids (nested starships with expand=starships)
+    expandable_fields = {"films": FilmSerializer, "starships": StarshipSerializer}
 
     class Meta:
         model = Character
-        fields = "__all__"
\ No newline at end of file
+        exclude = ["content_hash", "height_cm", "mass_kg"]  # Internal sync bookkeeping and filter columns
@@ -0,0 +1,76 @@
+"""
+Signal handlers that keep derived in-memory state in step with the database.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import cache, leaderboard
+from .attributes import fill_typed_fields
+from .models import Character, Film, Starship
+
+# Sent with the model class as sender after bulk writes (ingest, imports)
+# that bypass the per-instance post_save / post_delete signals.
+resource_changed = Signal()
+
+# Sent with the model class as sender after votes were written with UPDATE.
+votes_changed = Signal()
+
+RESOURCE_MODELS = (Character, Film, Starship)
+
+
+@receiver(pre_save)
+def clear_content_hash(sender, instance, update_fields=None, **kwargs):
+    """
+    Forgets the SWAPI sync hash of a row saved locally, so the next sync
+    compares its fields with SWAPI instead of skipping it.
+    """
+    if sender in RESOURCE_MODELS and (update_fields is None or "content_hash" not in update_fields):
+        instance.content_hash = ""
+
+
+@receiver(pre_save)
+def update_typed_fields(sender, instance, update_fields=None, **kwargs):
+    """
+    Parses the text attributes of a row being saved into its typed shadow
+    columns (see `attributes`).
+    """
+    if sender in RESOURCE_MODELS:
+        fill_typed_fields(instance, update_fields)
+
+
+@receiver([post_save, post_delete, resource_changed])
+def invalidate_leaderboard(sender, **kwargs):
+    """
+    Invalidates the leaderboard after any write other than a vote.
+    """
+    if sender in RESOURCE_MODELS:
+        leaderboard.invalidate(sender)
+
+
+@receiver([post_save, post_delete, resource_changed, votes_changed])
+def bump_cache_generation(sender, **kwargs):
+    """
+    Invalidates cached responses after any write, votes included, and
+    again once the write's transaction commits.
+    """
+    if sender in RESOURCE_MODELS:
+        cache.bump_generation_on_commit(sender)
+
+
+@receiver(m2m_changed, sender=Character.films.through)
+@receiver(m2m_changed, sender=Character.starships.through)
+def touch_related_objects(sender, instance, model, action, pk_set, **kwargs):
+    """
+    Advances `updated_at` on both sides when character films or starships
+    change, and invalidates cached responses for them.
+    """
+    if not action.startswith("post_"):
+        return
+    now = timezone.now()
+    type(instance).objects.filter(pk=instance.pk).update(updated_at=now)
+    if pk_set:
+        model.objects.filter(pk__in=pk_set).update(updated_at=now)
+    for changed in {type(instance), model}:
+        cache.bump_generation_on_commit(changed)
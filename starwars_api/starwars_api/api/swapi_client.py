@@ -1,33 +1,345 @@
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 SWAPI_BASE = "https://swapi.info/api"
+DEFAULT_TIMEOUT = 10  # Seconds to wait for each SWAPI request
+DEFAULT_CONCURRENCY = 1  # Number of pages fetched in parallel (1 = follow `next` links one at a time)
+DEFAULT_CACHE_SETTINGS = {
+    "ENABLED": False,
+    "PATH": "swapi_cache.sqlite3",  # SQLite file holding the cached responses
+    "TTL": 3600,  # Seconds a cached page is used without revalidating it
+}
+
+logger = logging.getLogger(__name__)
+
+
+class FetchResult(list):
+    """
+    The items returned by `fetch_all`.
+
+    Attributes:
+        changed (bool): False when every page was served from the response
+            cache or revalidated as unchanged (304, or an identical body), so
+            the items are exactly those of the last committed fetch.
+        pages (int): The number of pages fetched so far.
+    """
+
+    def __init__(self, items=(), cache=None, progress=None):
+        super().__init__(items)
+        self.changed = cache is None
+        self.cache = cache
+        self.pending = []  # (url, body, etag, last_modified) to store on commit()
+        self.pages = 0
+        self.progress = progress
+        self._lock = threading.Lock()
+
+    def page_fetched(self):
+        """
+        Counts a fetched page and reports the total to the `progress` callback.
+        """
+        with self._lock:
+            self.pages += 1
+            pages = self.pages
+        if self.progress is not None:
+            self.progress(pages=pages)
+
+    def commit(self):
+        """
+        Stores the downloaded pages in the response cache.
+
+        Call this once the items have been processed (e.g. ingested), so a
+        failed import is retried with a full download instead of being
+        skipped as unchanged.
+        """
+        if self.cache is not None:
+            for entry in self.pending:
+                self.cache.store(*entry)
+        self.pending = []
+
+
+class CachedResponse:
+    """
+    A cached SWAPI page: the raw body, its validators and when it was fetched.
+    """
+
+    def __init__(self, body: bytes, etag: str, last_modified: str, fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """
+    Persistent SWAPI response cache in a SQLite file, keyed by URL.
+
+    Entries are used as they are for `ttl` seconds, then revalidated with
+    If-None-Match / If-Modified-Since. When SWAPI cannot be reached (or
+    answers with a server error) a cached entry is served whatever its age.
+    The file is opened on first use; access is serialized with a lock so
+    concurrent page fetches can share one cache.
+    """
+
+    def __init__(self, path, ttl: float):
+        self.path = str(path)
+        self.ttl = ttl
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(self.path, check_same_thread=False)
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+                )
+            with self._connection:
+                return self._connection.execute(sql, params).fetchall()
+
+    def get(self, url: str):
+        """
+        Returns the CachedResponse for a URL, or None.
+        """
+        rows = self._execute("SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,))
+        return CachedResponse(*rows[0]) if rows else None
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def store(self, url: str, body: bytes, etag: str = None, last_modified: str = None):
+        self._execute(
+            "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, body, etag, last_modified, time.time()),
+        )
+
+    def touch(self, url: str):
+        """
+        Marks an entry as just revalidated.
+        """
+        self._execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def clear(self):
+        self._execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_caches = {}
+
+
+def get_response_cache():
+    """
+    Returns the ResponseCache configured by the SWAPI_CACHE setting, or None
+    when it is disabled. Relative paths are resolved against BASE_DIR.
+    """
+    config = {**DEFAULT_CACHE_SETTINGS, **getattr(settings, "SWAPI_CACHE", {})}
+    if not config["ENABLED"]:
+        return None
+    path = config["PATH"]
+    if not str(path).startswith(("/", ":")) and hasattr(settings, "BASE_DIR"):
+        path = settings.BASE_DIR / path
+    key = (str(path), config["TTL"])
+    if key not in _caches:
+        _caches[key] = ResponseCache(path, config["TTL"])
+    return _caches[key]
+
 
-def fetch_all(resource: str):
+def fetch_all(resource: str, concurrency: int = None, timeout: float = None, cache: ResponseCache = None,
+              progress=None):
     """
     Fetches all items of a given resource type from SWAPI, handling pagination.
 
+    With a concurrency of 1 the `next` links are followed one page at a time.
+    With a higher concurrency the first page is fetched on its own, the total
+    number of pages is worked out from its `count` field, and the remaining
+    pages are fetched in parallel over a pooled keep-alive session. Either way
+    the results come back in page order.
+
     Args:
         resource (str): The SWAPI resource to fetch.
             - Use 'people' for Star Wars characters (SWAPI uses 'people', not 'characters')
             - Use 'films' for films
             - Use 'starships' for starships
+        concurrency (int): Maximum number of pages fetched at once.
+            Defaults to the SWAPI_CONCURRENCY setting.
+        timeout (float): Per-request timeout in seconds.
+            Defaults to the SWAPI_TIMEOUT setting.
+        cache (ResponseCache): Optional response cache (see `get_response_cache`).
+            Fresh pages are served from it, stale ones are revalidated, and it
+            is used as a fallback when SWAPI is unreachable. Downloaded pages
+            are stored when the caller calls `commit()` on the result.
+        progress (callable): Optional callback, called as `progress(pages=n)`
+            after each page with the number of pages fetched so far.
 
     Returns:
-        list: A list of dictionaries, each representing a resource item from SWAPI.
+        FetchResult: A list of dictionaries, each representing a resource item
+        from SWAPI, with a `changed` flag.
 
     Raises:
-        requests.HTTPError: If the SWAPI request fails.
+        requests.HTTPError: If the SWAPI request fails (and no cached copy exists).
     """
-    results = []
+    if concurrency is None:
+        concurrency = getattr(settings, "SWAPI_CONCURRENCY", DEFAULT_CONCURRENCY)
+    if timeout is None:
+        timeout = getattr(settings, "SWAPI_TIMEOUT", DEFAULT_TIMEOUT)
     url = f"{SWAPI_BASE}/{resource}/"
+    result = FetchResult(cache=cache, progress=progress)
+    if concurrency <= 1:
+        result.extend(_fetch_sequential(url, timeout, result=result))
+    else:
+        with make_session(concurrency) as session:
+            result.extend(_fetch_concurrent(url, session, concurrency, timeout, result=result))
+    return result
+
+async def afetch_all(resource: str, concurrency: int = None, timeout: float = None, cache: ResponseCache = None,
+                     progress=None):
+    """
+    Async counterpart of `fetch_all`, for async views.
+
+    The first page is fetched on its own, then the remaining pages are
+    fetched together, with at most `concurrency` requests in flight (an
+    asyncio semaphore). Each request runs in a worker thread over a shared
+    pooled session, so the event loop is never blocked. Arguments, results
+    and errors are the same as for `fetch_all`, except that `next` links
+    are followed one page at a time only when SWAPI gives no `count`.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, "SWAPI_CONCURRENCY", DEFAULT_CONCURRENCY)
+    if timeout is None:
+        timeout = getattr(settings, "SWAPI_TIMEOUT", DEFAULT_TIMEOUT)
+    concurrency = max(concurrency, 1)
+    url = f"{SWAPI_BASE}/{resource}/"
+    result = FetchResult(cache=cache, progress=progress)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with make_session(concurrency) as session:
+        async def get_page(page_url):
+            async with semaphore:
+                return await asyncio.to_thread(_get_page, page_url, timeout, session, result)
+
+        first = await get_page(url)
+        result.extend(first.get("results", []))
+        page_size, count = len(result), first.get("count")
+        if first.get("next") and count and page_size:
+            page_urls = [f"{url}?page={page}" for page in range(2, math.ceil(count / page_size) + 1)]
+            # gather() returns results in submission order, so pages stay in order.
+            for data in await asyncio.gather(*(get_page(page_url) for page_url in page_urls)):
+                result.extend(data.get("results", []))
+        elif first.get("next"):
+            # Without a total count the number of pages is unknown, so follow links.
+            result.extend(await asyncio.to_thread(_fetch_sequential, first["next"], timeout, session, result))
+    return result
+
+def make_session(pool_size: int) -> requests.Session:
+    """
+    Creates a requests session that keeps up to `pool_size` connections alive per host.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _get_page(url: str, timeout: float, session=None, result: FetchResult = None) -> dict:
+    """
+    Fetches and decodes a single page of SWAPI results.
+    """
+    if result is not None and result.cache is not None:
+        data = _get_cached_page(url, timeout, session, result)
+    else:
+        resp = (session or requests).get(url, timeout=timeout) # Make a GET request to the current page
+        resp.raise_for_status() # Raise an exception if the request failed
+        data = resp.json() # Parse JSON response
+    if result is not None:
+        result.page_fetched()
+    return data
+
+def _get_cached_page(url: str, timeout: float, session, result: FetchResult) -> dict:
+    """
+    Fetches a page through the response cache, recording on `result` whether
+    it changed and what to store on commit.
+    """
+    entry = result.cache.get(url)
+    if entry is not None and result.cache.is_fresh(entry):
+        return entry.json()
+    headers = {}
+    if entry is not None and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry is not None and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    try:
+        resp = (session or requests).get(url, timeout=timeout, headers=headers)
+        if resp.status_code == 304 and entry is not None:
+            result.cache.touch(url)
+            return entry.json()
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        upstream_down = getattr(exc.response, "status_code", 500) >= 500  # No response, or a 5xx
+        if entry is None or not upstream_down:
+            raise
+        logger.warning("SWAPI request for %s failed (%s); serving the cached copy", url, exc)
+        return entry.json()
+    if entry is None or resp.content != entry.body:
+        result.changed = True
+    result.pending.append((url, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified")))
+    return resp.json()
+
+def _fetch_sequential(url: str, timeout: float, session=None, result: FetchResult = None) -> list:
+    """
+    Follows the `next` links one page at a time.
+    """
+    results = []
     while url:
-        resp = requests.get(url, timeout=10) # Make a GET request to the current page
-        resp.raise_for_status() # Make a GET request to the current page
-        data = resp.json()  # Parse JSON response
+        data = _get_page(url, timeout, session, result)
         results.extend(data.get("results", [])) # Add results from this page
         url = data.get("next") # Get the next page URL, if any
     return results
 
+def _fetch_concurrent(url: str, session: requests.Session, concurrency: int, timeout: float,
+                      result: FetchResult = None) -> list:
+    """
+    Fetches the first page, then every remaining page in parallel.
+    """
+    first = _get_page(url, timeout, session, result)
+    results = list(first.get("results", []))
+    page_size = len(results)
+    count = first.get("count")
+    if not first.get("next"):
+        return results
+    if not count or not page_size:
+        # Without a total count the number of pages is unknown, so fall back to following links.
+        return results + _fetch_sequential(first["next"], timeout, session, result)
+    page_urls = [f"{url}?page={page}" for page in range(2, math.ceil(count / page_size) + 1)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # map() yields results in submission order, so pages stay in order.
+        for data in executor.map(lambda page_url: _get_page(page_url, timeout, session, result), page_urls):
+            results.extend(data.get("results", []))
+    return results
+
 def parse_swapi_id(url: str) -> int:
     """
     Extracts the numeric SWAPI ID from a SWAPI resource URL.
@@ -41,4 +353,4 @@ def parse_swapi_id(url: str) -> int:
     try:
         return int(url.strip("/").split("/")[-1]) # Get the last part of the URL and convert to int
     except Exception:
-        return -1 # Return -1 if parsing fails
\ No newline at end of file
+        return -1 # Return -1 if parsing fails
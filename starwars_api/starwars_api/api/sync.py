@@ -0,0 +1,148 @@
+"""
+Synchronisation of the local database with SWAPI.
+
+`fetch_and_ingest` syncs one resource, as the per-resource `fetch` actions
+do. `sync_all` syncs everything at once: the three resources are
+downloaded concurrently, so the fetch takes as long as the slowest one,
+then films and starships are ingested before the characters that link to
+them, all in a single transaction, so readers never see a half-synced
+dataset.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import router, transaction
+
+from . import ingest, swapi_client
+from .models import Character, Film, Starship
+from .signals import resource_changed
+
+# API resource names, in ingest order, with their SWAPI resource and model.
+SYNC_RESOURCES = {
+    "films": ("films", Film),
+    "starships": ("starships", Starship),
+    "characters": ("people", Character),
+}
+
+
+def fetch_and_ingest(model, resource: str, delete: bool = False, progress=None) -> dict:
+    """
+    Fetches a resource from SWAPI through the response cache and ingests it.
+
+    Only new and changed items are written (see `ingest.ingest`); with
+    `delete`, rows SWAPI no longer lists are deleted too. When every page
+    came back unchanged (and the table still holds at least as many rows,
+    or exactly as many when deleting, none of them edited locally), the
+    rows are not written and are all
+    reported as unchanged, with `skipped` set. Characters are still linked
+    to their films and starships, since those may have been ingested after
+    the characters were.
+
+    `progress`, if given, is called as `progress(pages=n)` while fetching
+    and `progress(rows=n)` once the rows are written.
+    """
+    data = swapi_client.fetch_all(resource, cache=swapi_client.get_response_cache(), progress=progress)
+    result = ingest_fetched(model, data, delete)
+    if isinstance(data, swapi_client.FetchResult):
+        data.commit()
+    _report_rows(progress, result)
+    return result
+
+
+def ingest_fetched(model, data: list, delete: bool = False) -> dict:
+    """
+    Ingests the result of `swapi_client.fetch_all`, unless it is unchanged
+    (see `fetch_and_ingest`). The caller commits the fetch result.
+    """
+    if isinstance(data, swapi_client.FetchResult) and not data.changed and not _has_local_edits(model):
+        count = model.objects.count()
+        if count == len(data) or (count > len(data) and not delete):
+            result = {"stored": 0, "created": 0, "updated": 0, "unchanged": len(data), "deleted": 0, "skipped": True}
+            if model is Character:
+                result["linked"] = ingest.link_relations(data)
+                result["unlinked"] = dict.fromkeys(result["linked"], 0)
+                if any(result["linked"].values()):
+                    resource_changed.send(sender=Character)
+            return result
+    return ingest.ingest(model, data, delete=delete)
+
+
+def _has_local_edits(model) -> bool:
+    """
+    Tells whether any row was written locally since its last sync: those
+    lose their `content_hash` and must be restored from SWAPI.
+    """
+    return model.objects.filter(**{ingest.HASH_FIELD: ""}).exists()
+
+
+def sync_all(delete: bool = False, progress=None) -> dict:
+    """
+    Fetches every SWAPI resource concurrently and ingests them in one transaction.
+
+    Args:
+        delete (bool): Also delete rows SWAPI no longer lists (see `ingest.ingest`).
+        progress (callable): Optional callback, called as
+            `progress(name, pages=n)` while fetching and
+            `progress(name, rows=n)` once the transaction is committed.
+
+    Returns:
+        dict: `resources`, the counts reported by `fetch_and_ingest` for each
+        resource plus its own `fetch_seconds` and `ingest_seconds`, and the
+        wall-clock `fetch_seconds` (the slowest resource, as they run
+        concurrently), `ingest_seconds` and total `seconds`.
+
+    Raises:
+        requests.RequestException: If a resource cannot be fetched; nothing
+        is written then.
+    """
+    started = time.perf_counter()
+    cache = swapi_client.get_response_cache()
+    with ThreadPoolExecutor(max_workers=len(SYNC_RESOURCES)) as executor:
+        futures = {
+            name: executor.submit(
+                _timed, swapi_client.fetch_all, resource, cache=cache,
+                progress=partial(progress, name) if progress is not None else None,
+            )
+            for name, (resource, _) in SYNC_RESOURCES.items()
+        }
+        fetched = {name: future.result() for name, future in futures.items()}
+    fetch_seconds = time.perf_counter() - started
+
+    report = {}
+    with transaction.atomic(using=router.db_for_write(Character)):
+        for name, (_, model) in SYNC_RESOURCES.items():
+            data, seconds = fetched[name]
+            result, ingest_seconds = _timed(ingest_fetched, model, data, delete)
+            report[name] = {**result, "fetch_seconds": round(seconds, 3), "ingest_seconds": round(ingest_seconds, 3)}
+    for name, (data, _) in fetched.items():
+        if isinstance(data, swapi_client.FetchResult):
+            data.commit()
+        if progress is not None:
+            _report_rows(partial(progress, name), report[name])
+
+    seconds = time.perf_counter() - started
+    return {
+        "resources": report,
+        "fetch_seconds": round(fetch_seconds, 3),
+        "ingest_seconds": round(seconds - fetch_seconds, 3),
+        "seconds": round(seconds, 3),
+    }
+
+
+def _report_rows(progress, result: dict):
+    """
+    Reports the number of rows an ingest wrote (created, updated or deleted).
+    """
+    if progress is not None:
+        progress(rows=result["created"] + result["updated"] + result.get("deleted", 0))
+
+
+def _timed(function, *args, **kwargs) -> tuple:
+    """
+    Calls `function` and returns its result with the elapsed seconds.
+    """
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
@@ -1,15 +1,51 @@
+import asyncio
+import base64
+import datetime
+import decimal
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from asgiref.sync import sync_to_async
 from rest_framework.test import APITestCase
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
 import api.swapi_client as swapi_client
 from django.urls import reverse, resolve
 from django.contrib import admin
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from unittest.mock import patch
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
 from .models import Character, Film, Starship
 from .serializers import CharacterSerializer, FilmSerializer, StarshipSerializer
+from . import db, importer, ingest, jobs, renderers, sync, votes
+from .leaderboard import get_leaderboard
+from .views import CharacterViewSet
 
+@override_settings(SWAPI_CONCURRENCY=1)
 class SwapiClientTests(APITestCase):
 	"""
 	Tests for the SWAPI client utility functions.
@@ -75,6 +111,89 @@ class SwapiClientTests(APITestCase):
 		"""Test parse_swapi_id returns -1 for a non-numeric ID in the URL."""
 		self.assertEqual(swapi_client.parse_swapi_id("https://swapi.info/api/people/abc/"), -1)
 
+class StubSwapiHandler(BaseHTTPRequestHandler):
+    """
+    Serves paginated SWAPI-style results with artificial latency.
+    """
+    latency = 0.2
+    page_size = 2
+    total = 9
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * self.page_size
+        names = [f"Person {i}" for i in range(start + 1, min(start + self.page_size, self.total) + 1)]
+        has_next = start + self.page_size < self.total
+        body = json.dumps({
+            "count": self.total,
+            "next": f"http://{self.headers['Host']}/api/people/?page={page + 1}" if has_next else None,
+            "results": [{"name": name} for name in names],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting (timeout tests)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ConcurrentFetchTests(TestCase):
+    """Test concurrent page fetching against a local stub server with artificial latency."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSwapiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}/api"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_concurrent_matches_sequential_order(self):
+        """Test concurrent and sequential fetching return the same results in the same order."""
+        with patch.object(swapi_client, "SWAPI_BASE", self.base):
+            sequential = swapi_client.fetch_all("people", concurrency=1)
+            concurrent = swapi_client.fetch_all("people", concurrency=5)
+        self.assertEqual(len(sequential), StubSwapiHandler.total)
+        self.assertEqual(concurrent, sequential)
+
+    def test_concurrent_is_faster_than_sequential(self):
+        """Test the remaining pages are fetched in parallel rather than one after another."""
+        with patch.object(swapi_client, "SWAPI_BASE", self.base):
+            start = time.perf_counter()
+            swapi_client.fetch_all("people", concurrency=5)
+            elapsed = time.perf_counter() - start
+        # 5 pages at 0.2s each: sequential takes ~1.0s, concurrent ~0.4s.
+        self.assertLess(elapsed, 0.8)
+
+    async def test_async_fetch_matches_sync(self):
+        """Test afetch_all returns the same pages in order, fetching them concurrently."""
+        with patch.object(swapi_client, "SWAPI_BASE", self.base):
+            expected = await asyncio.to_thread(swapi_client.fetch_all, "people", concurrency=1)
+            start = time.perf_counter()
+            result = await swapi_client.afetch_all("people", concurrency=5)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(result, expected)
+        self.assertEqual(result.pages, 5)
+        self.assertLess(elapsed, 0.8)
+
+    def test_timeout_is_applied(self):
+        """Test the per-request timeout is honoured."""
+        with patch.object(swapi_client, "SWAPI_BASE", self.base):
+            with self.assertRaises(requests.Timeout):
+                swapi_client.fetch_all("people", concurrency=5, timeout=0.05)
+
+
 class CharacterAPITests(APITestCase):
 	"""
 	API tests for Character endpoints: CRUD, voting, listing, and fetching from SWAPI.
@@ -143,7 +262,7 @@ class CharacterAPITests(APITestCase):
 	def test_fetch_characters(self, mock_fetch_all):
 		"""Test fetching characters from SWAPI via the custom fetch endpoint."""
 		mock_fetch_all.return_value = [{"name": "Leia Organa", "url": "https://swapi.dev/api/people/2/"}]
-		url = reverse('character-fetch')
+		url = reverse('character-fetch') + '?wait=true'
 		response = self.client.post(url)
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertIn('stored', response.data)
@@ -216,7 +335,7 @@ class FilmAPITests(APITestCase):
 	def test_fetch_films(self, mock_fetch_all):
 		"""Test fetching films from SWAPI via the custom fetch endpoint."""
 		mock_fetch_all.return_value = [{"title": "The Empire Strikes Back", "url": "https://swapi.dev/api/films/2/"}]
-		url = reverse('film-fetch')
+		url = reverse('film-fetch') + '?wait=true'
 		response = self.client.post(url)
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertIn('stored', response.data)
@@ -297,7 +416,7 @@ class StarshipAPITests(APITestCase):
 	def test_fetch_starships(self, mock_fetch_all):
 		"""Test fetching starships from SWAPI via the custom fetch endpoint."""
 		mock_fetch_all.return_value = [{"name": "TIE Fighter", "url": "https://swapi.dev/api/starships/2/"}]
-		url = reverse('starship-fetch')
+		url = reverse('starship-fetch') + '?wait=true'
 		response = self.client.post(url)
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertIn('stored', response.data)
@@ -380,4 +499,1725 @@ class UrlsTests(TestCase):
     def test_starships_url(self):
         """Test that /api/starships/ is routable."""
         resolver = resolve("/api/starships/")
-        self.assertTrue(resolver)
\ No newline at end of file
+        self.assertTrue(resolver)
+
+class CharacterQueryCountTests(APITestCase):
+    """Test that listing characters costs a fixed number of queries per page."""
+    def setUp(self):
+        films = [Film.objects.create(swapi_id=i, title=f"Film {i}") for i in range(1, 4)]
+        starships = [Starship.objects.create(swapi_id=i, name=f"Ship {i}") for i in range(1, 4)]
+        for i in range(1, 51):
+            char = Character.objects.create(swapi_id=i, name=f"Character {i}")
+            char.films.set(films)
+            char.starships.set(starships)
+
+    def test_list_query_count_is_constant(self):
+        """Test COUNT + page + one query per nested relation, whatever the page size."""
+        url = reverse('character-list')
+        for page_size in (5, 10, 50):
+            with self.assertNumQueries(4):
+                response = self.client.get(url, {"page_size": page_size})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(len(response.data['results'][0]['films']), 3)
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a character prefetches films and starships."""
+        char = Character.objects.first()
+        url = reverse('character-detail', args=[char.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['starships']), 3)
+
+
+def data_queries(ctx):
+    """Returns the captured queries, ignoring transaction savepoints."""
+    return [q for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))]
+
+
+class IngestTests(TestCase):
+    """Test the bulk upsert used by the fetch actions."""
+    def people(self, *names):
+        return [
+            {"name": name, "height": "172", "url": f"https://swapi.info/api/people/{i}/"}
+            for i, name in enumerate(names, start=1)
+        ]
+
+    def test_ingest_creates_rows(self):
+        """Test new SWAPI items are inserted and counted as created."""
+        result = ingest.ingest(Character, self.people("Luke", "Leia"))
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["stored"], 2)
+        self.assertEqual(Character.objects.get(swapi_id=2).name, "Leia")
+
+    def test_ingest_updates_changed_rows(self):
+        """Test re-ingesting updates changed fields and leaves the rest alone."""
+        ingest.ingest(Character, self.people("Luke", "Leia"))
+        result = ingest.ingest(Character, self.people("Luke", "Leia Organa", "Han"))
+        self.assertEqual((result["created"], result["updated"], result["unchanged"]), (1, 1, 1))
+        self.assertEqual(Character.objects.get(swapi_id=2).name, "Leia Organa")
+        self.assertEqual(Character.objects.count(), 3)
+
+    def test_ingest_query_count_is_flat(self):
+        """Test the number of queries does not grow with the payload size."""
+        # Up to 80 films fit one INSERT under SQLite's 999 parameter limit.
+        for first, count in ((1, 10), (11, 80)):
+            with CaptureQueriesContext(connection) as ctx:
+                ingest.ingest(Film, [
+                    {"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"}
+                    for i in range(first, first + count)
+                ])
+            self.assertEqual(len(data_queries(ctx)), 2)  # SELECT existing, INSERT ... ON CONFLICT
+        self.assertEqual(Film.objects.count(), 90)
+
+    def test_executemany_insert_matches_bulk_create(self):
+        """Test the import's executemany upsert and link insert write exactly what bulk_create does."""
+        films = [{"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"} for i in (1, 2)]
+        ingest.ingest(Film, films)
+        people = [
+            {"name": "Luke", "height": "172", "mass": "77", "url": "https://swapi.info/api/people/1/",
+             "films": [films[0]["url"], films[1]["url"]]},
+            {"name": "Leia", "height": "150", "url": "https://swapi.info/api/people/5/", "films": [films[0]["url"]]},
+        ]
+        relations = {ingest.parse_swapi_id(item["url"]): ingest.item_relations(item) for item in people}
+        columns = [field.attname for field in Character._meta.concrete_fields if field.name not in ("id", "updated_at")]
+
+        def write(executemany, luke_name):
+            rows = [ingest.character_row({**people[0], "name": luke_name}), ingest.character_row(people[1])]
+            counts = ingest.upsert(Character, rows, executemany=executemany)
+            linked = ingest.link_by_swapi_id(relations, executemany=executemany)
+            Character.objects.filter(swapi_id=1).update(votes=3)  # Votes survive the next upsert
+            return counts, linked, list(Character.objects.order_by("swapi_id").values(*columns))
+
+        results = {}
+        for executemany in (False, True):
+            results[executemany] = [write(executemany, "Luke"), write(executemany, "Luke Skywalker")]
+            links = sorted(Character.films.through.objects.values_list("character__swapi_id", "film__swapi_id"))
+            results[executemany].append(links)
+            Character.objects.all().delete()
+        self.assertEqual(results[True], results[False])
+        self.assertEqual(results[True][1][2][0]["name"], "Luke Skywalker")
+        self.assertEqual(results[True][1][2][0]["votes"], 3)
+
+    def test_ingest_unchanged_writes_nothing(self):
+        """Test re-ingesting an identical payload issues no INSERT or UPDATE."""
+        items = [{"name": "X-wing", "url": "https://swapi.info/api/starships/12/"}]
+        ingest.ingest(Starship, items)
+        with CaptureQueriesContext(connection) as ctx:
+            result = ingest.ingest(Starship, items)
+        self.assertEqual(len(data_queries(ctx)), 1)  # SELECT existing only
+        self.assertEqual(result["unchanged"], 1)
+
+    def test_ingest_links_character_relations(self):
+        """Test character films and starships are linked from their SWAPI URLs."""
+        ingest.ingest(Film, [{"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"} for i in (1, 2)])
+        ingest.ingest(Starship, [{"name": "X-wing", "url": "https://swapi.info/api/starships/12/"}])
+        people = [
+            {
+                "name": "Luke",
+                "url": "https://swapi.info/api/people/1/",
+                "films": ["https://swapi.info/api/films/1/", "https://swapi.info/api/films/2/"],
+                "starships": ["https://swapi.info/api/starships/12/", "https://swapi.info/api/starships/99/"],
+            },
+            {"name": "Leia", "url": "https://swapi.info/api/people/5/", "films": ["https://swapi.info/api/films/1/"]},
+        ]
+        result = ingest.ingest(Character, people)
+        self.assertEqual(result["linked"], {"films": 3, "starships": 1})
+        luke = Character.objects.get(swapi_id=1)
+        self.assertEqual(sorted(luke.films.values_list("swapi_id", flat=True)), [1, 2])
+        self.assertEqual(list(luke.starships.values_list("name", flat=True)), ["X-wing"])
+        # Re-linking is idempotent.
+        ingest.link_relations(people)
+        self.assertEqual(Character.films.through.objects.count(), 3)
+
+    def test_link_relations_query_count_is_constant(self):
+        """Test linking costs the same number of queries for any number of characters."""
+        ingest.ingest(Film, [{"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"} for i in range(1, 7)])
+        for count in (5, 50):
+            people = [
+                {
+                    "name": f"Person {i}",
+                    "url": f"https://swapi.info/api/people/{i}/",
+                    "films": [f"https://swapi.info/api/films/{f}/" for f in range(1, 7)],
+                }
+                for i in range(1, count + 1)
+            ]
+            ingest.upsert(Character, [ingest.character_row(item) for item in people])
+            with CaptureQueriesContext(connection) as ctx:
+                ingest.link_relations(people)
+            # SELECT characters, SELECT films, SELECT existing links, INSERT links,
+            # UPDATE updated_at (no starships referenced)
+            self.assertEqual(len(data_queries(ctx)), 5)
+
+
+class VoteTests(TransactionTestCase):
+    """Test atomic vote counting and the write-behind vote buffer."""
+    def setUp(self):
+        self.character = Character.objects.create(swapi_id=1, name="Luke Skywalker")
+
+    def test_vote_is_single_column_update(self):
+        """Test a vote is one UPDATE of the votes column only."""
+        with CaptureQueriesContext(connection) as ctx:
+            votes.cast_vote(self.character)
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"votes" = ("api_character"."votes" + 1)', updates[0])
+        self.assertNotIn('"name"', updates[0].split("WHERE")[0])
+        self.assertEqual(self.character.votes, 1)
+
+    def test_vote_does_not_overwrite_other_fields(self):
+        """Test voting with a stale instance does not undo a concurrent edit."""
+        stale = Character.objects.get(pk=self.character.pk)
+        Character.objects.filter(pk=self.character.pk).update(name="Luke")
+        votes.cast_vote(stale)
+        self.character.refresh_from_db()
+        self.assertEqual((self.character.name, self.character.votes), ("Luke", 1))
+
+    def test_parallel_votes_are_not_lost(self):
+        """Test thousands of votes from parallel threads all land."""
+        buffer = votes.VoteBuffer(flush_interval=60, max_pending=250)
+
+        def vote_many(n):
+            try:
+                for _ in range(n):
+                    buffer.add(Character, self.character.pk)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(vote_many, [250] * 16))
+        buffer.stop()
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.votes, 4000)
+
+    def test_concurrent_direct_votes_are_not_lost(self):
+        """Test votes cast at once from many threads, each on its own stale instance, all land."""
+        threads, rounds = 8, 25
+        barrier = threading.Barrier(threads)
+
+        def vote_many(_):
+            try:
+                stale = Character.objects.get(pk=self.character.pk)
+                barrier.wait()
+                for _ in range(rounds):
+                    votes.cast_vote(stale)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(vote_many, range(threads)))
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.votes, threads * rounds)
+
+    def test_buffer_flushes_at_threshold_and_on_stop(self):
+        """Test buffered votes are written once the threshold is reached and on shutdown."""
+        film = Film.objects.create(swapi_id=1, title="A New Hope")
+        buffer = votes.VoteBuffer(flush_interval=60, max_pending=3)
+        buffer.add(Character, self.character.pk)
+        self.assertEqual(buffer.add(Film, film.pk, 1), 1)
+        self.assertEqual(Character.objects.get().votes, 0)
+        buffer.add(Character, self.character.pk)  # Third vote triggers a flush
+        self.assertEqual((Character.objects.get().votes, Film.objects.get().votes), (2, 1))
+        buffer.add(Film, film.pk, 2)
+        self.assertEqual(buffer.pending(Film, film.pk), 2)
+        buffer.stop()
+        self.assertEqual(Film.objects.get().votes, 3)
+
+    @override_settings(VOTE_BUFFER={"ENABLED": True, "FLUSH_INTERVAL": 60, "MAX_PENDING": 1000})
+    def test_vote_endpoint_with_buffer(self):
+        """Test the vote endpoint reports pending votes before they are flushed."""
+        url = reverse('character-vote', args=[self.character.id])
+        with patch.object(votes, "_buffer", None):
+            self.client.post(url)
+            response = self.client.post(url)
+            self.assertEqual(response.data["votes"], 2)
+            self.assertEqual(Character.objects.get().votes, 0)
+            votes.get_buffer().stop()
+        self.assertEqual(Character.objects.get().votes, 2)
+
+
+class LeaderboardTests(APITestCase):
+    """Test the in-memory leaderboard endpoints."""
+    def setUp(self):
+        self.luke = Character.objects.create(swapi_id=1, name="Luke", votes=5)
+        self.leia = Character.objects.create(swapi_id=2, name="Leia", votes=9)
+        self.han = Character.objects.create(swapi_id=3, name="Han", votes=1)
+        self.url = reverse('character-leaderboard')
+
+    def names(self, response):
+        return [entry["name"] for entry in response.data]
+
+    def test_leaderboard_order_and_limit(self):
+        """Test entries are ordered by votes and limited by ?limit=."""
+        response = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {"id": self.leia.id, "name": "Leia", "votes": 9},
+            {"id": self.luke.id, "name": "Luke", "votes": 5},
+        ])
+
+    def test_hot_reads_and_votes_need_no_rebuild(self):
+        """Test warm reads run no query and votes keep the leaderboard current."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        for _ in range(9):
+            self.client.post(reverse('character-vote', args=[self.han.id]))
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(self.names(response), ["Han", "Leia", "Luke"])
+
+    def test_out_of_order_record_keeps_higher_count(self):
+        """Test a vote reporting an older, lower total does not overwrite a newer one."""
+        board = get_leaderboard(Character)
+        board.top(3)
+        newer, older = Character.objects.get(pk=self.han.pk), Character.objects.get(pk=self.han.pk)
+        newer.votes, older.votes = 12, 11
+        board.record(newer)
+        board.record(older)
+        self.assertEqual(board.top(1), [{"id": self.han.id, "name": "Han", "votes": 12}])
+
+    def test_vote_enters_full_leaderboard(self):
+        """Test an object outside a full top-K enters it once it has enough votes."""
+        board = get_leaderboard(Character)
+        with patch.object(board, "size", 2):
+            self.assertEqual([e["name"] for e in board.top(2)], ["Leia", "Luke"])
+            self.han.votes = 6
+            board.record(self.han)
+            self.assertEqual([e["name"] for e in board.top(2)], ["Leia", "Han"])
+
+    def test_writes_invalidate_leaderboard(self):
+        """Test creating and deleting objects is reflected in the leaderboard."""
+        self.client.get(self.url)
+        Character.objects.create(swapi_id=4, name="Yoda", votes=100)
+        self.leia.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(self.names(response), ["Yoda", "Luke", "Han"])
+
+    def test_invalid_limit(self):
+        """Test a non-numeric or out-of-range limit is rejected."""
+        for limit in ("abc", 0, 10000):
+            response = self.client.get(self.url, {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_film_and_starship_leaderboards(self):
+        """Test films and starships expose leaderboards too."""
+        Film.objects.create(swapi_id=1, title="A New Hope", votes=3)
+        Starship.objects.create(swapi_id=1, name="X-wing", votes=2)
+        self.assertEqual(self.client.get(reverse('film-leaderboard')).data[0]["title"], "A New Hope")
+        self.assertEqual(self.client.get(reverse('starship-leaderboard')).data[0]["votes"], 2)
+
+
+@override_settings(API_CACHE={"ENABLED": True})
+class ResponseCacheTests(APITestCase):
+    """Test list/retrieve response caching and write-driven invalidation."""
+    def setUp(self):
+        self.film = Film.objects.create(swapi_id=1, title="A New Hope")
+        self.character = Character.objects.create(swapi_id=1, name="Luke Skywalker")
+        self.character.films.add(self.film)
+        self.list_url = reverse('character-list')
+
+    def test_second_request_is_served_from_cache(self):
+        """Test a repeated GET hits the cache without touching the database."""
+        first = self.client.get(self.list_url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+    def test_query_string_is_part_of_the_key(self):
+        """Test different query strings are cached separately."""
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {"search": "Leia"})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_vote_invalidates_cache(self):
+        """Test voting makes cached list and detail pages stale."""
+        detail_url = reverse('character-detail', args=[self.character.id])
+        self.client.get(self.list_url)
+        self.client.get(detail_url)
+        self.client.post(reverse('character-vote', args=[self.character.id]))
+        self.assertEqual(self.client.get(self.list_url).data["results"][0]["votes"], 1)
+        self.assertEqual(self.client.get(detail_url).data["votes"], 1)
+
+    def test_embedded_resource_write_invalidates_cache(self):
+        """Test editing a film invalidates cached character pages that embed it."""
+        self.client.get(self.list_url + "?expand=films")
+        self.client.patch(reverse('film-detail', args=[self.film.id]), {"title": "Star Wars"}, format='json')
+        response = self.client.get(self.list_url + "?expand=films")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["films"][0]["title"], "Star Wars")
+
+    def test_generation_bumped_again_on_commit(self):
+        """Test a write bumps the generation again once its transaction commits."""
+        from . import cache as api_cache
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('film-detail', args=[self.film.id]), {"title": "Star Wars"}, format='json')
+            self.client.get(self.list_url)  # A reader caching a page before the commit
+            during = api_cache.get_generation(Character)
+        self.assertNotEqual(api_cache.get_generation(Character), during)
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "MISS")
+
+    @patch('api.swapi_client.fetch_all')
+    def test_fetch_invalidates_cache(self, mock_fetch_all):
+        """Test a SWAPI fetch that stores rows invalidates cached pages."""
+        self.client.get(self.list_url)
+        mock_fetch_all.return_value = [{"name": "Leia Organa", "url": "https://swapi.info/api/people/5/"}]
+        self.client.post(reverse('character-fetch') + '?wait=true')
+        self.assertEqual(self.client.get(self.list_url).data["count"], 2)
+
+    def test_cache_stats(self):
+        """Test the hit and miss counters are reported."""
+        before = self.client.get(reverse('cache-stats')).data
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        after = self.client.get(reverse('cache-stats')).data
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+    @override_settings(API_CACHE={"ENABLED": False})
+    def test_cache_can_be_disabled(self):
+        """Test no caching happens when API_CACHE is disabled."""
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotIn("X-Cache", response)
+
+
+class ConditionalGetTests(APITestCase):
+    """Test ETag / Last-Modified headers and 304 responses."""
+    def setUp(self):
+        self.film = Film.objects.create(swapi_id=1, title="A New Hope")
+        self.character = Character.objects.create(swapi_id=1, name="Luke Skywalker")
+        self.list_url = reverse('character-list')
+        self.detail_url = reverse('character-detail', args=[self.character.id])
+
+    def test_headers_present(self):
+        """Test list and detail responses carry ETag and Last-Modified."""
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url)
+            self.assertTrue(response["ETag"].startswith('"'))
+            self.assertIn("Last-Modified", response)
+
+    def test_if_none_match_returns_304_without_serializing(self):
+        """Test a matching If-None-Match is answered with 304 before serialization."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        with patch.object(CharacterSerializer, "to_representation", side_effect=AssertionError("serialized")):
+            with self.assertNumQueries(0):
+                response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_returns_304(self):
+        """Test a current If-Modified-Since is answered with 304."""
+        last_modified = self.client.get(self.list_url)["Last-Modified"]
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_differs_per_url(self):
+        """Test list, detail and filtered lists get different ETags."""
+        etags = {
+            self.client.get(self.list_url)["ETag"],
+            self.client.get(self.detail_url)["ETag"],
+            self.client.get(self.list_url, {"search": "Luke"})["ETag"],
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_vote_advances_etag(self):
+        """Test voting changes the ETag so clients re-download."""
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.client.post(reverse('character-vote', args=[self.character.id]))
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["votes"], 1)
+
+    def test_embedded_film_change_advances_character_etag(self):
+        """Test linking or editing a film changes the ETag of character pages."""
+        etag = self.client.get(self.list_url)["ETag"]
+        self.character.films.add(self.film)
+        second = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.client.patch(reverse('film-detail', args=[self.film.id]), {"title": "Star Wars"}, format='json')
+        third = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=second["ETag"])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+
+    def test_version_is_read_from_the_shared_cache(self):
+        """Test a write by another worker process, seen through the shared cache, changes the ETag."""
+        from . import cache as api_cache
+        etag = self.client.get(self.detail_url)["ETag"]
+        Character.objects.filter(pk=self.character.pk).update(name="Luke")
+        api_cache.bump_generation(Character)  # What the other process's signal handler does
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Luke")
+
+    def test_version_is_rebuilt_when_missing(self):
+        """Test an evicted version is recreated, dated from the latest update, without counting rows."""
+        from . import cache as api_cache
+        caches["default"].clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response["Last-Modified"], http_date(int(self.character.updated_at.timestamp())))
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(api_cache.get_version(Character)["last_modified"], int(self.character.updated_at.timestamp()))
+
+    def test_unrelated_many_to_many_change_is_ignored(self):
+        """Test changing a non-resource many-to-many relation leaves the ETag alone."""
+        from django.contrib.auth.models import Group, User
+        etag = self.client.get(self.list_url)["ETag"]
+        user = User.objects.create_user("luke")
+        group = Group.objects.create(name="rebels")
+        user.groups.add(group)
+        group.user_set.remove(user)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @patch('api.swapi_client.fetch_all')
+    def test_fetch_advances_etag(self, mock_fetch_all):
+        """Test a fetch that stores rows changes the ETag."""
+        etag = self.client.get(self.list_url)["ETag"]
+        mock_fetch_all.return_value = [{"name": "Leia Organa", "url": "https://swapi.info/api/people/5/"}]
+        self.client.post(reverse('character-fetch') + '?wait=true')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Test the opt-in cursor (keyset) pagination mode."""
+    def setUp(self):
+        for i in range(1, 26):
+            Character.objects.create(swapi_id=i, name=f"Character {i}", votes=i % 4)
+        self.url = reverse('character-list')
+
+    def walk(self, params, follow="next"):
+        """Follows the links from the first page and collects all ids."""
+        response = self.client.get(self.url, params)
+        ids = [row["id"] for row in response.data["results"]]
+        while response.data[follow]:
+            response = self.client.get(response.data[follow])
+            ids += [row["id"] for row in response.data["results"]]
+        return ids, response
+
+    def test_page_number_clients_unaffected(self):
+        """Test the default mode is still page-number with a count."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 25)
+
+    def test_cursor_walks_all_rows_by_id_without_count(self):
+        """Test cursor pages cover every row once, in id order, with no COUNT query."""
+        first = self.client.get(self.url, {"pagination": "cursor", "page_size": 7})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first.data["next"])
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+        ids, _ = self.walk({"pagination": "cursor", "page_size": 7})
+        self.assertEqual(ids, list(Character.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_cursor_by_votes_is_stable(self):
+        """Test ordering by (-votes, id) visits every row once despite ties."""
+        ids, last = self.walk({"pagination": "cursor", "cursor_ordering": "-votes", "page_size": 4})
+        expected = list(Character.objects.order_by("-votes", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertIsNone(last.data["next"])
+        self.assertNotIn("count", last.data)
+
+    def test_previous_links(self):
+        """Test previous links walk back to the first page."""
+        _, last = self.walk({"pagination": "cursor", "cursor_ordering": "-votes", "page_size": 4})
+        response = last
+        ids = [row["id"] for row in response.data["results"]]
+        while response.data["previous"]:
+            response = self.client.get(response.data["previous"])
+            ids = [row["id"] for row in response.data["results"]] + ids
+        expected = list(Character.objects.order_by("-votes", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor_and_ordering(self):
+        """Test malformed cursors and unknown orderings are rejected."""
+        response = self.client.get(self.url, {"pagination": "cursor", "cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        malformed = [
+            {"o": "id", "p": [3]},  # No direction
+            {"o": "id", "p": [3], "r": "yes"},
+            {"o": "id", "p": ["x"], "r": 0},
+            {"o": "id", "p": [[1]], "r": 0},
+            {"o": "id", "p": [None], "r": 0},
+            {"o": "id", "p": 3, "r": 0},
+            {"o": "-votes", "p": [{"a": 1}, 3], "r": 0},
+            ["id", [3], 0],
+        ]
+        for payload in malformed:
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            params = {"pagination": "cursor", "cursor_ordering": payload[0] if isinstance(payload, list) else payload["o"]}
+            response = self.client.get(self.url, {**params, "cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, payload)
+        response = self.client.get(self.url, {"pagination": "cursor", "cursor_ordering": "name"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FullTextSearchTests(APITestCase):
+    """Test ?search= served from the full-text index."""
+    def setUp(self):
+        self.luke = Character.objects.create(swapi_id=1, name="Luke Skywalker")
+        self.anakin = Character.objects.create(swapi_id=2, name="Anakin Skywalker")
+        self.leia = Character.objects.create(swapi_id=3, name="Leia Organa")
+        self.url = reverse('character-list')
+
+    def names(self, params, url=None):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row.get("name", row.get("title")) for row in response.data["results"]]
+
+    def test_prefix_search(self):
+        """Test partial words match as prefixes and all terms must match."""
+        self.assertEqual(sorted(self.names({"search": "sky"})), ["Anakin Skywalker", "Luke Skywalker"])
+        self.assertEqual(self.names({"search": "lu sky"}), ["Luke Skywalker"])
+        self.assertEqual(self.names({"search": "vader"}), [])
+
+    def test_results_ranked_by_relevance(self):
+        """Test better matches are listed first."""
+        Character.objects.create(swapi_id=4, name="Organa Organa")
+        self.assertEqual(self.names({"search": "organa"}), ["Organa Organa", "Leia Organa"])
+
+    def test_index_follows_writes(self):
+        """Test inserts, updates, deletes and bulk ingest keep the index in sync."""
+        self.leia.name = "Princess Leia"
+        self.leia.save()
+        self.luke.delete()
+        ingest.ingest(Character, [{"name": "Han Solo", "url": "https://swapi.info/api/people/14/"}])
+        self.assertEqual(self.names({"search": "princess"}), ["Princess Leia"])
+        self.assertEqual(self.names({"search": "organa"}), [])
+        self.assertEqual(self.names({"search": "luke"}), [])
+        self.assertEqual(self.names({"search": "solo"}), ["Han Solo"])
+
+    def test_quotes_in_terms_are_escaped(self):
+        """Test FTS syntax characters in the search terms do not cause errors."""
+        self.assertEqual(self.names({"search": 'luke" OR "leia'}), [])
+        self.assertEqual(len(self.names({"search": "sky* -("})), 2)
+
+    def test_film_and_starship_fields(self):
+        """Test films match on director/producer and starships on model/manufacturer."""
+        Film.objects.create(swapi_id=1, title="The Empire Strikes Back", director="Irvin Kershner")
+        Starship.objects.create(swapi_id=1, name="TIE Fighter", manufacturer="Sienar Fleet Systems")
+        self.assertEqual(self.names({"search": "kersh"}, reverse('film-list')), ["The Empire Strikes Back"])
+        self.assertEqual(self.names({"search": "sienar"}, reverse('starship-list')), ["TIE Fighter"])
+
+    @override_settings(SEARCH_BACKEND="api.search.IcontainsSearchBackend")
+    def test_icontains_fallback(self):
+        """Test the plain icontains search can still be selected."""
+        self.assertEqual(sorted(self.names({"search": "walker"})), ["Anakin Skywalker", "Luke Skywalker"])
+
+
+class FastReadSerializerTests(APITestCase):
+    """Test the read-plan path renders exactly what the ModelSerializers render."""
+    def setUp(self):
+        films = [Film.objects.create(swapi_id=i, title=f"Film {i}", release_date="1977-05-25") for i in (1, 2)]
+        ships = [Starship.objects.create(swapi_id=i, name=f"Ship {i}", model="T-65") for i in (1, 2)]
+        for i in range(1, 4):
+            character = Character.objects.create(swapi_id=i, name=f"Character {i}", height="172", votes=i)
+            character.films.set(films[:i])
+            character.starships.set(ships[i - 1:])
+
+    def render(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content
+
+    def assertSameAsModelSerializer(self, url):
+        fast = self.render(url)
+        with override_settings(FAST_READ_SERIALIZERS=False, API_CACHE={"ENABLED": False}):
+            slow = self.render(url)
+        self.assertEqual(fast, slow)
+
+    @override_settings(API_CACHE={"ENABLED": False})
+    def test_list_output_identical(self):
+        """Test list pages are byte-for-byte identical, nested lists included."""
+        for name in ("character", "film", "starship"):
+            self.assertSameAsModelSerializer(reverse(f"{name}-list"))
+        self.assertSameAsModelSerializer(reverse("character-list") + "?pagination=cursor&cursor_ordering=-votes")
+        self.assertSameAsModelSerializer(reverse("character-list") + "?search=character")
+        self.assertSameAsModelSerializer(reverse("character-list") + "?expand=films,starships")
+        self.assertSameAsModelSerializer(reverse("character-list") + "?fields=name,films&expand=films&omit=id")
+
+    @override_settings(API_CACHE={"ENABLED": False})
+    def test_retrieve_output_identical(self):
+        """Test detail responses are identical and unknown ids are 404s."""
+        pk = Character.objects.get(swapi_id=2).pk
+        self.assertSameAsModelSerializer(reverse("character-detail", args=[pk]))
+        self.assertEqual(self.client.get(reverse("character-detail", args=[999])).status_code, 404)
+
+    def test_unsupported_serializer_falls_back(self):
+        """Test serializers with fields the plan cannot render are not compiled."""
+        from rest_framework import serializers
+        from .fast_serializers import get_read_plan
+
+        class NamedSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Character
+                fields = ["id", "label"]
+
+            def get_label(self, obj):
+                return obj.name
+
+        self.assertIsNone(get_read_plan(NamedSerializer))
+        self.assertIsNotNone(get_read_plan(CharacterSerializer))
+
+
+@unittest.skipUnless(renderers.get_backend(), "orjson/msgspec not installed")
+class FastJSONRendererTests(APITestCase):
+    """Test the fast JSON renderer and parser match DRF's stdlib ones."""
+    def setUp(self):
+        film = Film.objects.create(swapi_id=1, title="A New Hope \u2028", release_date="1977-05-25")
+        luke = Character.objects.create(swapi_id=1, name="Luke Skywalker \u00e9")
+        luke.films.add(film)
+
+    def test_output_matches_stdlib(self):
+        """Test list pages render to the same bytes as JSONRenderer."""
+        response = self.client.get(reverse('character-list') + "?expand=films")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stdlib = JSONRenderer().render(response.data)
+        self.assertEqual(response.content, stdlib)
+        self.assertIn(b"\\u2028", response.content)
+
+    def test_datetimes_use_drf_format(self):
+        """Test datetimes, dates and decimals are encoded as DRF's encoder does."""
+        data = {
+            "at": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2024, 1, 2),
+            "amount": decimal.Decimal("1.50"),
+            1: "non-string key",
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_uses_stdlib(self):
+        """Test indented output (e.g. the browsable API) falls back to the stdlib."""
+        data = {"a": [1, 2]}
+        renderer = renderers.FastJSONRenderer()
+        self.assertEqual(renderer.render(data, "application/json; indent=4"),
+                         JSONRenderer().render(data, "application/json; indent=4"))
+
+    def test_parser(self):
+        """Test request bodies are parsed and malformed JSON is a 400."""
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "R2-D2 \u00e9"}'.encode())), {"name": "R2-D2 \u00e9"})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"name": '))
+        response = self.client.post(reverse('film-list'), '{"title": ', content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(FAST_JSON_BACKEND="json")
+    def test_stdlib_backend_selectable(self):
+        """Test FAST_JSON_BACKEND="json" disables the fast encoder."""
+        self.assertIsNone(renderers.get_backend())
+        response = self.client.get(reverse('character-list'))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class BinaryFormatTests(APITestCase):
+    """Test MessagePack and CBOR responses round-trip to the JSON data."""
+    formats = {}
+    if renderers.msgpack is not None:
+        formats["application/msgpack"] = lambda content: renderers.msgpack.unpackb(content, raw=False)
+    if renderers.cbor2 is not None:
+        formats["application/cbor"] = renderers.cbor2.loads
+
+    def setUp(self):
+        if not self.formats:
+            self.skipTest("msgpack/cbor2 not installed")
+        film = Film.objects.create(swapi_id=1, title="A New Hope", release_date="1977-05-25")
+        ship = Starship.objects.create(swapi_id=1, name="X-wing")
+        luke = Character.objects.create(swapi_id=1, name="Luke Skywalker", votes=3)
+        luke.films.add(film)
+        luke.starships.add(ship)
+        self.urls = [
+            reverse('character-list'), reverse('character-detail', args=[luke.pk]),
+            reverse('film-list'), reverse('starship-detail', args=[ship.pk]),
+            reverse('character-list') + "?pagination=cursor",
+        ]
+
+    def test_round_trip_matches_json(self):
+        """Test every format decodes to exactly the JSON document."""
+        for url in self.urls:
+            expected = json.loads(self.client.get(url, HTTP_ACCEPT="application/json").content)
+            for media_type, decode in self.formats.items():
+                with self.subTest(url=url, media_type=media_type):
+                    response = self.client.get(url, HTTP_ACCEPT=media_type)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(response["Content-Type"], media_type)
+                    self.assertEqual(decode(response.content), expected)
+
+    def test_format_query_parameter(self):
+        """Test ?format= selects a binary format too."""
+        for media_type in self.formats:
+            response = self.client.get(reverse('film-list'), {"format": media_type.split("/")[1]})
+            self.assertEqual(response["Content-Type"], media_type)
+
+    def test_json_and_browsable_api_remain_defaults(self):
+        """Test clients not asking for a binary format still get JSON or HTML."""
+        self.assertEqual(self.client.get(reverse('film-list'))["Content-Type"], "application/json")
+        response = self.client.get(reverse('film-list'), HTTP_ACCEPT="text/html")
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+    def test_binary_request_bodies(self):
+        """Test films can be created from MessagePack and CBOR bodies."""
+        encoders = {"application/msgpack": lambda data: renderers.msgpack.packb(data),
+                    "application/cbor": lambda data: renderers.cbor2.dumps(data)}
+        for i, media_type in enumerate(self.formats, start=10):
+            body = encoders[media_type]({"swapi_id": i, "title": f"Film {i}"})
+            response = self.client.post(reverse('film-list'), body, content_type=media_type,
+                                        HTTP_ACCEPT=media_type)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.formats[media_type](response.content)["title"], f"Film {i}")
+            bad = self.client.post(reverse('film-list'), b"\xc1", content_type=media_type)
+            self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTests(APITestCase):
+    """Test the streaming NDJSON export actions."""
+    def setUp(self):
+        self.films = [Film.objects.create(swapi_id=i, title=f"Film {i}") for i in (1, 2)]
+        self.ship = Starship.objects.create(swapi_id=1, name="X-wing")
+        self.characters = [Character.objects.create(swapi_id=i, name=f"Character {i}") for i in range(1, 6)]
+        self.characters[0].films.set(self.films)
+        self.characters[0].starships.add(self.ship)
+        self.url = reverse('character-export')
+
+    def lines(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content)
+        if response.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_streams_every_row(self):
+        """Test every row is streamed once, in id order, with the model's columns."""
+        rows = self.lines(self.client.get(self.url))
+        self.assertEqual([row["swapi_id"] for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(rows[0]["name"], "Character 1")
+        self.assertNotIn("films", rows[0])
+        self.assertEqual(len(self.lines(self.client.get(reverse('film-export')))), 2)
+
+    def test_chunks_and_relation_ids(self):
+        """Test relation ids are inlined using one query per relation and chunk."""
+        with patch.object(CharacterViewSet, "export_chunk_size", 2), CaptureQueriesContext(connection) as ctx:
+            rows = self.lines(self.client.get(self.url, {"include_relations": "true"}))
+        self.assertEqual(rows[0]["films"], [film.pk for film in self.films])
+        self.assertEqual(rows[0]["starships"], [self.ship.pk])
+        self.assertEqual(rows[1]["films"], [])
+        # Upper bound + one streamed row query + 2 relation queries for each of 3 chunks.
+        self.assertEqual(len(ctx.captured_queries), 1 + 1 + 3 * 2)
+
+    def test_since_filter(self):
+        """Test ?since= limits the export to recently updated rows."""
+        head = self.client.get(self.url)
+        until = head["X-Export-Until"]
+        later = timezone.now() + datetime.timedelta(seconds=1)
+        Character.objects.filter(pk=self.characters[2].pk).update(updated_at=later)
+        rows = self.lines(self.client.get(self.url, {"since": later.isoformat()}))
+        self.assertEqual([row["swapi_id"] for row in rows], [3])
+        self.assertGreater(len(self.lines(self.client.get(self.url, {"since": until}))), 0)
+        self.assertEqual(len(self.lines(self.client.get(self.url, {"since": "2000-01-01"}))), 5)
+        response = self.client.get(self.url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_gzip(self):
+        """Test the stream is gzip-compressed when the client accepts it."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(self.lines(response)), 5)
+
+
+class ImportTests(APITestCase):
+    """Test the streaming bulk import endpoint, command and batching."""
+    def ndjson(self, records):
+        return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+    def test_ndjson_import_links_by_swapi_id(self):
+        """Test films, starships and characters import and link by swapi_id."""
+        films = self.ndjson([{"swapi_id": 1, "title": "A New Hope"},
+                             {"url": "https://swapi.info/api/films/2/", "title": "Empire", "episode_id": 5}])
+        response = self.client.post(reverse('film-import'), films, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(Film.objects.get(swapi_id=2).episode_id, 5)
+        Starship.objects.create(swapi_id=12, name="X-wing")
+        people = self.ndjson([
+            {"swapi_id": 1, "name": "Luke", "films": [1, "https://swapi.info/api/films/2/"], "starships": [12]},
+            {"swapi_id": 2, "name": "C-3PO", "films": [1, 99]},
+        ])
+        response = self.client.post(reverse('character-import'), people, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["linked"], {"films": 3, "starships": 1})
+        luke = Character.objects.get(swapi_id=1)
+        self.assertEqual(sorted(luke.films.values_list("swapi_id", flat=True)), [1, 2])
+        self.assertEqual(list(luke.starships.values_list("swapi_id", flat=True)), [12])
+        self.assertGreaterEqual(response.data["rows_per_second"], 0)
+
+    def test_csv_import_and_upsert(self):
+        """Test CSV input, upserts of existing rows and `;`-separated relations."""
+        Film.objects.create(swapi_id=1, title="A New Hope")
+        Character.objects.create(swapi_id=1, name="Luke", height="170")
+        body = "swapi_id,name,height,films\n1,Luke,172,1\n2,\"Organa, Leia\",150,1;2\n"
+        response = self.client.post(reverse('character-import'), body, content_type="text/csv")
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 1))
+        self.assertEqual(Character.objects.get(swapi_id=1).height, "172")
+        self.assertEqual(Character.objects.get(swapi_id=2).name, "Organa, Leia")
+        self.assertEqual(response.data["linked"], {"films": 2, "starships": 0})
+
+    def test_invalid_records_are_reported_and_skipped(self):
+        """Test bad records are skipped with their line numbers, the rest import."""
+        body = b'{"swapi_id": 1, "title": "Ok"}\n{"swapi_id": "x", "title": "Bad"}\nnot json\n' \
+               b'{"swapi_id": 3}\n\n{"title": "No id"}\n{"swapi_id": 4, "title": "' + b"t" * 300 + b'"}\n' \
+               b'{"swapi_id": 5, "title": "Bad URL", "url": "http://-bad.com/"}\n'
+        response = self.client.post(reverse('film-import'), body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["invalid"], 6)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [2, 3, 4, 6, 7, 8])
+        self.assertEqual(list(Film.objects.values_list("swapi_id", flat=True)), [1])
+
+    def test_batches_share_the_same_query_count(self):
+        """Test each batch costs a fixed number of queries, whatever the input size."""
+        def queries(count):
+            lines = [json.dumps({"swapi_id": i, "title": f"Film {i}"}) + "\n" for i in range(1, count + 1)]
+            Film.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                importer.import_stream(Film, iter(lines), batch_size=10)
+            return len(data_queries(ctx))
+        self.assertEqual(queries(50), 5 * queries(10))
+
+    def test_management_command(self):
+        """Test import_data reads a file and prints the report."""
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as handle:
+            handle.write(b"swapi_id,name,model\n9,Slave I,Firespray-31\n")
+        self.addCleanup(os.unlink, handle.name)
+        out = io.StringIO()
+        call_command("import_data", "starships", handle.name, stdout=out)
+        self.assertIn("Imported 1 starships", out.getvalue())
+        self.assertEqual(Starship.objects.get(swapi_id=9).model, "Firespray-31")
+
+
+class ConditionalSwapiHandler(BaseHTTPRequestHandler):
+    """
+    Serves SWAPI-style people pages with ETags, answering If-None-Match with 304.
+    """
+    page_size = 2
+    total = 5
+    version = 1  # Bump to change every page
+    status_code = 200  # Set to 503 to simulate an outage
+    requests = []  # (path, status) of every request served
+
+    def do_GET(self):
+        if self.status_code != 200:
+            self.send_response(self.status_code)
+            self.end_headers()
+            type(self).requests.append((self.path, self.status_code))
+            return
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * self.page_size
+        has_next = start + self.page_size < self.total
+        body = json.dumps({
+            "count": self.total,
+            "next": f"http://{self.headers['Host']}/api/people/?page={page + 1}" if has_next else None,
+            "results": [
+                {"name": f"Person {i} v{self.version}", "url": f"https://swapi.info/api/people/{i}/"}
+                for i in range(start + 1, min(start + self.page_size, self.total) + 1)
+            ],
+        }).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            type(self).requests.append((self.path, 304))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).requests.append((self.path, 200))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SwapiResponseCacheTests(APITestCase):
+    """Test the on-disk SWAPI response cache and conditional revalidation."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalSwapiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}/api"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache = swapi_client.ResponseCache(os.path.join(directory, "cache.sqlite3"), ttl=0)
+        self.addCleanup(self.cache.close)
+        ConditionalSwapiHandler.requests = []
+        ConditionalSwapiHandler.version = 1
+        ConditionalSwapiHandler.status_code = 200
+        patcher = patch.object(swapi_client, "SWAPI_BASE", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def statuses(self):
+        statuses = [status_code for _, status_code in ConditionalSwapiHandler.requests]
+        ConditionalSwapiHandler.requests = []
+        return statuses
+
+    def test_revalidation_returns_cached_pages(self):
+        """Test a refresh sends validators and gets 304s for unchanged pages."""
+        first = swapi_client.fetch_all("people", cache=self.cache)
+        self.assertTrue(first.changed)
+        first.commit()
+        self.assertEqual(self.statuses(), [200, 200, 200])
+        second = swapi_client.fetch_all("people", cache=self.cache)
+        self.assertFalse(second.changed)
+        self.assertEqual(second, first)
+        self.assertEqual(self.statuses(), [304, 304, 304])
+        ConditionalSwapiHandler.version = 2
+        third = swapi_client.fetch_all("people", cache=self.cache, concurrency=3)
+        self.assertTrue(third.changed)
+        self.assertEqual(third[0]["name"], "Person 1 v2")
+
+    def test_ttl_skips_requests(self):
+        """Test pages younger than the TTL are served without any request."""
+        cache = swapi_client.ResponseCache(self.cache.path, ttl=60)
+        self.addCleanup(cache.close)
+        swapi_client.fetch_all("people", cache=cache).commit()
+        self.statuses()
+        self.assertEqual(len(swapi_client.fetch_all("people", cache=cache)), 5)
+        self.assertEqual(self.statuses(), [])
+
+    def test_stale_on_error(self):
+        """Test cached pages are served when SWAPI fails, and errors surface without a cache."""
+        swapi_client.fetch_all("people", cache=self.cache).commit()
+        ConditionalSwapiHandler.status_code = 503
+        with self.assertLogs("api.swapi_client", "WARNING"):
+            self.assertEqual(len(swapi_client.fetch_all("people", cache=self.cache)), 5)
+        with self.assertRaises(requests.HTTPError):
+            swapi_client.fetch_all("people", concurrency=1)
+
+    def test_uncommitted_pages_are_not_cached(self):
+        """Test pages are only stored once the caller commits, so failed imports are retried."""
+        swapi_client.fetch_all("people", cache=self.cache)
+        self.assertTrue(swapi_client.fetch_all("people", cache=self.cache).changed)
+
+    def test_unchanged_resync_skips_ingest(self):
+        """Test a fetch with no upstream changes performs no database writes."""
+        with patch.object(swapi_client, "get_response_cache", return_value=self.cache):
+            first = self.client.post(reverse('character-fetch') + '?wait=true')
+            self.assertEqual(first.data["created"], 5)
+            with CaptureQueriesContext(connection) as ctx:
+                second = self.client.post(reverse('character-fetch') + '?wait=true')
+        self.assertTrue(second.data["skipped"])
+        self.assertEqual(second.data["unchanged"], 5)
+        self.assertEqual(self.statuses(), [200, 200, 200, 304, 304, 304])
+        writes = [q["sql"] for q in data_queries(ctx) if not q["sql"].startswith("SELECT")]
+        self.assertEqual(writes, [])
+
+
+    def test_local_edit_is_restored_despite_unchanged_pages(self):
+        """Test a fetch after a local edit restores the row even though every page revalidates as 304."""
+        url = reverse('character-fetch') + '?wait=true'
+        with patch.object(swapi_client, "get_response_cache", return_value=self.cache):
+            self.client.post(url)
+            luke = Character.objects.get(swapi_id=1)
+            self.client.patch(reverse('character-detail', args=[luke.pk]), {"name": "EDITED"}, format='json')
+            response = self.client.post(url)
+            self.assertNotIn("skipped", response.data)
+            self.assertEqual(response.data["updated"], 1)
+            self.assertEqual(Character.objects.get(swapi_id=1).name, "Person 1 v1")
+            self.assertTrue(self.client.post(url).data["skipped"])  # Rehashed: skipped again
+        self.assertEqual(self.statuses(), [200, 200, 200] + [304, 304, 304] * 2)
+
+class DiffSyncTests(APITestCase):
+    """Test the content-hash based sync: only new, changed and deleted rows are written."""
+    def setUp(self):
+        ingest.ingest(Film, [{"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"} for i in (1, 2)])
+
+    def people(self, luke_films=(1, 2), leia_name="Leia"):
+        return [
+            {
+                "name": "Luke",
+                "url": "https://swapi.info/api/people/1/",
+                "films": [f"https://swapi.info/api/films/{i}/" for i in luke_films],
+            },
+            {"name": leia_name, "url": "https://swapi.info/api/people/5/"},
+        ]
+
+    def test_noop_sync_writes_nothing(self):
+        """Test re-syncing identical characters issues no write at all."""
+        ingest.ingest(Character, self.people())
+        with CaptureQueriesContext(connection) as ctx:
+            result = ingest.ingest(Character, self.people(), delete=True)
+        writes = [q["sql"] for q in data_queries(ctx) if not q["sql"].startswith("SELECT")]
+        self.assertEqual(writes, [])
+        self.assertEqual((result["created"], result["updated"], result["unchanged"], result["deleted"]), (0, 0, 2, 0))
+        self.assertEqual(result["linked"], {"films": 0, "starships": 0})
+
+    def test_unchanged_characters_are_linked_to_films_fetched_later(self):
+        """Test characters, then films, then unchanged characters still links the new films."""
+        people = self.people(luke_films=(1, 3))
+        sync.ingest_fetched(Character, swapi_client.FetchResult(people))
+        self.assertEqual(Character.objects.get(swapi_id=1).films.count(), 1)  # Film 3 is unknown yet
+        sync.ingest_fetched(Film, swapi_client.FetchResult([{"title": "Film 3", "url": "https://swapi.info/api/films/3/"}]))
+        unchanged = swapi_client.FetchResult(people, cache=Mock())
+        self.assertFalse(unchanged.changed)
+        result = sync.ingest_fetched(Character, unchanged)
+        self.assertTrue(result["skipped"])
+        self.assertEqual(result["linked"], {"films": 1, "starships": 0})
+        luke = Character.objects.get(swapi_id=1)
+        self.assertEqual(sorted(luke.films.values_list("swapi_id", flat=True)), [1, 3])
+
+    def test_content_hash_is_stable(self):
+        """Test the hash ignores key and relation order but not values."""
+        row = {"swapi_id": 1, "name": "Luke"}
+        self.assertEqual(
+            ingest.content_hash(row, {"films": [2, 1]}),
+            ingest.content_hash({"name": "Luke", "swapi_id": 1}, {"films": [1, 2]}),
+        )
+        self.assertNotEqual(ingest.content_hash(row), ingest.content_hash({**row, "name": "Leia"}))
+
+    def test_upstream_changes_are_applied(self):
+        """Test changed fields are updated and, with delete, dropped links are removed."""
+        ingest.ingest(Character, self.people())
+        result = ingest.ingest(Character, self.people(luke_films=(1,), leia_name="Leia Organa"))
+        self.assertEqual((result["updated"], result["unchanged"]), (1, 1))
+        self.assertEqual(result["unlinked"], {"films": 0, "starships": 0})
+        self.assertEqual(Character.objects.get(swapi_id=1).films.count(), 2)  # Links are additive by default
+        result = ingest.ingest(Character, self.people(luke_films=(1,), leia_name="Leia Organa"), delete=True)
+        self.assertEqual(result["unlinked"], {"films": 0, "starships": 0})  # Hash already stored: skipped
+        luke = Character.objects.get(swapi_id=1)
+        luke.save()  # A local edit forgets the hash
+        result = ingest.ingest(Character, self.people(luke_films=(1,), leia_name="Leia Organa"), delete=True)
+        self.assertEqual(result["unlinked"], {"films": 1, "starships": 0})
+        self.assertEqual(list(luke.films.values_list("swapi_id", flat=True)), [1])
+
+    def test_delete_removes_missing_rows(self):
+        """Test rows SWAPI no longer lists are only deleted when asked, never for an empty payload."""
+        ingest.ingest(Character, self.people())
+        self.assertEqual(ingest.ingest(Character, self.people()[:1])["deleted"], 0)
+        self.assertEqual(ingest.ingest(Character, [], delete=True)["deleted"], 0)
+        result = ingest.ingest(Character, self.people()[:1], delete=True)
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(list(Character.objects.values_list("name", flat=True)), ["Luke"])
+        self.assertEqual(Character.films.through.objects.count(), 2)
+
+    def test_local_edit_is_resynced(self):
+        """Test a row edited through the API is restored from SWAPI on the next sync."""
+        ingest.ingest(Character, self.people())
+        leia = Character.objects.get(swapi_id=5)
+        response = self.client.patch(reverse('character-detail', args=[leia.pk]), {"name": "Princess Leia"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Character.objects.get(pk=leia.pk).content_hash, "")
+        result = ingest.ingest(Character, self.people())
+        self.assertEqual(result["updated"], 1)
+        leia.refresh_from_db()
+        self.assertEqual(leia.name, "Leia")
+        self.assertNotEqual(leia.content_hash, "")
+
+    def test_missing_hash_is_backfilled(self):
+        """Test rows stored before hashing get their hash without a data write."""
+        ingest.upsert(Film, [{"swapi_id": 3, "title": "Film 3", "episode_id": None, "director": "",
+                              "producer": "", "release_date": "", "url": "https://swapi.info/api/films/3/"}])
+        updated_at = Film.objects.get(swapi_id=3).updated_at
+        result = ingest.ingest(Film, [{"title": "Film 3", "url": "https://swapi.info/api/films/3/"}])
+        self.assertEqual((result["updated"], result["unchanged"]), (0, 1))
+        film = Film.objects.get(swapi_id=3)
+        self.assertNotEqual(film.content_hash, "")
+        self.assertEqual(film.updated_at, updated_at)
+
+    def test_import_clears_hash(self):
+        """Test an import that changes a synced row forgets its hash."""
+        importer.import_stream(Film, [json.dumps({"swapi_id": 1, "title": "Renamed"})])
+        self.assertEqual(Film.objects.get(swapi_id=1).content_hash, "")
+        self.assertNotEqual(Film.objects.get(swapi_id=2).content_hash, "")
+
+    def test_hash_is_not_exposed(self):
+        """Test the hash is left out of API responses and exports."""
+        film = Film.objects.get(swapi_id=1)
+        self.assertNotIn("content_hash", self.client.get(reverse('film-detail', args=[film.pk])).data)
+        export = b"".join(self.client.get(reverse('film-export')).streaming_content)
+        self.assertNotIn(b"content_hash", export)
+
+    def test_fetch_delete_parameter(self):
+        """Test ?delete=true on the fetch action deletes rows missing upstream."""
+        Film.objects.create(swapi_id=99, title="Gone")
+        items = [{"title": f"Film {i}", "url": f"https://swapi.info/api/films/{i}/"} for i in (1, 2)]
+        with patch.object(swapi_client, "fetch_all", return_value=items):
+            kept = self.client.post(reverse('film-fetch') + '?wait=true')
+            deleted = self.client.post(reverse('film-fetch') + "?delete=true&wait=true")
+        self.assertEqual((kept.data["unchanged"], kept.data["deleted"]), (2, 0))
+        self.assertEqual(deleted.data["deleted"], 1)
+        self.assertFalse(Film.objects.filter(swapi_id=99).exists())
+
+
+class SyncAllTests(APITestCase):
+    """Test the orchestrator syncing every resource in one go."""
+    PAYLOADS = {
+        "films": [{"title": "A New Hope", "url": "https://swapi.info/api/films/1/"}],
+        "starships": [{"name": "X-wing", "url": "https://swapi.info/api/starships/12/"}],
+        "people": [{
+            "name": "Luke",
+            "url": "https://swapi.info/api/people/1/",
+            "films": ["https://swapi.info/api/films/1/"],
+            "starships": ["https://swapi.info/api/starships/12/"],
+        }],
+    }
+
+    def setUp(self):
+        self.fail_resource = None
+        for target, kwargs in (("fetch_all", {"side_effect": self.fake_fetch_all}),
+                               ("get_response_cache", {"return_value": None})):
+            patcher = patch.object(swapi_client, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_fetch_all(self, resource, cache=None, progress=None):
+        time.sleep(0.3)
+        if resource == self.fail_resource:
+            raise requests.HTTPError("503 Server Error")
+        return list(self.PAYLOADS[resource])
+
+    def test_sync_endpoint(self):
+        """Test POST /api/sync/ ingests everything, linked, with concurrent fetch timings."""
+        response = self.client.post(reverse('sync') + '?wait=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["resources"]), ["films", "starships", "characters"])
+        self.assertEqual(response.data["resources"]["characters"]["linked"], {"films": 1, "starships": 1})
+        luke = Character.objects.get(swapi_id=1)
+        self.assertEqual(list(luke.films.values_list("title", flat=True)), ["A New Hope"])
+        self.assertEqual(list(luke.starships.values_list("name", flat=True)), ["X-wing"])
+        # Three 0.3 s fetches take about 0.3 s together, not 0.9 s.
+        self.assertGreaterEqual(response.data["fetch_seconds"], 0.3)
+        self.assertLess(response.data["fetch_seconds"], 0.75)
+        self.assertGreaterEqual(response.data["resources"]["films"]["fetch_seconds"], 0.3)
+
+    def test_fetch_failure_writes_nothing(self):
+        """Test a failed fetch leaves the database untouched."""
+        self.fail_resource = "people"
+        with self.assertRaises(requests.HTTPError):
+            sync.sync_all()
+        self.assertFalse(Film.objects.exists())
+
+    def test_ingest_failure_rolls_back(self):
+        """Test films and starships are rolled back when the character ingest fails."""
+        original = ingest.ingest
+        def failing_ingest(model, items, delete=False):
+            if model is Character:
+                raise RuntimeError("boom")
+            return original(model, items, delete=delete)
+        with patch.object(ingest, "ingest", side_effect=failing_ingest), self.assertRaises(RuntimeError):
+            sync.sync_all()
+        self.assertFalse(Film.objects.exists())
+        self.assertFalse(Starship.objects.exists())
+
+    def test_sync_command(self):
+        """Test `manage.py sync_swapi` reports each resource and fails cleanly."""
+        out = io.StringIO()
+        call_command("sync_swapi", "--delete", stdout=out)
+        self.assertIn("characters: 1 created, 0 updated, 0 unchanged, 0 deleted", out.getvalue())
+        self.assertIn("Synced in", out.getvalue())
+        self.fail_resource = "films"
+        with self.assertRaisesMessage(CommandError, "nothing was written"):
+            call_command("sync_swapi", stdout=io.StringIO())
+
+
+@override_settings(JOBS={"BACKEND": "api.jobs.ImmediateBackend"})
+class JobTests(APITestCase):
+    """Test fetch and sync as background jobs, and the job status endpoint."""
+    def setUp(self):
+        self.failure = None
+        for target, kwargs in (("fetch_all", {"side_effect": self.fake_fetch_all}),
+                               ("get_response_cache", {"return_value": None})):
+            patcher = patch.object(swapi_client, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_fetch_all(self, resource, cache=None, progress=None):
+        if self.failure:
+            raise self.failure
+        for page in (1, 2):
+            if progress is not None:
+                progress(pages=page)
+        return [{"title": f"Film {i}", "name": f"Ship {i}", "url": f"https://swapi.info/api/{resource}/{i}/"}
+                for i in (1, 2, 3)]
+
+    def test_fetch_returns_job(self):
+        """Test fetch answers 202 with a job whose status endpoint shows progress and result."""
+        response = self.client.post(reverse('film-fetch'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response["Location"], response.data["url"])
+        self.assertFalse(response.data["deduplicated"])
+        job = self.client.get(response["Location"])
+        self.assertEqual(job.status_code, status.HTTP_200_OK)
+        self.assertEqual((job.data["kind"], job.data["status"]), ("fetch:films", "succeeded"))
+        self.assertEqual(job.data["result"]["created"], 3)
+        self.assertEqual(job.data["progress"]["pages_fetched"], 2)
+        self.assertEqual(job.data["progress"]["rows_written"], 3)
+        self.assertEqual(Film.objects.count(), 3)
+
+    def test_sync_job_reports_each_resource(self):
+        """Test a sync job tracks pages and rows per resource."""
+        response = self.client.post(reverse('sync') + "?delete=true")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["params"], {"delete": True})
+        progress = response.data["progress"]
+        self.assertEqual(sorted(progress["resources"]), ["characters", "films", "starships"])
+        self.assertEqual((progress["pages_fetched"], progress["rows_written"]), (6, 9))
+
+    def test_failed_job(self):
+        """Test a failing job reports its error instead of raising."""
+        self.failure = requests.ConnectionError("SWAPI unreachable")
+        with self.assertLogs("api.jobs", "ERROR"):
+            response = self.client.post(reverse('starship-fetch'))
+        self.assertEqual(response.data["status"], "failed")
+        self.assertEqual(response.data["error"], "SWAPI unreachable")
+
+    def test_unknown_job(self):
+        """Test an unknown job id answers 404."""
+        self.assertEqual(self.client.get(reverse('job-detail', args=["nope"])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_identical_jobs_are_deduplicated(self):
+        """Test a job identical to one in progress is not started twice."""
+        registry = jobs.JobRegistry(jobs.ThreadPoolBackend(max_workers=1))
+        release = threading.Event()
+        first, created = registry.submit("sync", lambda job: release.wait(5), delete=False)
+        self.assertTrue(created)
+        again, created = registry.submit("sync", lambda job: None, delete=False)
+        self.assertIs(again, first)
+        self.assertFalse(created)
+        other, created = registry.submit("sync", lambda job: None, delete=True)
+        self.assertTrue(created)
+        release.set()
+        registry.backend.executor.shutdown(wait=True)
+        self.assertEqual((first.status, other.status), ("succeeded", "succeeded"))
+        registry.backend = jobs.ImmediateBackend()
+        self.assertTrue(registry.submit("sync", lambda job: None, delete=False)[1])  # Finished: not reused
+
+    def test_finished_jobs_expire(self):
+        """Test finished jobs are forgotten after the retention period."""
+        registry = jobs.JobRegistry(jobs.ImmediateBackend(), retention=0)
+        job, _ = registry.submit("sync", lambda job: None)
+        self.assertIs(registry.get(job.id), job)
+        registry.submit("other", lambda job: None)
+        self.assertIsNone(registry.get(job.id))
+
+
+class AsyncViewTests(TestCase):
+    """Test the async endpoints match the DRF ones."""
+    def setUp(self):
+        films = Film.objects.bulk_create(Film(swapi_id=i, title=f"Film {i}") for i in (1, 2))
+        for i in range(1, 4):
+            character = Character.objects.create(swapi_id=i, name=f"Person {i}", votes=i)
+            character.films.set(films[:i])
+
+    async def test_list_matches_drf(self):
+        """Test async list pages have the DRF payload, links included."""
+        for query in ("", "?page=2&page_size=2"):
+            expected = await sync_to_async(self.client.get)(reverse('character-list') + query)
+            response = await self.async_client.get(reverse('async-list', args=["characters"]) + query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertEqual(data["results"], json.loads(expected.content)["results"])
+            self.assertEqual(data["count"], 3)
+        self.assertIsNone(data["next"])
+        self.assertTrue(data["previous"].endswith("/api/async/characters/?page_size=2"))
+        response = await self.async_client.get(reverse('async-list', args=["films"]) + "?page=9")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_detail_matches_drf(self):
+        """Test async detail responses have the DRF payload, and 404 for unknown ids."""
+        pk = (await Character.objects.aget(swapi_id=3)).pk
+        expected = await sync_to_async(self.client.get)(reverse('character-detail', args=[pk]))
+        response = await self.async_client.get(reverse('async-detail', args=["characters", pk]))
+        self.assertEqual(response.json(), json.loads(expected.content))
+        self.assertEqual(len(response.json()["films"]), 2)
+        response = await self.async_client.get(reverse('async-detail', args=["starships", 999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_vote(self):
+        """Test an async vote is written and returned."""
+        film = await Film.objects.aget(swapi_id=1)
+        response = await self.async_client.post(reverse('async-vote', args=["films", film.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["votes"], 1)
+        await film.arefresh_from_db()
+        self.assertEqual(film.votes, 1)
+        self.assertEqual((await self.async_client.get(reverse('async-vote', args=["films", film.pk]))).status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_fetch(self):
+        """Test the async fetch ingests what the async client returns."""
+        items = [{"name": "X-wing", "url": "https://swapi.info/api/starships/12/"}]
+        with patch.object(swapi_client, "afetch_all", AsyncMock(return_value=items)), \
+                patch.object(swapi_client, "get_response_cache", return_value=None):
+            response = await self.async_client.post(reverse('async-fetch', args=["starships"]))
+        self.assertEqual(response.json()["created"], 1)
+        self.assertTrue(await Starship.objects.filter(swapi_id=12).aexists())
+
+
+class DatabaseProfileTests(TestCase):
+    """Test the environment-driven database settings and SQLite tuning."""
+    def test_sqlite_profile(self):
+        """Test the default profile uses IMMEDIATE transactions and the tuning PRAGMAs."""
+        databases, pragmas = db.database_settings({"DB_TIMEOUT": "7.5"}, settings.BASE_DIR)
+        self.assertEqual(databases["default"]["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(databases["default"]["OPTIONS"], {"timeout": 7.5, "transaction_mode": "IMMEDIATE"})
+        self.assertEqual(pragmas["journal_mode"], "WAL")
+        self.assertEqual(pragmas["busy_timeout"], 7500)
+        self.assertEqual(db.database_settings({"DB_SQLITE_TUNING": "0"}, settings.BASE_DIR)[1], {})
+
+    def test_postgresql_profile(self):
+        """Test PostgreSQL uses persistent connections, or a pool instead when asked."""
+        environ = {"DB_ENGINE": "postgresql", "DB_NAME": "swapi", "DB_HOST": "db", "DB_CONN_MAX_AGE": "30"}
+        default = db.database_settings(environ, settings.BASE_DIR)[0]["default"]
+        self.assertEqual((default["NAME"], default["HOST"], default["CONN_MAX_AGE"]), ("swapi", "db", 30))
+        self.assertTrue(default["CONN_HEALTH_CHECKS"])
+        default = db.database_settings({**environ, "DB_POOL": "1", "DB_POOL_MAX_SIZE": "20"}, settings.BASE_DIR)[0]["default"]
+        self.assertEqual(default["CONN_MAX_AGE"], 0)
+        self.assertEqual(default["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20})
+        with self.assertRaises(ImproperlyConfigured):
+            db.database_settings({"DB_ENGINE": "oracle"}, settings.BASE_DIR)
+
+    def test_pragmas_applied_on_connect(self):
+        """Test a new SQLite connection is switched to WAL with the configured PRAGMAs."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = SQLiteDatabaseWrapper(
+            {**connection.settings_dict, "NAME": os.path.join(directory, "tuned.sqlite3")}, alias="tuned"
+        )
+        self.addCleanup(wrapper.close)
+        with override_settings(SQLITE_PRAGMAS={"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234}):
+            wrapper.ensure_connection()
+        with wrapper.cursor() as cursor:
+            values = [cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                      for name in ("journal_mode", "synchronous", "busy_timeout")]
+        self.assertEqual(values, ["wal", 1, 1234])
+
+
+class TypedAttributeTests(APITestCase):
+    """Test the parsed height, mass and release date columns and the filters using them."""
+    def setUp(self):
+        ingest.ingest(Character, [
+            {"name": "Luke", "height": "172", "mass": "77", "url": "https://swapi.info/api/people/1/"},
+            {"name": "Jabba", "height": "175", "mass": "1,358", "url": "https://swapi.info/api/people/16/"},
+            {"name": "Chewbacca", "height": "228", "mass": "112", "url": "https://swapi.info/api/people/13/"},
+            {"name": "Arvel", "height": "unknown", "mass": "unknown", "url": "https://swapi.info/api/people/77/"},
+        ])
+        ingest.ingest(Film, [
+            {"title": "A New Hope", "release_date": "1977-05-25", "url": "https://swapi.info/api/films/1/"},
+            {"title": "The Phantom Menace", "release_date": "1999-05-19", "url": "https://swapi.info/api/films/4/"},
+        ])
+
+    def names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [item.get("name", item.get("title")) for item in response.json()["results"]]
+
+    def test_parsers(self):
+        """Test SWAPI strings are parsed, and unparseable values become None."""
+        from .attributes import parse_date, parse_decimal, parse_integer
+        self.assertEqual(parse_decimal("1,358"), decimal.Decimal("1358"))
+        self.assertEqual(parse_decimal("78.2"), decimal.Decimal("78.2"))
+        self.assertEqual(parse_integer("66.6"), 67)
+        self.assertIsNone(parse_decimal("unknown"))
+        self.assertIsNone(parse_integer("n/a"))
+        self.assertIsNone(parse_decimal("NaN"))
+        self.assertIsNone(parse_integer("1e30"))
+        self.assertEqual(parse_integer("2147483647"), 2147483647)
+        self.assertIsNone(parse_integer("2147483648"))
+        self.assertEqual(parse_decimal("99999999.99"), decimal.Decimal("99999999.99"))
+        self.assertIsNone(parse_decimal("99999999.999"))  # Rounds up to 10 integer digits
+        self.assertIsNone(parse_decimal("12345678901"))
+        self.assertEqual(parse_date("1977-05-25"), datetime.date(1977, 5, 25))
+        self.assertIsNone(parse_date("unknown"))
+
+    def test_columns_filled_on_ingest_and_save(self):
+        """Test ingest and single saves both keep the typed columns in step with the text."""
+        jabba = Character.objects.get(name="Jabba")
+        self.assertEqual((jabba.height_cm, jabba.mass_kg), (175, decimal.Decimal("1358")))
+        self.assertIsNone(Character.objects.get(name="Arvel").height_cm)
+        self.assertEqual(Film.objects.get(swapi_id=1).released_on, datetime.date(1977, 5, 25))
+        jabba.mass = "1,400"
+        jabba.save()
+        jabba.refresh_from_db()
+        self.assertEqual(jabba.mass_kg, decimal.Decimal("1400"))
+        ingest.ingest(Character, [{"name": "Luke", "height": "173", "url": "https://swapi.info/api/people/1/"}])
+        luke = Character.objects.get(name="Luke")
+        self.assertEqual((luke.height_cm, luke.mass_kg), (173, None))
+
+    def test_out_of_range_numbers_stored_as_null(self):
+        """Test numbers too large for the typed columns are kept as text with NULL shadows."""
+        body = {"swapi_id": 91, "name": "Big", "height": "1e30", "mass": "12345678901"}
+        response = self.client.post(reverse("character-list"), body, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        big = Character.objects.get(name="Big")
+        self.assertEqual((big.height, big.height_cm, big.mass_kg), ("1e30", None, None))
+        ingest.ingest(Character, [{"name": "Huge", "height": "1e30", "mass": "1e30", "url": "https://swapi.info/api/people/90/"}])
+        huge = Character.objects.get(name="Huge")
+        self.assertEqual((huge.height_cm, huge.mass_kg), (None, None))
+
+    def test_columns_not_serialized(self):
+        """Test the typed columns stay out of responses, exports and imports."""
+        item = self.client.get(reverse("film-list")).json()["results"][0]
+        self.assertNotIn("released_on", item)
+        self.assertEqual(item["release_date"], "1977-05-25")
+        self.assertNotIn("mass_kg", self.client.get(reverse("character-list")).json()["results"][0])
+        self.assertNotIn("height_cm", [field.name for field in importer.import_fields(Character)])
+
+    def test_range_filter_and_ordering(self):
+        """Test numeric range filters compare numbers, not strings, and ordering sorts on the typed column."""
+        url = reverse("character-list")
+        self.assertEqual(self.names(url + "?mass__gte=100&ordering=-height"), ["Chewbacca", "Jabba"])
+        self.assertEqual(self.names(url + "?height__lt=200&ordering=height"), ["Luke", "Jabba"])
+        self.assertEqual(self.names(url + "?mass__isnull=true"), ["Arvel"])
+        self.assertEqual(self.names(url + "?ordering=-mass")[:3], ["Jabba", "Chewbacca", "Luke"])
+        self.assertEqual(self.names(reverse("film-list") + "?release_date__gte=1990-01-01"), ["The Phantom Menace"])
+        self.assertEqual(self.names(reverse("film-list") + "?ordering=-release_date"),
+                         ["The Phantom Menace", "A New Hope"])
+
+    def test_invalid_filter_value(self):
+        """Test a malformed number or ordering is rejected with 400."""
+        url = reverse("character-list")
+        self.assertEqual(self.client.get(url + "?mass__gte=heavy").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + "?ordering=gender").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_and_ordering_use_indexes(self):
+        """Test range filters and sorts on the typed columns are served by their indexes."""
+        self.assertIn("api_character_mass_kg", Character.objects.filter(mass_kg__gte=100).explain())
+        plan = Character.objects.order_by("-height_cm", "id").explain()
+        self.assertIn("api_character_height_cm", plan)
+        self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan)
+
+
+@override_settings(API_CACHE={"ENABLED": False})
+class SparseFieldsTests(APITestCase):
+    """Test ?fields=, ?omit= and ?expand= and the queries they narrow."""
+    def setUp(self):
+        self.films = [Film.objects.create(swapi_id=i, title=f"Film {i}", director="Lucas") for i in (1, 2)]
+        self.ship = Starship.objects.create(swapi_id=1, name="X-wing")
+        self.luke = Character.objects.create(swapi_id=1, name="Luke", votes=3)
+        self.luke.films.set(self.films)
+        self.luke.starships.set([self.ship])
+        self.url = reverse("character-list")
+
+    def test_relations_render_as_ids_by_default(self):
+        """Test films and starships are lists of ids unless expanded."""
+        item = self.client.get(self.url).json()["results"][0]
+        self.assertEqual(item["films"], [film.pk for film in self.films])
+        self.assertEqual(item["starships"], [self.ship.pk])
+        item = self.client.get(self.url + "?expand=films").json()["results"][0]
+        self.assertEqual([film["title"] for film in item["films"]], ["Film 1", "Film 2"])
+        self.assertEqual(item["starships"], [self.ship.pk])
+
+    def test_fields_and_omit(self):
+        """Test only the requested fields are rendered, in declaration order."""
+        item = self.client.get(self.url + "?fields=votes,name").json()["results"][0]
+        self.assertEqual(item, {"name": "Luke", "votes": 3})
+        item = self.client.get(reverse("character-detail", args=[self.luke.pk]) + "?omit=films,starships").json()
+        self.assertNotIn("films", item)
+        self.assertEqual(item["name"], "Luke")
+        self.assertEqual(self.client.get(reverse("film-list") + "?fields=title").json()["results"][0], {"title": "Film 1"})
+
+    def test_blank_parameters_are_ignored(self):
+        """Test empty fields, omit and expand render the full object instead of {}."""
+        full = self.client.get(self.url).json()["results"][0]
+        for query in ("?fields=", "?fields=,", "?omit=", "?expand=%20", "?fields=&omit=,&expand="):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, query)
+            self.assertEqual(response.json()["results"][0], full, query)
+        detail = self.client.get(reverse("character-detail", args=[self.luke.pk]) + "?fields=,").json()
+        self.assertEqual(detail["name"], "Luke")
+        batch = self.client.get(reverse("character-batch") + f"?ids={self.luke.pk}&fields=").json()
+        self.assertEqual(batch["results"][str(self.luke.pk)], full)
+
+    def test_unknown_names_rejected(self):
+        """Test unknown fields and non-expandable relations are 400s."""
+        for query in ("?fields=name,secret", "?omit=content_hash", "?expand=name"):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+        self.assertEqual(self.client.get(reverse("film-list") + "?expand=characters").status_code, 400)
+
+    def test_unrequested_data_not_queried(self):
+        """Test sparse reads select only the rendered columns and relations."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url + "?fields=name,votes")
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn('"api_character"."height"', sql)
+        self.assertNotIn("api_character_films", sql)
+        self.assertNotIn("api_film", sql)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url + "?fields=name,films")
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertIn("api_character_films", sql)
+        self.assertNotIn('"api_film"', sql)  # Ids come from the through table alone
+
+    def test_orm_path_narrows_queryset(self):
+        """Test the ModelSerializer path defers unrendered columns and skips unrendered prefetches."""
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.url + "?fields=name")
+        self.assertEqual(response.json()["results"], [{"name": "Luke"}])
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn('"api_character"."height"', sql)
+        self.assertNotIn("api_character_films", sql)
+
+    def test_cursor_pagination_with_sparse_fields(self):
+        """Test keyset pages still work when the sort key is not rendered."""
+        Character.objects.create(swapi_id=2, name="Leia", votes=5)
+        response = self.client.get(self.url + "?pagination=cursor&cursor_ordering=-votes&page_size=1&fields=name")
+        self.assertEqual(response.json()["results"], [{"name": "Leia"}])
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(response.json()["results"], [{"name": "Luke"}])
+
+    def test_writes_ignore_parameters(self):
+        """Test a vote renders the full object whatever the query string says."""
+        response = self.client.post(reverse("character-vote", args=[self.luke.pk]) + "?fields=name")
+        self.assertEqual(response.data["votes"], 4)
+        self.assertEqual(response.data["films"], [film.pk for film in self.films])
+
+
+class BatchReadTests(APITestCase):
+    """Test /batch/ resolves many ids in one request with a constant number of queries."""
+    def setUp(self):
+        films = [Film.objects.create(swapi_id=i, title=f"Film {i}") for i in (1, 2)]
+        self.characters = []
+        for i in range(1, 31):
+            character = Character.objects.create(swapi_id=i, name=f"Character {i}")
+            character.films.set(films)
+            self.characters.append(character)
+        self.url = reverse("character-batch")
+
+    def test_get_returns_objects_keyed_by_id(self):
+        """Test objects come back keyed by id, in request order, with missing ids reported."""
+        first, second = self.characters[0].pk, self.characters[1].pk
+        response = self.client.get(self.url, {"ids": f"{second},999,{first},{second}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(list(data["results"]), [str(second), str(first)])
+        self.assertEqual(data["results"][str(first)]["name"], "Character 1")
+        self.assertEqual(data["missing"], [999])
+
+    def test_post_and_sparse_fields(self):
+        """Test the POST variant takes a JSON list and honours ?fields= / ?expand=."""
+        ids = [character.pk for character in self.characters]
+        response = self.client.post(self.url + "?fields=name,films&expand=films", {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.json()["results"][str(ids[0])]
+        self.assertEqual(item["films"][0]["title"], "Film 1")
+        self.assertEqual(set(item), {"name", "films"})
+
+    def test_query_count_is_constant(self):
+        """Test one query for the rows plus one per relation, however many ids."""
+        for count in (1, 30):
+            ids = ",".join(str(character.pk) for character in self.characters[:count])
+            with self.assertNumQueries(3):
+                self.client.get(self.url, {"ids": ids})
+        with override_settings(FAST_READ_SERIALIZERS=False), self.assertNumQueries(3):
+            response = self.client.get(self.url, {"ids": ids})
+        self.assertEqual(len(response.json()["results"]), 30)
+
+    def test_same_output_as_detail(self):
+        """Test batch items match the detail endpoint, on both rendering paths."""
+        pk = self.characters[2].pk
+        detail = self.client.get(reverse("character-detail", args=[pk])).json()
+        self.assertEqual(self.client.get(self.url, {"ids": pk}).json()["results"][str(pk)], detail)
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            self.assertEqual(self.client.get(self.url, {"ids": pk}).json()["results"][str(pk)], detail)
+
+    def test_invalid_ids(self):
+        """Test malformed, missing and too many ids are 400s."""
+        from .batch import MAX_BATCH_IDS
+        for params in ({}, {"ids": "1,a"}, {"ids": "0"}, {"ids": ","}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+        response = self.client.post(self.url, {"ids": list(range(1, MAX_BATCH_IDS + 2))}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"ids": [1, True]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("film-batch"), {"ids": "1"}).status_code, status.HTTP_200_OK)
+
+
+class BulkVoteTests(APITestCase):
+    """Test /api/votes/ applies many votes across resources in a few queries."""
+    def setUp(self):
+        self.characters = Character.objects.bulk_create(
+            [Character(swapi_id=i, name=f"Character {i}") for i in range(1, 1201)]
+        )
+        self.film = Film.objects.create(swapi_id=1, title="A New Hope", votes=2)
+        self.url = reverse("bulk-vote")
+
+    def test_votes_summed_and_totals_returned(self):
+        """Test repeated entries add up and new totals are returned per resource."""
+        luke = self.characters[0].pk
+        response = self.client.post(self.url, [
+            {"resource": "characters", "id": luke, "count": 2},
+            {"resource": "characters", "id": luke},
+            {"resource": "films", "id": self.film.pk, "count": 5},
+            {"resource": "starships", "id": 42},
+        ], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "results": {"characters": {str(luke): 3}, "films": {str(self.film.pk): 7}, "starships": {}},
+            "missing": {"starships": [42]},
+        })
+        self.assertEqual(Character.objects.get(pk=luke).votes, 3)
+
+    def test_ten_thousand_votes_in_a_handful_of_queries(self):
+        """Test 10k votes cost one UPDATE per 500 rows and table plus one read per table."""
+        entries = [{"resource": "characters", "id": self.characters[i % 1200].pk} for i in range(9990)]
+        entries += [{"resource": "films", "id": self.film.pk}] * 10
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, entries, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [q["sql"] for q in data_queries(ctx)]
+        self.assertEqual(len([sql for sql in statements if sql.startswith("UPDATE")]), 4)  # 3 for 1200 characters, 1 film
+        self.assertLessEqual(len(statements), 8)
+        self.assertEqual(sum(Character.objects.values_list("votes", flat=True)), 9990)
+        self.assertEqual(response.json()["results"]["films"][str(self.film.pk)], 12)
+
+    def test_leaderboard_and_cache_updated(self):
+        """Test bulk votes reach the leaderboard and invalidate cached pages."""
+        pk = self.characters[5].pk
+        self.client.get(reverse("character-leaderboard"))
+        self.client.get(reverse("character-detail", args=[pk]))
+        self.client.post(self.url, [{"resource": "characters", "id": pk, "count": 9}], format="json")
+        self.assertEqual(self.client.get(reverse("character-leaderboard")).json()[0]["id"], pk)
+        self.assertEqual(self.client.get(reverse("character-detail", args=[pk])).json()["votes"], 9)
+
+    def test_invalid_bodies_rejected(self):
+        """Test malformed bodies are 400s and nothing is written."""
+        pk = self.characters[0].pk
+        bodies = (
+            {"resource": "characters", "id": pk},
+            [],
+            [{"resource": "planets", "id": 1}],
+            [{"resource": "characters", "id": "1"}],
+            [{"resource": "characters", "id": pk}, {"resource": "films", "id": self.film.pk, "count": 0}],
+            [{"resource": "characters", "id": pk, "count": True}],
+        )
+        for body in bodies:
+            response = self.client.post(self.url, body, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+        self.assertEqual(Character.objects.get(pk=pk).votes, 0)
+
+    def test_totals_include_buffered_votes(self):
+        """Test totals count votes still waiting in the buffer."""
+        buffer = votes.VoteBuffer(flush_interval=60, max_pending=1000)
+        buffer.add(Film, self.film.pk, 4)
+        with patch("api.votes.get_buffer", return_value=buffer):
+            response = self.client.post(self.url, [{"resource": "films", "id": self.film.pk}], format="json")
+        self.assertEqual(response.json()["results"]["films"][str(self.film.pk)], 7)
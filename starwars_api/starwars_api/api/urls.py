@@ -1,5 +1,9 @@
+from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
-from .views import CharacterViewSet, FilmViewSet, StarshipViewSet
+from . import async_views
+from .views import (
+    BulkVoteView, CacheStatsView, CharacterViewSet, FilmViewSet, JobDetailView, StarshipViewSet, SyncView,
+)
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -8,4 +12,17 @@ router.register("films", FilmViewSet) # /api/films/
 router.register("starships", StarshipViewSet) # /api/starships/
 
 # The API URLs are now determined automatically by the router.
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats"), # /api/cache/stats/
+    path("sync/", SyncView.as_view(), name="sync"), # /api/sync/
+    path("votes/", BulkVoteView.as_view(), name="bulk-vote"), # /api/votes/
+    path("jobs/<str:job_id>/", JobDetailView.as_view(), name="job-detail"), # /api/jobs/<id>/
+    # Async (ASGI-native) endpoints: /api/async/characters/, /api/async/films/1/, ...
+    re_path(r"^async/(?P<resource>characters|films|starships)/$", async_views.resource_list, name="async-list"),
+    re_path(r"^async/(?P<resource>characters|films|starships)/fetch/$", async_views.resource_fetch,
+            name="async-fetch"),
+    re_path(r"^async/(?P<resource>characters|films|starships)/(?P<pk>[0-9]+)/$", async_views.resource_detail,
+            name="async-detail"),
+    re_path(r"^async/(?P<resource>characters|films|starships)/(?P<pk>[0-9]+)/vote/$", async_views.resource_vote,
+            name="async-vote"),
+]
\ No newline at end of file
@@ -1,170 +1,337 @@
 from django.shortcuts import render
-from rest_framework import viewsets, filters
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
 from .models import Character, Film, Starship
 from .serializers import CharacterSerializer, FilmSerializer, StarshipSerializer
-from . import swapi_client
+from . import votes
+from .leaderboard import get_leaderboard
+from .batch import BatchReadMixin
+from .export import ExportMixin
+from .importer import ImportMixin
+from .cache import ConditionalGetMixin, ResponseCacheMixin, get_stats
+from .fast_serializers import FastReadMixin
+from .mixins import PrefetchRelatedMixin, SparseFieldsMixin
+from .search import FullTextSearchFilter
+from .filters import CharacterFilter, FilmFilter, StarshipFilter
+from .sync import fetch_and_ingest, sync_all
+from .jobs import get_registry, submit_job
 
 
-class CharacterViewSet(viewsets.ModelViewSet):
+def get_flag(request, name: str) -> bool:
+    """
+    Reads a boolean query parameter, such as `delete` or `wait` of a fetch request.
+    """
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def fetch_response(request, model, name: str, resource: str) -> Response:
+    """
+    Runs a `fetch` action: as a background job (202 with the job), or
+    inline with ?wait=true (200 with the counts).
+    """
+    delete = get_flag(request, "delete")
+    if get_flag(request, "wait"):
+        return Response(fetch_and_ingest(model, resource, delete=delete))
+    return submit_job(
+        request, f"fetch:{name}",
+        lambda job: fetch_and_ingest(model, resource, delete=delete, progress=job.tracker(name)),
+        delete=delete,
+    )
+
+
+# Resource names accepted by the bulk vote endpoint.
+VOTE_RESOURCES = {
+    "characters": Character,
+    "films": Film,
+    "starships": Starship,
+}
+MAX_BULK_VOTES = 10000  # Vote entries accepted per bulk vote request
+
+
+def parse_bulk_votes(data) -> dict:
+    """
+    Validates the body of a bulk vote request, a list of
+    `{"resource": ..., "id": ..., "count": ...}` entries (`count` defaults
+    to 1), and sums the counts per object.
+
+    Returns:
+        dict: Maps model classes to `{pk: votes to add}` dicts.
+    """
+    if not isinstance(data, list) or not 1 <= len(data) <= MAX_BULK_VOTES:
+        raise ValidationError({"votes": f"Send a JSON list of 1 to {MAX_BULK_VOTES} votes."})
+    counts = {}
+    for index, entry in enumerate(data):
+        if not isinstance(entry, dict) or entry.get("resource") not in VOTE_RESOURCES:
+            raise ValidationError({"votes": f"Entry {index}: must be an object with a resource among: {', '.join(VOTE_RESOURCES)}."})
+        pk, count = entry.get("id"), entry.get("count", 1)
+        if any(type(value) is not int or value < 1 for value in (pk, count)):
+            raise ValidationError({"votes": f"Entry {index}: id and count must be positive integers."})
+        items = counts.setdefault(VOTE_RESOURCES[entry["resource"]], {})
+        items[pk] = items.get(pk, 0) + count
+    return counts
+
+
+def get_leaderboard_limit(request, model) -> int:
+    """
+    Reads and validates the `limit` query parameter of a leaderboard request.
+    """
+    max_limit = get_leaderboard(model).size
+    try:
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        raise ValidationError({"limit": "Must be an integer."})
+    if not 1 <= limit <= max_limit:
+        raise ValidationError({"limit": f"Must be between 1 and {max_limit}."})
+    return limit
+
+
+class CharacterViewSet(BatchReadMixin, ExportMixin, ImportMixin, ConditionalGetMixin, ResponseCacheMixin, SparseFieldsMixin, FastReadMixin, PrefetchRelatedMixin, viewsets.ModelViewSet):
     """
     API endpoint for listing, retrieving, creating, updating, and deleting Star Wars characters.
 
-    - Supports search by name.
+    - Supports full-text search by name, ranked by relevance.
+    - Supports filtering and ordering by gender, votes, and height and mass as numbers
+      (e.g. ?mass__gte=100&ordering=-height; see filters).
     - Pagination is automatically applied if enabled in Django REST Framework settings.
+    - Nested films and starships are prefetched, so each page costs a fixed number of queries.
+    - List and detail responses can be cached until the next write (see API_CACHE) and
+      carry ETag / Last-Modified headers for conditional GETs.
+    - List and detail rows are rendered by a precompiled read plan (see FAST_READ_SERIALIZERS).
     - Includes custom actions:
         * fetch: Fetches all characters from SWAPI and stores them in the database.
         * vote: Increments the vote count for a character.
+        * leaderboard: Lists the most voted characters.
+        * import: Bulk loads characters from an NDJSON or CSV stream.
+        * export: Streams every character as NDJSON (optionally with film and starship ids).
+        * batch: Retrieves many characters by id in one request.
     """
     queryset = Character.objects.all().order_by('id')
     serializer_class = CharacterSerializer
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [FullTextSearchFilter, DjangoFilterBackend]
+    filterset_class = CharacterFilter
     search_fields = ["name"]
+    export_relations = ("films", "starships")
     # Pagination is handled automatically by DRF if configured in settings.py
 
     @action(detail=False, methods=["post"])
     def fetch(self, request):
         """
         Fetch all characters from SWAPI and store them in the database.
-        Only new characters (not already present) are added.
-        Returns the number of new characters stored.
-        """
-        data = swapi_client.fetch_all("people")
-        count = 0
-        for item in data:
-            swapi_id = swapi_client.parse_swapi_id(item["url"])
-            # Create character if not already present
-            obj, created = Character.objects.get_or_create(
-                swapi_id=swapi_id,
-                defaults={
-                    "name": item["name"],
-                    "height": item.get("height", ""),
-                    "mass": item.get("mass", ""),
-                    "gender": item.get("gender", ""),
-                    "url": item["url"],
-                },
-            )
-            if created:
-                count += 1
-        return Response({"stored": count})
+        New characters are inserted and existing ones updated in one bulk upsert.
+        Pages are revalidated against the SWAPI response cache (see SWAPI_CACHE);
+        when nothing changed upstream the ingest is skipped. Only new and changed
+        items are written; ?delete=true also deletes rows SWAPI no longer lists.
+        Runs as a background job and returns 202 with the job (see /api/jobs/<id>/);
+        ?wait=true runs it inside the request instead.
+        Returns the number of characters created, updated and unchanged.
+        """
+        return fetch_response(request, Character, "characters", "people")
 
     @action(detail=True, methods=["post"])
     def vote(self, request, pk=None):
         """
-        Increment the vote count for a character.
+        Increment the vote count for a character with a single atomic UPDATE
+        (or buffer the vote when VOTE_BUFFER is enabled).
         Returns the updated character data.
         """
-        char = get_object_or_404(Character, pk=pk)
-        char.votes += 1
-        char.save()
-        return Response(CharacterSerializer(char).data)
+        char = votes.cast_vote(self.get_object())
+        return Response(self.get_serializer(char).data)
+
+    @action(detail=False, methods=["get"])
+    def leaderboard(self, request):
+        """
+        List the most voted characters, highest first.
+        Accepts ?limit=N (default 10). Served from memory, without a query once warm.
+        """
+        limit = get_leaderboard_limit(request, Character)
+        return Response(get_leaderboard(Character).top(limit))
 
-class FilmViewSet(viewsets.ModelViewSet):
+class FilmViewSet(BatchReadMixin, ExportMixin, ImportMixin, ConditionalGetMixin, ResponseCacheMixin, SparseFieldsMixin, FastReadMixin, PrefetchRelatedMixin, viewsets.ModelViewSet):
     """
     API endpoint for listing, retrieving, creating, updating, and deleting Star Wars films.
 
-    - Supports search by title.
+    - Supports full-text search by title, director and producer, ranked by relevance.
+    - Supports filtering and ordering by episode, votes, and release date as a date
+      (e.g. ?release_date__gte=1990-01-01&ordering=release_date; see filters).
     - Pagination is automatically applied if enabled in Django REST Framework settings.
+    - List and detail responses can be cached until the next write (see API_CACHE) and
+      carry ETag / Last-Modified headers for conditional GETs.
+    - List and detail rows are rendered by a precompiled read plan (see FAST_READ_SERIALIZERS).
     - Includes custom actions:
         * fetch: Fetches all films from SWAPI and stores them in the database.
         * vote: Increments the vote count for a film.
+        * leaderboard: Lists the most voted films.
+        * import: Bulk loads films from an NDJSON or CSV stream.
+        * export: Streams every film as NDJSON.
+        * batch: Retrieves many films by id in one request.
     """
     queryset = Film.objects.all().order_by('id')
     serializer_class = FilmSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title"]
+    filter_backends = [FullTextSearchFilter, DjangoFilterBackend]
+    filterset_class = FilmFilter
+    search_fields = ["title", "director", "producer"]
     # Pagination is handled automatically by DRF if configured in settings.py
 
     @action(detail=False, methods=["post"])
     def fetch(self, request):
         """
         Fetch all films from SWAPI and store them in the database.
-        Only new films (not already present) are added.
-        Returns the number of new films stored.
-        """
-        data = swapi_client.fetch_all("films")
-        count = 0
-        for item in data:
-            swapi_id = swapi_client.parse_swapi_id(item["url"])
-            # Create film if not already present
-            obj, created = Film.objects.get_or_create(
-                swapi_id=swapi_id,
-                defaults={
-                    "title": item["title"],
-                    "episode_id": item.get("episode_id"),
-                    "director": item.get("director", ""),
-                    "producer": item.get("producer", ""),
-                    "release_date": item.get("release_date", ""),
-                    "url": item["url"],
-                },
-            )
-            if created:
-                count += 1
-        return Response({"stored": count})
+        New films are inserted and existing ones updated in one bulk upsert.
+        Pages are revalidated against the SWAPI response cache (see SWAPI_CACHE);
+        when nothing changed upstream the ingest is skipped. Only new and changed
+        items are written; ?delete=true also deletes rows SWAPI no longer lists.
+        Runs as a background job and returns 202 with the job (see /api/jobs/<id>/);
+        ?wait=true runs it inside the request instead.
+        Returns the number of films created, updated and unchanged.
+        """
+        return fetch_response(request, Film, "films", "films")
 
     @action(detail=True, methods=["post"])
     def vote(self, request, pk=None):
         """
-        Increment the vote count for a film.
+        Increment the vote count for a film with a single atomic UPDATE
+        (or buffer the vote when VOTE_BUFFER is enabled).
         Returns the updated film data.
         """
-        film = get_object_or_404(Film, pk=pk)
-        film.votes += 1
-        film.save()
-        return Response(FilmSerializer(film).data)
+        film = votes.cast_vote(self.get_object())
+        return Response(self.get_serializer(film).data)
 
-class StarshipViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"])
+    def leaderboard(self, request):
+        """
+        List the most voted films, highest first.
+        Accepts ?limit=N (default 10). Served from memory, without a query once warm.
+        """
+        limit = get_leaderboard_limit(request, Film)
+        return Response(get_leaderboard(Film).top(limit))
+
+class StarshipViewSet(BatchReadMixin, ExportMixin, ImportMixin, ConditionalGetMixin, ResponseCacheMixin, SparseFieldsMixin, FastReadMixin, PrefetchRelatedMixin, viewsets.ModelViewSet):
     """
     API endpoint for listing, retrieving, creating, updating, and deleting Star Wars starships.
 
-    - Supports search by name.
+    - Supports full-text search by name, model and manufacturer, ranked by relevance.
+    - Supports filtering and ordering by votes (e.g. ?votes__gte=10&ordering=-votes; see filters).
     - Pagination is automatically applied if enabled in Django REST Framework settings.
+    - List and detail responses can be cached until the next write (see API_CACHE) and
+      carry ETag / Last-Modified headers for conditional GETs.
+    - List and detail rows are rendered by a precompiled read plan (see FAST_READ_SERIALIZERS).
     - Includes custom actions:
         * fetch: Fetches all starships from SWAPI and stores them in the database.
         * vote: Increments the vote count for a starship.
+        * leaderboard: Lists the most voted starships.
+        * import: Bulk loads starships from an NDJSON or CSV stream.
+        * export: Streams every starship as NDJSON.
+        * batch: Retrieves many starships by id in one request.
     """
     queryset = Starship.objects.all().order_by('id')
     serializer_class = StarshipSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["name"]
+    filter_backends = [FullTextSearchFilter, DjangoFilterBackend]
+    filterset_class = StarshipFilter
+    search_fields = ["name", "model", "manufacturer"]
     # Pagination is handled automatically by DRF if configured in settings.py
 
     @action(detail=False, methods=["post"])
     def fetch(self, request):
         """
         Fetch all starships from SWAPI and store them in the database.
-        Only new starships (not already present) are added.
-        Returns the number of new starships stored.
-        """
-        data = swapi_client.fetch_all("starships")
-        count = 0
-        for item in data:
-            swapi_id = swapi_client.parse_swapi_id(item["url"])
-            # Create starship if not already present
-            obj, created = Starship.objects.get_or_create(
-                swapi_id=swapi_id,
-                defaults={
-                    "name": item["name"],
-                    "model": item.get("model", ""),
-                    "manufacturer": item.get("manufacturer", ""),
-                    "url": item["url"],
-                },
-            )
-            if created:
-                count += 1
-        return Response({"stored": count})
+        New starships are inserted and existing ones updated in one bulk upsert.
+        Pages are revalidated against the SWAPI response cache (see SWAPI_CACHE);
+        when nothing changed upstream the ingest is skipped. Only new and changed
+        items are written; ?delete=true also deletes rows SWAPI no longer lists.
+        Runs as a background job and returns 202 with the job (see /api/jobs/<id>/);
+        ?wait=true runs it inside the request instead.
+        Returns the number of starships created, updated and unchanged.
+        """
+        return fetch_response(request, Starship, "starships", "starships")
 
     @action(detail=True, methods=["post"])
     def vote(self, request, pk=None):
         """
-        Increment the vote count for a starship.
+        Increment the vote count for a starship with a single atomic UPDATE
+        (or buffer the vote when VOTE_BUFFER is enabled).
         Returns the updated starship data.
         """
-        s = get_object_or_404(Starship, pk=pk)
-        s.votes += 1
-        s.save()
-        return Response(StarshipSerializer(s).data)
+        s = votes.cast_vote(self.get_object())
+        return Response(self.get_serializer(s).data)
 
+    @action(detail=False, methods=["get"])
+    def leaderboard(self, request):
+        """
+        List the most voted starships, highest first.
+        Accepts ?limit=N (default 10). Served from memory, without a query once warm.
+        """
+        limit = get_leaderboard_limit(request, Starship)
+        return Response(get_leaderboard(Starship).top(limit))
+
+
+class CacheStatsView(APIView):
+    """
+    API endpoint reporting the response cache hit and miss counters of this process.
+    """
 
+    def get(self, request):
+        """
+        Return the hit and miss counts and the hit ratio.
+        """
+        return Response(get_stats())
+
+
+class SyncView(APIView):
+    """
+    API endpoint syncing films, starships and characters from SWAPI in one go.
+    """
+
+    def post(self, request):
+        """
+        Fetch all three resources concurrently, then ingest films, starships and
+        characters (with their relations) in one transaction.
+        Accepts ?delete=true to also delete rows SWAPI no longer lists.
+        Runs as a background job and returns 202 with the job (see /api/jobs/<id>/),
+        whose result holds per-resource counts and timings; ?wait=true runs it
+        inside the request and returns the result directly.
+        """
+        delete = get_flag(request, "delete")
+        if get_flag(request, "wait"):
+            return Response(sync_all(delete=delete))
+        return submit_job(request, "sync", lambda job: sync_all(delete=delete, progress=job.report), delete=delete)
+
+
+class BulkVoteView(APIView):
+    """
+    API endpoint applying many votes, across resources, in one transaction.
+    """
+
+    def post(self, request):
+        """
+        Add the votes in a JSON list of {"resource", "id", "count"} entries, e.g.
+        [{"resource": "characters", "id": 1, "count": 3}, {"resource": "films", "id": 2}].
+        Votes are summed per object and written with one CASE/WHEN UPDATE per table
+        (and 500 rows), all in one transaction.
+        Returns the new totals per resource and id, and the ids that do not exist.
+        """
+        counts = parse_bulk_votes(request.data)
+        totals, missing = votes.cast_votes(counts)
+        names = {model: name for name, model in VOTE_RESOURCES.items()}
+        return Response({
+            "results": {names[model]: {str(pk): total for pk, total in items.items()} for model, items in totals.items()},
+            "missing": {names[model]: pks for model, pks in missing.items() if pks},
+        })
+
+
+class JobDetailView(APIView):
+    """
+    API endpoint reporting the status, progress and result of a background job.
+    """
+
+    def get(self, request, job_id):
+        """
+        Return the job's status, progress (pages fetched, rows written), result or error.
+        """
+        job = get_registry().get(job_id)
+        if job is None:
+            raise NotFound("No such job (finished jobs are kept for a limited time).")
+        return Response(job.to_dict())
@@ -0,0 +1,262 @@
+"""
+Vote counting for characters, films and starships.
+
+Votes are applied with `UPDATE ... SET votes = votes + n` so concurrent
+votes never overwrite each other. When the VOTE_BUFFER setting is enabled,
+votes are collected in memory instead and flushed in batched UPDATEs on an
+interval, when enough votes are pending, and at interpreter shutdown.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import leaderboard
+from .signals import votes_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SETTINGS = {
+    "ENABLED": False,  # Apply every vote straight to the database
+    "FLUSH_INTERVAL": 1.0,  # Seconds between background flushes
+    "MAX_PENDING": 1000,  # Flush as soon as this many votes are waiting
+}
+UPDATE_BATCH_SIZE = 500  # Rows per CASE/WHEN UPDATE statement
+
+
+def cast_vote(obj, amount: int = 1):
+    """
+    Adds votes to a Character, Film or Starship.
+
+    Without a buffer the vote is written with a single UPDATE of the `votes`
+    and `updated_at` columns and `obj.votes` is reloaded. With the buffer enabled nothing is
+    written; `obj.votes` is raised by the votes still pending for it, so the
+    caller sees the count the database will hold after the next flush.
+
+    Either way the model's leaderboard is updated with the new count.
+
+    Args:
+        obj: The model instance being voted for.
+        amount (int): Number of votes to add.
+
+    Returns:
+        The same instance, with `votes` up to date.
+    """
+    model = type(obj)
+    buffer = get_buffer()
+    if buffer is not None:
+        obj.votes += buffer.add(model, obj.pk, amount)
+    else:
+        model.objects.filter(pk=obj.pk).update(votes=F("votes") + amount, updated_at=timezone.now())
+        obj.refresh_from_db(fields=["votes", "updated_at"])
+        votes_changed.send(sender=model)
+    leaderboard.get_leaderboard(model).record(obj)
+    return obj
+
+
+async def acast_vote(obj, amount: int = 1):
+    """
+    Async counterpart of `cast_vote`, for async views.
+
+    The UPDATE and reload go through the async ORM. Buffered votes are added
+    in a worker thread, since reaching MAX_PENDING flushes the buffer.
+    """
+    model = type(obj)
+    buffer = get_buffer()
+    if buffer is not None:
+        obj.votes += await sync_to_async(buffer.add)(model, obj.pk, amount)
+    else:
+        await model.objects.filter(pk=obj.pk).aupdate(votes=F("votes") + amount, updated_at=timezone.now())
+        await obj.arefresh_from_db(fields=["votes", "updated_at"])
+        await votes_changed.asend(sender=model)
+    leaderboard.get_leaderboard(model).record(obj)
+    return obj
+
+
+def apply_votes(model, counts: dict) -> int:
+    """
+    Adds many vote increments to one table.
+
+    Each batch of rows is updated with a single
+    `UPDATE ... SET votes = votes + CASE WHEN id = ... THEN n ... END`.
+
+    Args:
+        model: The model class the counts belong to.
+        counts (dict): Maps primary keys to the number of votes to add.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    updated = 0
+    items = [(pk, amount) for pk, amount in counts.items() if amount]
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = items[start:start + UPDATE_BATCH_SIZE]
+        increment = Case(*[When(pk=pk, then=Value(amount)) for pk, amount in batch], default=Value(0))
+        updated += model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            votes=F("votes") + increment, updated_at=timezone.now()
+        )
+    return updated
+
+
+def cast_votes(counts: dict) -> tuple:
+    """
+    Adds many votes, possibly to several models, in one transaction.
+
+    The votes of each table are written with `apply_votes` (one CASE/WHEN
+    UPDATE per batch of rows), then the new totals are read back with one
+    query per table. The buffer is bypassed, since the
+    votes are already batched; totals still include votes it holds for the
+    same objects. Leaderboards are updated as by `cast_vote`.
+
+    Args:
+        counts (dict): Maps model classes to `{pk: votes to add}` dicts.
+
+    Returns:
+        tuple: `{model: {pk: new total}}` for the objects that exist, and
+        `{model: [pk, ...]}` for the ones that do not (their votes are dropped).
+    """
+    counts = {model: {pk: amount for pk, amount in items.items() if amount} for model, items in counts.items()}
+    counts = {model: items for model, items in counts.items() if items}
+    totals, missing, voted = {}, {}, {}
+    if not counts:
+        return totals, missing
+    buffer = get_buffer()
+    with transaction.atomic(using=router.db_for_write(next(iter(counts)))):
+        for model, items in counts.items():
+            apply_votes(model, items)
+            label = leaderboard.get_leaderboard(model).label
+            voted[model] = list(model.objects.filter(pk__in=list(items)).only("pk", label, "votes"))
+    for model, objects in voted.items():
+        board = leaderboard.get_leaderboard(model)
+        for obj in objects:
+            if buffer is not None:
+                obj.votes += buffer.pending(model, obj.pk)
+            board.record(obj)
+        totals[model] = {obj.pk: obj.votes for obj in objects}
+        missing[model] = [pk for pk in counts[model] if pk not in totals[model]]
+        votes_changed.send(sender=model)
+    return totals, missing
+
+
+class VoteBuffer:
+    """
+    Thread-safe in-process buffer of pending votes.
+
+    Votes are counted per model and primary key and written with
+    `apply_votes`, one transaction per flush.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = defaultdict(Counter)  # model -> {pk: votes}
+        self._size = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, model, pk, amount: int = 1) -> int:
+        """
+        Records votes and returns the number now pending for that object.
+        Triggers a flush once `max_pending` votes are waiting.
+        """
+        with self._lock:
+            self._pending[model][pk] += amount
+            self._size += amount
+            pending = self._pending[model][pk]
+            full = self._size >= self.max_pending
+        if full:
+            self.flush()
+        return pending
+
+    def pending(self, model, pk) -> int:
+        """
+        Returns the number of votes waiting to be written for an object.
+        """
+        with self._lock:
+            return self._pending.get(model, {}).get(pk, 0)
+
+    def flush(self) -> int:
+        """
+        Writes all pending votes to the database.
+
+        If the write fails the votes are put back so the next flush retries them.
+
+        Returns:
+            int: The number of votes written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(Counter)
+                size, self._size = self._size, 0
+            if not size:
+                return 0
+            try:
+                for model, counts in pending.items():
+                    with transaction.atomic(using=router.db_for_write(model)):
+                        apply_votes(model, counts)
+                    counts.clear()
+                    votes_changed.send(sender=model)
+            except Exception:
+                with self._lock:
+                    for model, counts in pending.items():
+                        self._pending[model].update(counts)
+                        self._size += sum(counts.values())
+                raise
+            return size
+
+    def start(self):
+        """
+        Starts the background thread that flushes every `flush_interval` seconds.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and writes any remaining votes.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered votes")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """
+    Returns the process-wide VoteBuffer, or None when buffering is disabled.
+
+    The buffer is created on first use, its flush thread started, and a final
+    flush registered to run at interpreter shutdown.
+    """
+    global _buffer
+    config = {**DEFAULT_BUFFER_SETTINGS, **getattr(settings, "VOTE_BUFFER", {})}
+    if not config["ENABLED"]:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = VoteBuffer(config["FLUSH_INTERVAL"], config["MAX_PENDING"])
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
@@ -0,0 +1,115 @@
+"""
+Benchmark: WSGI vs ASGI throughput and latency at high concurrency.
+
+    python -m benchmarks.asgi_load [--characters N] [--requests N] [--concurrency 1,16,64,256]
+
+Requests are driven in-process through Django's full handler stack
+(middleware, URL routing, views), with no server or network in between:
+
+- WSGI, DRF view: a pool of `concurrency` threads, like a threaded WSGI
+  server, each calling the WSGI handler (django.test.Client).
+- ASGI, DRF view: `concurrency` concurrent tasks calling the ASGI handler
+  (django.test.AsyncClient); the sync view runs via sync_to_async.
+- ASGI, async view: the same, against /api/async/, which uses the async ORM.
+
+The response cache is disabled, so every request renders from the database
+(an SQLite file). Note that Django's async ORM still runs each query in a
+worker thread, so the async views mainly save server threads rather than
+per-request CPU time.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import seed, setup, test_database
+
+
+def run_threads(url: str, total: int, concurrency: int) -> list:
+    """
+    Issues `total` GETs from `concurrency` threads; returns latencies in ms.
+    """
+    from django.db import connections
+    from django.test import Client
+
+    def worker(count):
+        client = Client()
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.get(url)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        connections.close_all()
+        return samples
+
+    counts = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return [sample for samples in executor.map(worker, counts) for sample in samples]
+
+
+def run_tasks(url: str, total: int, concurrency: int) -> list:
+    """
+    Issues `total` GETs from `concurrency` asyncio tasks; returns latencies in ms.
+    """
+    from django.test import AsyncClient
+
+    async def worker(count):
+        client = AsyncClient()
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.get(url)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        return samples
+
+    async def main():
+        counts = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        results = await asyncio.gather(*(worker(count) for count in counts))
+        return [sample for samples in results for sample in samples]
+
+    return asyncio.run(main())
+
+
+def report(label: str, concurrency: int, samples: list, seconds: float) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return (f"{label:<20} c={concurrency:<4} {len(samples) / seconds:8.0f} req/s   "
+            f"p50 {cuts[49]:8.2f} ms   p99 {cuts[98]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,16,64,256",
+                        help="Comma-separated concurrency levels.")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    setup()
+    from django.test import override_settings
+
+    with tempfile.TemporaryDirectory() as directory, test_database(os.path.join(directory, "bench.sqlite3")):
+        seed(args.characters)
+        scenarios = [
+            ("WSGI, DRF view", run_threads, "/api/characters/?page_size=20"),
+            ("ASGI, DRF view", run_tasks, "/api/characters/?page_size=20"),
+            ("ASGI, async view", run_tasks, "/api/async/characters/?page_size=20"),
+        ]
+        with override_settings(API_CACHE={"ENABLED": False}, ALLOWED_HOSTS=["testserver"]):
+            for concurrency in levels:
+                for label, runner, url in scenarios:
+                    runner(url, min(args.requests, 50), min(concurrency, 8))  # Warm up
+                    start = time.perf_counter()
+                    samples = runner(url, args.requests, concurrency)
+                    print(report(label, concurrency, samples, time.perf_counter() - start))
+                print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: streaming bulk import of synthetic characters into SQLite.
+
+    python -m benchmarks.bulk_import [--rows N] [--batch-size N] [--budget SECONDS]
+
+Films and starships are seeded first; every character links 3 of each by
+SWAPI id. The records are generated on the fly and fed to the importer as
+NDJSON lines, so neither side holds the input in memory. The database is a
+SQLite file next to the project (not the in-memory test database), so the
+peak RSS reflects the importer only. Exits with status 1 when the import
+takes longer than --budget seconds.
+"""
+
+import argparse
+import json
+import sys
+import resource
+
+from benchmarks.common import seed, setup, test_database
+
+
+def records(rows: int, films: int, starships: int):
+    """
+    Yields NDJSON lines for `rows` synthetic characters.
+    """
+    for i in range(1, rows + 1):
+        yield json.dumps({
+            "swapi_id": i, "name": f"Character {i}", "height": "172", "mass": "77", "gender": "male",
+            "url": f"https://swapi.info/api/people/{i}/",
+            "films": [(i + j) % films + 1 for j in range(3)],
+            "starships": [(i + j) % starships + 1 for j in range(3)],
+        }) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--budget", type=float, default=300.0, help="Time budget in seconds (default 300).")
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+
+    from api.importer import BATCH_SIZE, import_stream
+    from api.models import Character
+
+    with test_database(name=str(settings.BASE_DIR / "benchmark_import.sqlite3")):
+        seed(0, films=6, starships=36)
+        report = import_stream(Character, records(args.rows, 6, 36), "ndjson", args.batch_size or BATCH_SIZE)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux reports KiB
+        print(f"{report['rows']} rows in {report['seconds']:.1f}s ({report['rows_per_second']} rows/s), "
+              f"{report['created']} created, {report['invalid']} invalid, linked {report['linked']}, "
+              f"peak RSS {peak / 1e6:.1f} MB")
+        if report["seconds"] > args.budget:
+            print(f"Over the {args.budget:.0f}s budget")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: N votes as one request per vote vs one bulk vote request.
+
+    python -m benchmarks.bulk_votes [--characters N] [--votes N]
+
+Votes go to random characters. The per-vote side calls
+POST /api/characters/<id>/vote/ for each vote; the bulk side sends all of
+them to POST /api/votes/ at once. Wall time and query counts are reported.
+"""
+
+import argparse
+import random
+import time
+from contextlib import contextmanager
+
+from benchmarks.common import seed, setup, test_database
+
+
+@contextmanager
+def count_queries(counter: list):
+    """
+    Counts the statements run on the default connection into `counter[0]`
+    (the query log of CaptureQueriesContext stops at 9000).
+    """
+    from django.db import connection
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--votes", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client
+
+    with test_database():
+        seed(args.characters)
+        client = Client()
+        rng = random.Random(0)
+        ids = [rng.randint(1, args.characters) for _ in range(args.votes)]
+
+        queries = [0]
+        with count_queries(queries):
+            start = time.perf_counter()
+            for pk in ids:
+                assert client.post(f"/api/characters/{pk}/vote/").status_code == 200
+            seconds = time.perf_counter() - start
+        print(f"{'one request per vote':<24} {seconds:8.3f} s   {queries[0]:6d} queries")
+
+        body = [{"resource": "characters", "id": pk} for pk in ids]
+        queries = [0]
+        with count_queries(queries):
+            start = time.perf_counter()
+            response = client.post("/api/votes/", body, content_type="application/json")
+            seconds = time.perf_counter() - start
+        assert response.status_code == 200, response.content
+        print(f"{'one bulk request':<24} {seconds:8.3f} s   {queries[0]:6d} queries")
+
+
+if __name__ == "__main__":
+    main()
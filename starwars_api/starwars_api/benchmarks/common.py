@@ -0,0 +1,111 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run a benchmark from the project directory (next to manage.py), e.g.:
+
+    python -m benchmarks.response_cache
+
+Every benchmark runs against a throwaway test database, so the development
+database is never touched.
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """
+    Configures Django for a standalone benchmark script.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "starwars_api.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """
+    Creates a fresh test database for the duration of the block.
+
+    `name` overrides the test database name, e.g. a file path to benchmark
+    SQLite on disk rather than in memory.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    if name:
+        connection.settings_dict["TEST"]["NAME"] = name
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed(characters: int, films: int = 6, starships: int = 36, links: int = 3):
+    """
+    Bulk-creates synthetic characters, films and starships.
+
+    Each character is linked to `links` films and `links` starships.
+    """
+    from api.models import Character, Film, Starship
+
+    Film.objects.bulk_create(
+        Film(swapi_id=i, title=f"Film {i}", director="Director", producer="Producer",
+             release_date="1977-05-25", url=f"https://swapi.info/api/films/{i}/")
+        for i in range(1, films + 1)
+    )
+    Starship.objects.bulk_create(
+        Starship(swapi_id=i, name=f"Starship {i}", model="Model", manufacturer="Manufacturer",
+                 url=f"https://swapi.info/api/starships/{i}/")
+        for i in range(1, starships + 1)
+    )
+    film_pks = list(Film.objects.values_list("pk", flat=True))
+    starship_pks = list(Starship.objects.values_list("pk", flat=True))
+    batch = 10_000
+    for start in range(1, characters + 1, batch):
+        Character.objects.bulk_create(
+            Character(swapi_id=i, name=f"Character {i}", height="172", mass="77", gender="male",
+                      url=f"https://swapi.info/api/people/{i}/", votes=i % 1000)
+            for i in range(start, min(start + batch, characters + 1))
+        )
+    if links:
+        film_through = Character.films.through
+        starship_through = Character.starships.through
+        pks = list(Character.objects.values_list("pk", flat=True))
+        for start in range(0, len(pks), batch):
+            chunk = pks[start:start + batch]
+            film_through.objects.bulk_create(
+                film_through(character_id=pk, film_id=film_pks[(pk + j) % len(film_pks)])
+                for pk in chunk for j in range(min(links, len(film_pks)))
+            )
+            starship_through.objects.bulk_create(
+                starship_through(character_id=pk, starship_id=starship_pks[(pk + j) % len(starship_pks)])
+                for pk in chunk for j in range(min(links, len(starship_pks)))
+            )
+
+
+def measure(func, repeat: int) -> list:
+    """
+    Calls `func` `repeat` times and returns the durations in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples: list) -> str:
+    """
+    Formats p50/p99 (and mean) of a list of millisecond samples.
+    """
+    cuts = statistics.quantiles(samples, n=100)
+    return f"{label:<32} p50 {cuts[49]:8.3f} ms   p99 {cuts[98]:8.3f} ms   mean {statistics.fmean(samples):8.3f} ms"
@@ -0,0 +1,111 @@
+"""
+Benchmark: mixed read/vote load on SQLite, untuned vs the tuned profile.
+
+    python -m benchmarks.db_profile [--characters N] [--readers N] [--voters N] [--seconds N]
+
+Reader threads list and retrieve characters while voter threads vote, all
+through the WSGI handler against an SQLite file, first with SQLite's
+defaults (rollback journal, deferred transactions, no PRAGMAs, a new
+connection per request) and then with the profile from api/db.py (WAL,
+synchronous=NORMAL, busy timeout, cache and mmap sizes, BEGIN IMMEDIATE,
+persistent connections). Reports requests per second, p99 latency and
+"database is locked" errors for each.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import seed, setup, test_database
+
+
+def run_load(pks: list, readers: int, voters: int, seconds: float) -> dict:
+    """
+    Runs reader and voter threads for `seconds`; returns latencies and error counts.
+    """
+    from django.db import OperationalError, connections
+    from django.test import Client
+
+    stop = threading.Event()
+
+    def worker(kind):
+        client = Client()
+        rng = random.Random()
+        samples, errors = [], 0
+        while not stop.is_set():
+            pk = rng.choice(pks)
+            start = time.perf_counter()
+            try:
+                if kind == "vote":
+                    response = client.post(f"/api/characters/{pk}/vote/")
+                elif rng.random() < 0.5:
+                    response = client.get("/api/characters/?page_size=20&page=%d" % rng.randint(1, 10))
+                else:
+                    response = client.get(f"/api/characters/{pk}/")
+                assert response.status_code == 200, response.status_code
+                samples.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                errors += 1  # "database is locked"
+        connections.close_all()
+        return kind, samples, errors
+
+    kinds = ["read"] * readers + ["vote"] * voters
+    with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+        futures = [executor.submit(worker, kind) for kind in kinds]
+        time.sleep(seconds)
+        stop.set()
+        results = [future.result() for future in futures]
+    report = {}
+    for kind in ("read", "vote"):
+        samples = [s for k, ss, _ in results if k == kind for s in ss]
+        report[kind] = {
+            "per_second": len(samples) / seconds,
+            "p99": statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else float("nan"),
+            "errors": sum(e for k, _, e in results if k == kind),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--voters", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.db import connections
+    from django.test import override_settings
+
+    from api.db import database_settings
+
+    tuned_databases, tuned_pragmas = database_settings({}, settings.BASE_DIR)
+    profiles = [
+        ("untuned", {"CONN_MAX_AGE": 0, "OPTIONS": {}}, {"journal_mode": "DELETE"}),
+        ("tuned", {key: tuned_databases["default"][key] for key in ("CONN_MAX_AGE", "OPTIONS")}, tuned_pragmas),
+    ]
+    with tempfile.TemporaryDirectory() as directory, test_database(os.path.join(directory, "bench.sqlite3")):
+        seed(args.characters)
+        from api.models import Character
+        pks = list(Character.objects.values_list("pk", flat=True))
+        database = connections.settings["default"]
+        with override_settings(API_CACHE={"ENABLED": False}):
+            for label, options, pragmas in profiles:
+                connections.close_all()
+                database.update(options)
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    report = run_load(pks, args.readers, args.voters, args.seconds)
+                for kind, result in report.items():
+                    print(f"{label:<8} {kind:<5} {result['per_second']:8.0f} req/s   "
+                          f"p99 {result['p99']:8.2f} ms   locked errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
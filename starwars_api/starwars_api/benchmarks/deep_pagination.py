@@ -0,0 +1,44 @@
+"""
+Benchmark: deep-page latency of page-number vs cursor (keyset) pagination.
+
+    python -m benchmarks.deep_pagination [--rows N] [--repeat N]
+
+Seeding the default 1M rows takes a minute or two.
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client, override_settings
+
+    from api.models import Character
+    from api.pagination import KeysetPagination
+
+    with test_database(), override_settings(API_CACHE={"ENABLED": False}):
+        seed(args.rows, links=0)
+        client = Client()
+        base = f"/api/films/?page_size={args.page_size}"  # Warm up the URL resolver and renderers
+        client.get(base)
+        for depth in (0.01, 0.5, 0.99):
+            page = max(1, int(args.rows / args.page_size * depth))
+            offset_url = f"/api/characters/?page_size={args.page_size}&page={page}"
+            # The cursor pointing at the same position the page-number request starts from.
+            last_id = Character.objects.order_by("id").values_list("id", flat=True)[(page - 1) * args.page_size]
+            cursor = KeysetPagination.encode_cursor("id", [last_id - 1])
+            cursor_url = f"/api/characters/?page_size={args.page_size}&pagination=cursor&cursor={cursor}"
+            print(summarize(f"page {page} page-number", measure(lambda: client.get(offset_url), args.repeat)))
+            print(summarize(f"page {page} cursor", measure(lambda: client.get(cursor_url), args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Benchmark: DRF's JSONRenderer vs FastJSONRenderer on large character pages.
+
+    python -m benchmarks.json_renderer [--characters N] [--repeat N]
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    setup()
+    from api.mixins import get_prefetch_lookups
+    from api.models import Character
+    from api.renderers import FastJSONRenderer, get_backend
+    from api.serializers import CharacterSerializer
+    from rest_framework.renderers import JSONRenderer
+
+    with test_database():
+        seed(args.characters)
+        page = Character.objects.prefetch_related(*get_prefetch_lookups(CharacterSerializer)).order_by("pk")
+        data = CharacterSerializer(page, many=True).data
+        backend = get_backend()
+        print(f"{len(data)} characters, fast backend: {backend.name if backend else 'none (stdlib)'}")
+        for label, renderer in (("JSONRenderer", JSONRenderer()), ("FastJSONRenderer", FastJSONRenderer())):
+            samples = measure(lambda: renderer.render(data), args.repeat)
+            size = len(renderer.render(data))
+            print(summarize(label, samples), f"  {size / 1e6 * 1000 / (sum(samples) / len(samples)):8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
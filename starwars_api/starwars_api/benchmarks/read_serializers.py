@@ -0,0 +1,45 @@
+"""
+Benchmark: ModelSerializer vs precompiled read plan for character pages.
+
+    python -m benchmarks.read_serializers [--characters N] [--repeat N]
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from api.fast_serializers import get_read_plan
+    from api.models import Character
+    from api.serializers import CharacterSerializer
+    from api.mixins import get_prefetch_lookups
+    from rest_framework.renderers import JSONRenderer
+
+    with test_database():
+        seed(args.characters)
+        plan = get_read_plan(CharacterSerializer)
+        lookups = get_prefetch_lookups(CharacterSerializer)
+        renderer = JSONRenderer()
+        for page_size in (10, 100, 1000):
+            def model_serializer():
+                page = Character.objects.prefetch_related(*lookups).order_by("pk")[:page_size]
+                return renderer.render(CharacterSerializer(page, many=True).data)
+
+            def read_plan():
+                page = Character.objects.order_by("pk").values(*plan.columns)[:page_size]
+                return renderer.render(plan.render(page))
+
+            assert model_serializer() == read_plan()
+            print(summarize(f"page_size={page_size} serializer", measure(model_serializer, args.repeat)))
+            print(summarize(f"page_size={page_size} read plan", measure(read_plan, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
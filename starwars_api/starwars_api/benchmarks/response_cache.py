@@ -0,0 +1,39 @@
+"""
+Benchmark: list/retrieve latency with and without the response cache.
+
+    python -m benchmarks.response_cache [--characters N] [--repeat N]
+"""
+
+import argparse
+
+from benchmarks.common import measure, seed, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client, override_settings
+
+    with test_database():
+        seed(args.characters)
+        client = Client()
+        urls = {
+            "list (page_size=100)": "/api/characters/?page_size=100",
+            "retrieve": "/api/characters/1/",
+        }
+        for label, url in urls.items():
+            with override_settings(API_CACHE={"ENABLED": False}):
+                uncached = measure(lambda: client.get(url), args.repeat)
+            with override_settings(API_CACHE={"ENABLED": True}):
+                client.get(url)  # Warm the cache
+                cached = measure(lambda: client.get(url), args.repeat)
+            print(summarize(f"{label} uncached", uncached))
+            print(summarize(f"{label} cached", cached))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from api.db import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -76,13 +80,12 @@ WSGI_APPLICATION = "starwars_api.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# Chosen by environment variables (see api/db.py): SQLite in WAL mode by
+# default, or DB_ENGINE=postgresql with persistent or pooled connections.
+# SQLITE_PRAGMAS run on every new SQLite connection.
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
+DATABASES, SQLITE_PRAGMAS = database_settings(os.environ, BASE_DIR)
 
 
 # Password validation
@@ -127,7 +130,23 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 #pagination and filtering settings
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.StandardPagination",
+    # JSON through orjson/msgspec when installed (see FAST_JSON_BACKEND below),
+    # plus MessagePack/CBOR when their libraries are installed. JSON and the
+    # browsable API come first, so they stay the defaults.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        *(["api.renderers.MessagePackRenderer"] if find_spec("msgpack") else []),
+        *(["api.renderers.CBORRenderer"] if find_spec("cbor2") else []),
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        *(["api.renderers.MessagePackParser"] if find_spec("msgpack") else []),
+        *(["api.renderers.CBORParser"] if find_spec("cbor2") else []),
+    ],
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -139,5 +158,70 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache holding the resource versions behind ETags (and cached responses).
+# It must be shared by every worker process: files are shared on one host;
+# use a shared backend such as Redis when running on several hosts.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "api_cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+# Response caching for list/retrieve endpoints, invalidated on every write.
+# Off by default; ALIAS must name a cache shared by every worker process.
+API_CACHE = {
+    "ENABLED": False,
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Render list/retrieve responses from .values() rows through precompiled
+# read plans instead of ModelSerializer instances (same output, less CPU).
+FAST_READ_SERIALIZERS = True
+
+# Encoder behind FastJSONRenderer/FastJSONParser: "auto" (orjson, then
+# msgspec, whichever is installed), "orjson", "msgspec" or "json" (stdlib).
+FAST_JSON_BACKEND = "auto"
+
+# SWAPI client settings
+SWAPI_CONCURRENCY = 4  # Pages fetched in parallel during an import (1 = sequential)
+SWAPI_TIMEOUT = 10  # Per-request timeout in seconds
+
+# On-disk cache of SWAPI pages used by the fetch actions. Pages younger than
+# TTL seconds are reused as they are; older ones are revalidated with
+# If-None-Match / If-Modified-Since, and served stale if SWAPI is down.
+SWAPI_CACHE = {
+    "ENABLED": True,
+    "PATH": BASE_DIR / "swapi_cache.sqlite3",
+    "TTL": 3600,
+}
+
+# Background jobs for the fetch and sync endpoints: BACKEND runs them
+# (ThreadPoolBackend: MAX_WORKERS threads in this process; ImmediateBackend:
+# inline), and finished jobs stay visible for RETENTION seconds.
+JOBS = {
+    "BACKEND": "api.jobs.ThreadPoolBackend",
+    "MAX_WORKERS": 2,
+    "RETENTION": 3600,
+}
+
+# Vote buffering: when enabled, votes are counted in memory and written in
+# batched UPDATEs every FLUSH_INTERVAL seconds, once MAX_PENDING votes are
+# waiting, and at shutdown.
+VOTE_BUFFER = {
+    "ENABLED": False,
+    "FLUSH_INTERVAL": 1.0,
+    "MAX_PENDING": 1000,
+}
+
+# In-memory leaderboards: SIZE entries per resource (the largest ?limit=),
+# rebuilt from the database after TTL seconds or any non-vote write.
+LEADERBOARD = {
+    "SIZE": 100,
+    "TTL": 60,
+}
+
 # Static files root for collectstatic
 STATIC_ROOT = BASE_DIR / "staticfiles"
\ No newline at end of file